@@ -0,0 +1,208 @@
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+import numpy as np
+import pandas as pd
+
+# 基准测试使用的表配置（与 tests/create_test_tables*.sql 的结构一致）
+TABLES_CONFIG: Dict[str, Dict[str, Any]] = {
+    "employees": {
+        "primary_key": "emp_id",
+        "date_columns": ["hire_date", "birth_date"],
+        "number_columns": ["emp_id", "department_id", "salary"],
+        "backup_enabled": True,
+        "columns_mapping": {
+            "employee_id": "emp_id",
+            "name": "emp_name",
+            "dept": "department_id",
+        },
+    },
+    "departments": {
+        "primary_key": "dept_id",
+        "date_columns": ["create_date"],
+        "number_columns": ["manager_id"],
+        "backup_enabled": True,
+        "columns_mapping": {
+            "id": "dept_id",
+            "name": "dept_name",
+            "manager": "manager_id",
+        },
+    },
+}
+
+FIRST_EMP_ID = 1
+
+
+def department_count(rows: int) -> int:
+    """基础数据中的部门数量（不少于各场景中部门变更的行数）"""
+    return max(5, rows // 2)
+
+
+def employee_status(emp_ids: np.ndarray) -> np.ndarray:
+    """基础数据中员工的状态（复合条件场景据此构造匹配的条件）"""
+    return np.where(emp_ids % 2 == 1, "active", "inactive")
+
+
+def dept_ids(ids: np.ndarray) -> np.ndarray:
+    """部门编号"""
+    return np.char.add("D", np.char.zfill(ids.astype(str), 7))
+
+
+def iter_base_rows(
+    rows: int, chunk_size: int = 100_000
+) -> Iterator[Tuple[str, List[tuple]]]:
+    """按块生成基础数据 (表名, 行列表)，员工和部门各覆盖变更文件中的全部键"""
+    for start in range(0, rows, chunk_size):
+        ids = np.arange(
+            FIRST_EMP_ID + start, FIRST_EMP_ID + min(rows, start + chunk_size)
+        )
+        yield "employees", list(
+            zip(
+                ids.tolist(),
+                [f"Employee{i}" for i in ids.tolist()],
+                (ids % 10 + 1).tolist(),
+                (3000 + ids % 7000).tolist(),
+                ["2020-01-01"] * len(ids),
+                employee_status(ids).tolist(),
+            )
+        )
+
+    n_dept = department_count(rows)
+    for start in range(0, n_dept, chunk_size):
+        ids = np.arange(start + 1, min(n_dept, start + chunk_size) + 1)
+        yield "departments", list(
+            zip(
+                dept_ids(ids).tolist(),
+                [f"Department{i}" for i in ids.tolist()],
+                (FIRST_EMP_ID + ids % rows).tolist(),
+                ["2020-01-01"] * len(ids),
+                ["active"] * len(ids),
+            )
+        )
+
+
+def _split(rows: int, ratios: List[float]) -> List[int]:
+    """按比例拆分行数，余数计入最后一部分"""
+    counts = [int(rows * r) for r in ratios[:-1]]
+    return counts + [rows - sum(counts)]
+
+
+def _employee_updates(ids: np.ndarray, rng: np.random.Generator) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "table": "employees",
+            "command": "update",
+            "employee_id": ids,
+            "new_salary": rng.integers(3000, 10000, len(ids)),
+            "new_status": rng.choice(["active", "inactive"], len(ids)),
+        }
+    )
+
+
+def _employee_deletes(ids: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({"table": "employees", "command": "delete", "employee_id": ids})
+
+
+def _update_heavy(rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """90% 按主键更新，10% 按主键删除"""
+    ids = FIRST_EMP_ID + rng.permutation(rows)
+    n_update, _ = _split(rows, [0.9, 0.1])
+    return pd.concat(
+        [_employee_updates(ids[:n_update], rng), _employee_deletes(ids[n_update:])],
+        ignore_index=True,
+    )
+
+
+def _delete_heavy(rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """20% 按主键更新，80% 按主键删除"""
+    ids = FIRST_EMP_ID + rng.permutation(rows)
+    n_update, _ = _split(rows, [0.2, 0.8])
+    return pd.concat(
+        [_employee_updates(ids[:n_update], rng), _employee_deletes(ids[n_update:])],
+        ignore_index=True,
+    )
+
+
+def _multi_table(rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """员工更新 50%、员工删除 20%、部门更新 30%"""
+    n_emp_update, n_emp_delete, n_dept = _split(rows, [0.5, 0.2, 0.3])
+    ids = FIRST_EMP_ID + rng.permutation(n_emp_update + n_emp_delete)
+    dept = dept_ids(1 + rng.permutation(department_count(rows))[:n_dept])
+    departments = pd.DataFrame(
+        {
+            "table": "departments",
+            "command": "update",
+            "id": dept,
+            "new_manager": FIRST_EMP_ID + rng.integers(0, rows, len(dept)),
+            "new_status": rng.choice(["active", "inactive"], len(dept)),
+        }
+    )
+    return pd.concat(
+        [
+            _employee_updates(ids[:n_emp_update], rng),
+            _employee_deletes(ids[n_emp_update:]),
+            departments,
+        ],
+        ignore_index=True,
+    )
+
+
+def _composite(rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """按 (员工编号, 状态) 复合条件更新和删除，各占一半"""
+    ids = FIRST_EMP_ID + rng.permutation(rows)
+    n_update, _ = _split(rows, [0.5, 0.5])
+    updates = pd.DataFrame(
+        {
+            "table": "employees",
+            "command": "update",
+            "employee_id": ids[:n_update],
+            "status": employee_status(ids[:n_update]),
+            "new_salary": rng.integers(3000, 10000, n_update),
+        }
+    )
+    deletes = pd.DataFrame(
+        {
+            "table": "employees",
+            "command": "delete",
+            "employee_id": ids[n_update:],
+            "status": employee_status(ids[n_update:]),
+        }
+    )
+    return pd.concat([updates, deletes], ignore_index=True)
+
+
+def _append(rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """以 '+' 前缀追加文本：员工姓名 80%，部门名称 20%"""
+    n_emp, n_dept = _split(rows, [0.8, 0.2])
+    ids = FIRST_EMP_ID + rng.permutation(rows)[:n_emp]
+    dept = dept_ids(1 + rng.permutation(department_count(rows))[:n_dept])
+    employees = pd.DataFrame(
+        {
+            "table": "employees",
+            "command": "update",
+            "employee_id": ids,
+            "new_name": "+_v2",
+        }
+    )
+    departments = pd.DataFrame(
+        {"table": "departments", "command": "update", "id": dept, "new_name": "+_v2"}
+    )
+    return pd.concat([employees, departments], ignore_index=True)
+
+
+SCENARIOS: Dict[str, Callable[[int, np.random.Generator], pd.DataFrame]] = {
+    "update_heavy": _update_heavy,
+    "delete_heavy": _delete_heavy,
+    "multi_table": _multi_table,
+    "composite": _composite,
+    "append": _append,
+}
+
+
+def generate_changes(scenario: str, rows: int, path: str, seed: int = 0) -> int:
+    """生成指定场景的变更文件，返回写入的行数"""
+    if scenario not in SCENARIOS:
+        raise ValueError(f"Unknown scenario: {scenario}")
+    df = SCENARIOS[scenario](rows, np.random.default_rng(seed))
+    # 打乱行序，模拟真实变更文件中各类操作交错出现
+    df = df.sample(frac=1, random_state=seed).reset_index(drop=True)
+    df.to_csv(path, index=False)
+    return len(df)
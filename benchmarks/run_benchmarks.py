@@ -0,0 +1,341 @@
+"""基准测试
+
+生成不同规模和操作组合的变更文件，经 DataProcessor.process_file 端到端执行，
+输出每个场景的吞吐量、峰值内存和各阶段耗时（JSON）。
+
+    python -m benchmarks.run_benchmarks --rows 10k --rows 1M --output results.json
+"""
+
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+import click
+from rich.console import Console
+from rich.table import Table
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.generate_data import (  # noqa: E402
+    SCENARIOS,
+    TABLES_CONFIG,
+    generate_changes,
+    iter_base_rows,
+)
+from src.config import ConfigManager  # noqa: E402
+from src.database import DatabaseManager  # noqa: E402
+from src.models import DatabaseConfig  # noqa: E402
+from src.processor import DataProcessor  # noqa: E402
+from src.profiler import Profiler  # noqa: E402
+
+# 进度和汇总输出到 stderr，stdout 保留给 JSON 结果
+console = Console(stderr=True)
+
+SQLITE_SCHEMA = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "tests",
+    "create_test_tables_sqlite.sql",
+)
+
+BASE_COLUMNS = {
+    "employees": (
+        "emp_id",
+        "emp_name",
+        "department_id",
+        "salary",
+        "hire_date",
+        "status",
+    ),
+    "departments": ("dept_id", "dept_name", "manager_id", "create_date", "status"),
+}
+DATE_COLUMNS = {"hire_date", "create_date"}
+
+
+def parse_rows(value: str) -> int:
+    """解析行数，支持 k / M 后缀（如 10k、1M）"""
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    value = value.strip().lower()
+    try:
+        if value[-1] in multipliers:
+            return int(float(value[:-1]) * multipliers[value[-1]])
+        return int(value)
+    except (ValueError, IndexError):
+        raise click.BadParameter(f"Invalid row count: {value}")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """当前进程的峰值常驻内存（MB），平台不支持时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def git_commit() -> Optional[str]:
+    """当前代码的提交号"""
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed_database(db_manager: DatabaseManager, rows: int) -> None:
+    """清空并写入基础数据"""
+    dialect = db_manager.dialect
+    with db_manager.transaction():
+        for table in ("employees", "departments"):
+            db_manager.execute_sql(f"DELETE FROM {table}_bak")
+            db_manager.execute_sql(f"DELETE FROM {table}")
+
+        for table, chunk in iter_base_rows(rows):
+            columns = BASE_COLUMNS[table]
+            values = [
+                (
+                    dialect.date_value(dialect.placeholder(i))
+                    if column in DATE_COLUMNS
+                    else dialect.placeholder(i)
+                )
+                for i, column in enumerate(columns, start=1)
+            ]
+            db_manager.execute_many(
+                f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join(values)})",
+                chunk,
+            )
+
+
+def run_process(
+    db_config: DatabaseConfig,
+    processor_config: Dict[str, Any],
+    csv_path: str,
+    verbose: bool,
+) -> Dict[str, Any]:
+    """在独立进程中执行变更文件，返回耗时、峰值内存和处理器内部各阶段耗时"""
+    profiler = Profiler()
+    db_manager = DatabaseManager(db_config, profiler=profiler)
+    try:
+        processor = DataProcessor(
+            db_manager, {"processor": processor_config, "tables": TABLES_CONFIG}
+        )
+        rss_before = peak_rss_mb()
+        with open(os.devnull, "w") as devnull:
+            output = (
+                contextlib.nullcontext()
+                if verbose
+                else contextlib.redirect_stdout(devnull)
+            )
+            start = time.perf_counter()
+            with output, db_manager.transaction():
+                processor.process_file(csv_path)
+            elapsed = time.perf_counter() - start
+        # 各阶段耗时按阶段名汇总（跨表和命令）
+        processor_phases: Dict[str, float] = {}
+        for p in profiler.report()["phases"]:
+            processor_phases[p["phase"]] = (
+                processor_phases.get(p["phase"], 0.0) + p["total_ms"] / 1000
+            )
+        return {
+            "seconds": elapsed,
+            "peak_rss_mb": peak_rss_mb(),
+            "baseline_rss_mb": rss_before,
+            "processor_phases": processor_phases,
+        }
+    finally:
+        db_manager.close()
+
+
+def run_scenario(
+    scenario: str,
+    rows: int,
+    db_config: DatabaseConfig,
+    processor_config: Dict[str, Any],
+    work_dir: str,
+    seed: int,
+    verbose: bool,
+) -> Dict[str, Any]:
+    """生成数据、写入基础数据并执行一个场景"""
+    phases: Dict[str, float] = {}
+    csv_path = os.path.join(work_dir, f"{scenario}_{rows}.csv")
+
+    start = time.perf_counter()
+    n_changes = generate_changes(scenario, rows, csv_path, seed)
+    phases["generate"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    db_manager = DatabaseManager(db_config)
+    try:
+        seed_database(db_manager, rows)
+    finally:
+        db_manager.close()
+    phases["seed"] = time.perf_counter() - start
+
+    # 每个场景在新进程中执行，使峰值内存只反映本场景的处理过程
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        measured = pool.submit(
+            run_process, db_config, processor_config, csv_path, verbose
+        ).result()
+    phases["process"] = measured["seconds"]
+    os.remove(csv_path)
+
+    return {
+        "scenario": scenario,
+        "rows": n_changes,
+        "seconds": measured["seconds"],
+        "rows_per_sec": (
+            n_changes / measured["seconds"] if measured["seconds"] else None
+        ),
+        "peak_rss_mb": measured["peak_rss_mb"],
+        "baseline_rss_mb": measured["baseline_rss_mb"],
+        "phases": phases,
+        "processor_phases": measured["processor_phases"],
+    }
+
+
+def display_results(results: List[Dict[str, Any]]) -> None:
+    """显示结果汇总"""
+    table = Table(title="Benchmark Results")
+    table.add_column("Scenario", style="cyan")
+    table.add_column("Rows", justify="right")
+    table.add_column("Seconds", justify="right")
+    table.add_column("Rows/s", justify="right", style="green")
+    table.add_column("Peak RSS (MB)", justify="right")
+
+    for result in results:
+        peak = result["peak_rss_mb"]
+        table.add_row(
+            result["scenario"],
+            f"{result['rows']:,}",
+            f"{result['seconds']:.2f}",
+            f"{result['rows_per_sec']:,.0f}" if result["rows_per_sec"] else "-",
+            f"{peak:.1f}" if peak is not None else "-",
+        )
+    console.print(table)
+
+
+@click.command()
+@click.option(
+    "--rows",
+    "rows_list",
+    multiple=True,
+    default=["10k"],
+    help="Change file size, e.g. 10k, 1M (repeatable)",
+)
+@click.option(
+    "--scenario",
+    "scenarios",
+    type=click.Choice(sorted(SCENARIOS)),
+    multiple=True,
+    help="Scenario to run (repeatable, default: all)",
+)
+@click.option(
+    "--config-file",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False),
+    default=None,
+    help="Configuration file with the target database (default: temporary SQLite)",
+)
+@click.option("--env", default=None, help="Database environment in the config file")
+@click.option("--batch-size", type=click.IntRange(min=1), default=1000)
+@click.option("--backup/--no-backup", default=True, help="Back up rows before changes")
+@click.option("--stream/--no-stream", default=False, help="Stream CSV input")
+@click.option("--seed", type=int, default=0, help="Random seed for generated data")
+@click.option(
+    "--output",
+    type=click.Path(file_okay=True, dir_okay=False),
+    default=None,
+    help="Write JSON results to this file (default: stdout)",
+)
+@click.option("--verbose", is_flag=True, help="Show processor output")
+def main(
+    rows_list: List[str],
+    scenarios: List[str],
+    config_file: Optional[str],
+    env: Optional[str],
+    batch_size: int,
+    backup: bool,
+    stream: bool,
+    seed: int,
+    output: Optional[str],
+    verbose: bool,
+) -> None:
+    """运行基准测试"""
+    sizes = [parse_rows(value) for value in rows_list]
+    scenarios = list(scenarios) or list(SCENARIOS)
+    processor_config = {
+        "batch_size": batch_size,
+        "backup_enabled": backup,
+        "preview_enabled": False,
+        "require_confirmation": False,
+        "streaming_enabled": stream,
+    }
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if config_file:
+            if not env:
+                raise click.UsageError("--env is required with --config-file")
+            db_config = ConfigManager(config_file).get_database_config(env)
+        else:
+            db_config = DatabaseConfig(
+                backend="sqlite", database=os.path.join(work_dir, "benchmark.db")
+            )
+            with open(SQLITE_SCHEMA, encoding="utf-8") as f:
+                schema = f.read()
+            db_manager = DatabaseManager(db_config)
+            try:
+                db_manager.connection.executescript(schema)
+            finally:
+                db_manager.close()
+
+        results = []
+        for rows in sizes:
+            for scenario in scenarios:
+                console.print(f"[cyan]Running {scenario} with {rows:,} rows...[/cyan]")
+                results.append(
+                    run_scenario(
+                        scenario,
+                        rows,
+                        db_config,
+                        processor_config,
+                        work_dir,
+                        seed,
+                        verbose,
+                    )
+                )
+
+    display_results(results)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "backend": db_config.backend,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": processor_config,
+        "results": results,
+    }
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        console.print(f"[green]Results written to {output}[/green]")
+    else:
+        click.echo(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,48 @@
 import click
 from rich.console import Console
 from pathlib import Path
-from src.config import ConfigManager
+from src.config import ConfigManager, ProcessorConfig
 from src.database import DatabaseManager
-from src.processor import DataProcessor
+from src.processor import (
+    DataProcessor,
+    CONFIRMATION_MODES,
+    EXECUTION_MODES,
+    PARALLEL_PARTITIONS,
+)
+from src.models import DatabaseConfig, PoolConfig, TableConfig
+from src.planner import DryRunPlanner
+from src.preview import PREVIEW_MODES
+from src.profiler import Profiler
+from src.schema import SchemaCache
+from src.validation import DataValidator
 from src.yaml_processor import YAMLProcessor
 
 console = Console()
 
 
+def validate_input(
+    config_manager: ConfigManager,
+    db_config: DatabaseConfig,
+    processor_config: ProcessorConfig,
+    input_file: str,
+) -> None:
+    """连接数据库之前校验整个输入文件，存在错误时显示完整报告并中止
+
+    启用表结构缓存时使用磁盘上未过期的表结构。
+    """
+    tables_config = {
+        name: TableConfig.from_dict(cfg)
+        for name, cfg in config_manager.config.get("tables", {}).items()
+    }
+    schema_cache = SchemaCache.from_config(
+        {"processor": processor_config.__dict__}, db_config
+    )
+    if schema_cache is not None:
+        tables_config = schema_cache.apply(tables_config)
+    DataValidator(tables_config).check_file(input_file)
+    console.log("[green]Input file validated[/green]")
+
+
 @click.group()
 def cli():
     """数据处理程序"""
@@ -39,17 +73,116 @@ def cli():
     default=True,
     help="Preview changes before executing",
 )
+@click.option(
+    "--preview-rows",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Maximum rows shown per preview (default: from config)",
+)
+@click.option(
+    "--preview-mode",
+    type=click.Choice(PREVIEW_MODES),
+    default=None,
+    help="Rows shown when a preview is truncated (default: from config)",
+)
 @click.option(
     "--auto-confirm/--no-auto-confirm",
     default=False,
     help="Automatically confirm all operations",
 )
+@click.option(
+    "--confirm-mode",
+    type=click.Choice(CONFIRMATION_MODES),
+    default=None,
+    help="Confirm each batch, or plan all changes and confirm once (default: from config)",
+)
+@click.option(
+    "--execution-mode",
+    type=click.Choice(EXECUTION_MODES),
+    default=None,
+    help="Execute batched statements, or load a staging table and apply it with one set statement per shape (default: from config)",
+)
+@click.option(
+    "--coalesce/--no-coalesce",
+    default=None,
+    help="Collapse operations on the same primary key into their net effect before execution; with --stream, only operations within the same CSV chunk are merged and chunks are shrunk to hold their operations in memory (default: from config)",
+)
+@click.option(
+    "--stream/--no-stream",
+    default=None,
+    help="Stream CSV input in chunks with bounded memory (default: from config)",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help=(
+        "Number of parallel worker sessions (requires pool). Sessions are "
+        "branches of one distributed transaction committed with two-phase commit. "
+        "Not supported for YAML input"
+    ),
+)
+@click.option(
+    "--partition",
+    type=click.Choice(PARALLEL_PARTITIONS),
+    default=None,
+    help="Split parallel work by table, or by primary-key hash buckets within each table (default: from config)",
+)
+@click.option(
+    "--commit-every",
+    type=click.IntRange(min=0),
+    default=None,
+    help="Commit every N batches and write a checkpoint journal, 0 for one transaction (default: from config)",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Skip batches already committed according to the checkpoint journal",
+)
+@click.option(
+    "--isolate-failures/--no-isolate-failures",
+    default=None,
+    help="Run each batch in a savepoint and write failing rows to a reject file (default: from config)",
+)
+@click.option(
+    "--reject-file",
+    type=click.Path(file_okay=True, dir_okay=False),
+    default=None,
+    help="Path of the reject file (default: <input>.rejects.csv)",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    default=False,
+    help="Collect per-phase timings and counters and report them at the end",
+)
+@click.option(
+    "--profile-output",
+    type=click.Path(file_okay=True, dir_okay=False),
+    default="profile.json",
+    help="Path of the JSON profile report (with --profile)",
+)
 def process(
     env: str,
     input_file: str,
     config_file: str,
     preview: bool,
+    preview_rows: int,
+    preview_mode: str,
     auto_confirm: bool,
+    confirm_mode: str,
+    execution_mode: str,
+    coalesce: bool,
+    stream: bool,
+    workers: int,
+    partition: str,
+    commit_every: int,
+    resume: bool,
+    isolate_failures: bool,
+    reject_file: str,
+    profile: bool,
+    profile_output: str,
 ) -> None:
     """处理数据文件"""
     try:
@@ -57,13 +190,43 @@ def process(
         config_manager = ConfigManager(config_file)
         db_config = config_manager.get_database_config(env)
         processor_config = config_manager.get_processor_config()
+        validate_input(config_manager, db_config, processor_config, input_file)
 
         # 更新处理器配置
         processor_config.preview_enabled = preview
+        if preview_rows is not None:
+            processor_config.preview_max_rows = preview_rows
+        if preview_mode is not None:
+            processor_config.preview_mode = preview_mode
         processor_config.require_confirmation = not auto_confirm
+        if confirm_mode is not None:
+            processor_config.confirmation_mode = confirm_mode
+        if execution_mode is not None:
+            processor_config.execution_mode = execution_mode
+        if coalesce is not None:
+            processor_config.coalesce_enabled = coalesce
+        if stream is not None:
+            processor_config.streaming_enabled = stream
+        if workers is not None:
+            processor_config.workers = workers
+        if partition is not None:
+            processor_config.parallel_partition = partition
+        if commit_every is not None:
+            processor_config.commit_every = commit_every
+        if isolate_failures is not None:
+            processor_config.isolate_failures = isolate_failures
+        if reject_file is not None:
+            processor_config.reject_file = reject_file
+
+        # 并行模式需要连接池，未配置时按工作线程数创建
+        if processor_config.workers > 1 and db_config.pool is None:
+            db_config.pool = PoolConfig(
+                min=1, max=processor_config.workers + 1, increment=1
+            )
 
         # 初始化数据库连接
-        db_manager = DatabaseManager(db_config)
+        profiler = Profiler(enabled=profile)
+        db_manager = DatabaseManager(db_config, profiler=profiler)
         console.log(f"[blue]Connected to {env} database[/blue]")
 
         try:
@@ -78,9 +241,68 @@ def process(
 
             # 处理输入文件
             with db_manager.transaction():
-                processor.process_file(input_file)
+                processor.process_file(input_file, resume=resume)
             console.log("[green]All operations completed successfully[/green]")
 
+        finally:
+            db_manager.close()
+            console.log("[bold]Database connection closed[/bold]")
+            if profile:
+                profiler.display()
+                profiler.write_json(profile_output)
+                console.log(f"[blue]Profile report written to {profile_output}[/blue]")
+
+    except Exception as e:
+        console.print(f"[red bold]Error: {str(e)}[/red bold]")
+        raise click.Abort()
+
+
+@cli.command()
+@click.option(
+    "--env",
+    type=click.Choice(["prod", "dev", "test"]),
+    required=True,
+    help="Environment to use",
+)
+@click.option(
+    "--input-file",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False),
+    required=True,
+    help="Path to input file (CSV or YAML)",
+)
+@click.option(
+    "--config-file",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False),
+    default="config.json",
+    help="Path to configuration file",
+)
+def plan(env: str, input_file: str, config_file: str) -> None:
+    """试运行：估算输入文件的执行代价，不执行任何DML"""
+    try:
+        config_manager = ConfigManager(config_file)
+        db_config = config_manager.get_database_config(env)
+        processor_config = config_manager.get_processor_config()
+        validate_input(config_manager, db_config, processor_config, input_file)
+
+        db_manager = DatabaseManager(db_config)
+        console.log(f"[blue]Connected to {env} database[/blue]")
+
+        try:
+            processor = DataProcessor(
+                db_manager,
+                {
+                    "processor": processor_config.__dict__,
+                    "tables": config_manager.config.get("tables", {}),
+                },
+            )
+            planner = DryRunPlanner(
+                db_manager,
+                processor.batch_size,
+                backup_enabled=processor.backup_enabled,
+                execution_mode=processor.execution_mode,
+            )
+            planner.display(planner.plan(processor.iter_operations(input_file)))
+
         finally:
             db_manager.close()
             console.log("[bold]Database connection closed[/bold]")
@@ -0,0 +1,17 @@
+from .base import DatabaseBackend
+
+
+def get_backend(name: str) -> DatabaseBackend:
+    """按名称获取数据库后端（驱动按需导入）"""
+    if name == "oracle":
+        from .oracle import OracleBackend
+
+        return OracleBackend()
+    if name == "sqlite":
+        from .sqlite import SQLiteBackend
+
+        return SQLiteBackend()
+    raise ValueError(f"Unsupported database backend: {name}")
+
+
+__all__ = ["DatabaseBackend", "get_backend"]
@@ -0,0 +1,100 @@
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional, Sequence, Tuple, Type
+from ..dialect import SQLDialect, ORACLE_DIALECT
+from ..models import DatabaseConfig, PlanStep, TableSchema
+
+
+class DatabaseBackend(ABC):
+    """数据库后端接口
+
+    封装驱动相关的连接、连接池、批量执行和 RETURNING 取回；
+    SQL 语法差异（绑定变量、日期、拼接、备份语句等）由 dialect 提供。
+    """
+
+    name = ""
+    dialect: SQLDialect = ORACLE_DIALECT
+    # 是否支持多个会话并行写入
+    supports_parallel = True
+
+    @property
+    @abstractmethod
+    def error(self) -> Type[Exception]:
+        """驱动的异常基类"""
+
+    @abstractmethod
+    def connect(self, config: DatabaseConfig) -> Any:
+        """建立一个非自动提交的连接"""
+
+    def create_pool(self, config: DatabaseConfig) -> Any:
+        """创建连接池"""
+        raise ValueError(f"Connection pools are not supported by {self.name} backend")
+
+    def acquire(self, pool: Any) -> Any:
+        """从连接池获取一个非自动提交的连接"""
+        raise ValueError(f"Connection pools are not supported by {self.name} backend")
+
+    def prepare_fetch(self, cursor: Any, config: DatabaseConfig) -> None:
+        """设置查询游标的批量取回参数"""
+        cursor.arraysize = config.arraysize
+
+    def column_dtypes(self, description: Sequence[tuple]) -> List[Optional[str]]:
+        """根据结果集描述确定各列的 NumPy 类型，None 表示由 pandas 推断"""
+        return [None] * len(description)
+
+    @abstractmethod
+    def explain(self, cursor: Any, sql: str, params: Sequence[Any]) -> List[PlanStep]:
+        """获取语句的执行计划（不执行语句本身）"""
+
+    @abstractmethod
+    def read_schema(self, cursor: Any, table_name: str) -> Optional[TableSchema]:
+        """从数据字典读取表的列类型和主键，表不存在时返回 None"""
+
+    def release(self, pool: Any, connection: Any) -> None:
+        """归还连接到连接池"""
+
+    def close_pool(self, pool: Any) -> None:
+        """关闭连接池"""
+
+    def tpc_begin(self, connection: Any, xid: Tuple[int, str, str]) -> None:
+        """在连接上开始分布式事务的一个分支（两阶段提交）
+
+        xid 为 (格式标识, 全局事务标识, 分支标识)，须在分支执行任何 DML 之前调用。
+        """
+        raise ValueError(f"Two-phase commit is not supported by {self.name} backend")
+
+    def tpc_prepare(self, connection: Any) -> bool:
+        """准备提交分支，返回 False 表示分支没有修改、无需提交"""
+        raise ValueError(f"Two-phase commit is not supported by {self.name} backend")
+
+    def tpc_commit(self, connection: Any) -> None:
+        """提交已准备的分支"""
+        raise ValueError(f"Two-phase commit is not supported by {self.name} backend")
+
+    @abstractmethod
+    def execute_many(
+        self, cursor: Any, sql: str, params: Sequence[Sequence[Any]]
+    ) -> List[int]:
+        """批量执行参数化SQL，返回每组绑定值影响的行数"""
+
+    @abstractmethod
+    def execute_many_returning(
+        self,
+        cursor: Any,
+        sql: str,
+        params: Sequence[Sequence[Any]],
+        returning_types: Sequence[type],
+    ) -> Tuple[List[int], List[List[tuple]]]:
+        """批量执行带 RETURNING 的参数化SQL
+
+        返回 (每组绑定值影响的行数, 每组绑定值返回的行列表)。
+        """
+
+    @abstractmethod
+    def execute_returning(
+        self,
+        cursor: Any,
+        sql: str,
+        params: Sequence[Any],
+        returning_types: Sequence[type],
+    ) -> List[tuple]:
+        """执行带 RETURNING 的单条参数化SQL，返回受影响行的列值"""
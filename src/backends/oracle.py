@@ -0,0 +1,221 @@
+import uuid
+import cx_Oracle
+from typing import Any, List, Optional, Sequence, Tuple, Type
+from ..dialect import ORACLE_DIALECT
+from ..models import DatabaseConfig, PlanStep, TableSchema
+from .base import DatabaseBackend
+
+
+class OracleBackend(DatabaseBackend):
+    """Oracle 后端（cx_Oracle）"""
+
+    name = "oracle"
+    dialect = ORACLE_DIALECT
+
+    @property
+    def error(self) -> Type[Exception]:
+        return cx_Oracle.Error
+
+    @staticmethod
+    def _dsn(config: DatabaseConfig) -> str:
+        """生成连接描述符"""
+        return cx_Oracle.makedsn(
+            config.host, config.port, service_name=config.service_name
+        )
+
+    def connect(self, config: DatabaseConfig) -> Any:
+        connection = cx_Oracle.connect(
+            config.username, config.password, self._dsn(config)
+        )
+        connection.autocommit = False
+        return connection
+
+    def create_pool(self, config: DatabaseConfig) -> Any:
+        pool = cx_Oracle.SessionPool(
+            config.username,
+            config.password,
+            self._dsn(config),
+            min=config.pool.min,
+            max=config.pool.max,
+            increment=config.pool.increment,
+            threaded=True,
+            getmode=cx_Oracle.SPOOL_ATTRVAL_WAIT,
+        )
+        pool.stmtcachesize = config.pool.stmt_cache_size
+        return pool
+
+    def acquire(self, pool: Any) -> Any:
+        connection = pool.acquire()
+        connection.autocommit = False
+        return connection
+
+    @staticmethod
+    def _output_type_handler(
+        cursor: Any,
+        name: str,
+        default_type: Any,
+        size: int,
+        precision: int,
+        scale: int,
+    ) -> Any:
+        """LOB 直接取为字符串，避免逐行的 LOB 往返；小数取为原生浮点数"""
+        if default_type == cx_Oracle.DB_TYPE_CLOB:
+            return cursor.var(cx_Oracle.DB_TYPE_LONG, arraysize=cursor.arraysize)
+        if default_type == cx_Oracle.DB_TYPE_NCLOB:
+            return cursor.var(
+                cx_Oracle.DB_TYPE_LONG_NVARCHAR, arraysize=cursor.arraysize
+            )
+        if default_type == cx_Oracle.DB_TYPE_BLOB:
+            return cursor.var(cx_Oracle.DB_TYPE_LONG_RAW, arraysize=cursor.arraysize)
+        if default_type == cx_Oracle.DB_TYPE_NUMBER and scale > 0:
+            return cursor.var(
+                cx_Oracle.DB_TYPE_BINARY_DOUBLE, arraysize=cursor.arraysize
+            )
+        return None
+
+    def prepare_fetch(self, cursor: Any, config: DatabaseConfig) -> None:
+        cursor.arraysize = config.arraysize
+        cursor.prefetchrows = config.prefetchrows
+        cursor.outputtypehandler = self._output_type_handler
+
+    def column_dtypes(self, description: Sequence[tuple]) -> List[Optional[str]]:
+        dtypes: List[Optional[str]] = []
+        for _, type_code, _, _, precision, scale, _ in description:
+            if type_code == cx_Oracle.DB_TYPE_NUMBER:
+                if precision and scale == 0:
+                    dtypes.append("int64")
+                elif scale and scale > 0:
+                    dtypes.append("float64")
+                else:
+                    # 未指定精度的 NUMBER 可能是整数也可能是小数
+                    dtypes.append(None)
+            elif type_code in (
+                cx_Oracle.DB_TYPE_BINARY_DOUBLE,
+                cx_Oracle.DB_TYPE_BINARY_FLOAT,
+            ):
+                dtypes.append("float64")
+            elif type_code in (cx_Oracle.DB_TYPE_DATE, cx_Oracle.DB_TYPE_TIMESTAMP):
+                dtypes.append("datetime64[ns]")
+            else:
+                dtypes.append(None)
+        return dtypes
+
+    def explain(self, cursor: Any, sql: str, params: Sequence[Any]) -> List[PlanStep]:
+        # EXPLAIN PLAN 只解析语句，绑定变量不需要赋值；计划写入会话的 PLAN_TABLE
+        statement_id = f"csvp_{uuid.uuid4().hex[:20]}"
+        cursor.execute(f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {sql}")
+        cursor.execute(
+            "SELECT depth, operation, options, object_name, cost, cardinality "
+            "FROM plan_table WHERE statement_id = :1 ORDER BY id",
+            [statement_id],
+        )
+        rows = cursor.fetchall()
+        cursor.execute("DELETE FROM plan_table WHERE statement_id = :1", [statement_id])
+        return [
+            PlanStep(
+                depth=depth,
+                operation=f"{operation} {options}" if options else operation,
+                object_name=object_name,
+                cost=cost,
+                cardinality=cardinality,
+                full_scan=(operation, options)
+                in (
+                    ("TABLE ACCESS", "FULL"),
+                    ("TABLE ACCESS", "STORAGE FULL"),
+                    ("INDEX", "FULL SCAN"),
+                    ("INDEX", "FAST FULL SCAN"),
+                ),
+            )
+            for depth, operation, options, object_name, cost, cardinality in rows
+        ]
+
+    @staticmethod
+    def _column_kind(data_type: str) -> str:
+        """数据字典类型归类"""
+        if data_type in ("NUMBER", "FLOAT", "INTEGER", "BINARY_FLOAT", "BINARY_DOUBLE"):
+            return "number"
+        if data_type == "DATE" or data_type.startswith("TIMESTAMP"):
+            return "date"
+        if data_type in ("VARCHAR2", "NVARCHAR2", "CHAR", "NCHAR", "CLOB", "NCLOB"):
+            return "text"
+        return "other"
+
+    def read_schema(self, cursor: Any, table_name: str) -> Optional[TableSchema]:
+        cursor.execute(
+            "SELECT column_name, data_type FROM all_tab_columns "
+            "WHERE owner = SYS_CONTEXT('USERENV', 'CURRENT_SCHEMA') "
+            "AND table_name = :1 ORDER BY column_id",
+            [table_name.upper()],
+        )
+        columns = {
+            name.lower(): self._column_kind(data_type)
+            for name, data_type in cursor.fetchall()
+        }
+        if not columns:
+            return None
+
+        cursor.execute(
+            "SELECT cc.column_name FROM all_constraints c "
+            "JOIN all_cons_columns cc "
+            "ON cc.owner = c.owner AND cc.constraint_name = c.constraint_name "
+            "WHERE c.owner = SYS_CONTEXT('USERENV', 'CURRENT_SCHEMA') "
+            "AND c.table_name = :1 AND c.constraint_type = 'P' "
+            "ORDER BY cc.position",
+            [table_name.upper()],
+        )
+        return TableSchema(
+            table_name=table_name,
+            columns=columns,
+            primary_key=[row[0].lower() for row in cursor.fetchall()],
+        )
+
+    def release(self, pool: Any, connection: Any) -> None:
+        pool.release(connection)
+
+    def close_pool(self, pool: Any) -> None:
+        pool.close()
+
+    def tpc_begin(self, connection: Any, xid: Tuple[int, str, str]) -> None:
+        connection.begin(*xid)
+
+    def tpc_prepare(self, connection: Any) -> bool:
+        return connection.prepare()
+
+    def tpc_commit(self, connection: Any) -> None:
+        connection.commit()
+
+    def execute_many(
+        self, cursor: Any, sql: str, params: Sequence[Sequence[Any]]
+    ) -> List[int]:
+        cursor.executemany(sql, list(params), arraydmlrowcounts=True)
+        return cursor.getarraydmlrowcounts()
+
+    def execute_many_returning(
+        self,
+        cursor: Any,
+        sql: str,
+        params: Sequence[Sequence[Any]],
+        returning_types: Sequence[type],
+    ) -> Tuple[List[int], List[List[tuple]]]:
+        params = list(params)
+        out_vars = [
+            cursor.var(var_type, arraysize=len(params)) for var_type in returning_types
+        ]
+        cursor.setinputsizes(*([None] * len(params[0])), *out_vars)
+        cursor.executemany(sql, params, arraydmlrowcounts=True)
+        returned = [
+            list(zip(*(var.getvalue(i) for var in out_vars)))
+            for i in range(len(params))
+        ]
+        return cursor.getarraydmlrowcounts(), returned
+
+    def execute_returning(
+        self,
+        cursor: Any,
+        sql: str,
+        params: Sequence[Any],
+        returning_types: Sequence[type],
+    ) -> List[tuple]:
+        out_vars = [cursor.var(var_type) for var_type in returning_types]
+        cursor.execute(sql, list(params) + out_vars)
+        return list(zip(*(var.getvalue() for var in out_vars)))
@@ -0,0 +1,175 @@
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+from ..dialect import SQLiteDialect
+from ..models import DatabaseConfig, PlanStep, TableSchema
+from .base import DatabaseBackend
+
+
+class SQLitePool:
+    """SQLite 连接池
+
+    按需创建连接，最多同时借出 max 个，借满时等待归还（与 Oracle 连接池的
+    SPOOL_ATTRVAL_WAIT 相同）。归还时回滚未提交的事务后留待复用。
+    """
+
+    def __init__(self, config: DatabaseConfig):
+        self.config = config
+        self.max = config.pool.max
+        self.idle: List[sqlite3.Connection] = [
+            self._connect() for _ in range(min(config.pool.min, self.max))
+        ]
+        self.busy = 0
+        self._available = threading.Condition()
+
+    def _connect(self) -> sqlite3.Connection:
+        # 池中的连接会在工作线程中使用
+        return sqlite3.connect(
+            self.config.database or ":memory:", check_same_thread=False
+        )
+
+    def acquire(self) -> sqlite3.Connection:
+        """借出一个连接，借满时等待"""
+        with self._available:
+            while self.busy >= self.max:
+                self._available.wait()
+            self.busy += 1
+            connection = self.idle.pop() if self.idle else None
+        if connection is None:
+            try:
+                connection = self._connect()
+            except sqlite3.Error:
+                with self._available:
+                    self.busy -= 1
+                    self._available.notify()
+                raise
+        return connection
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        """归还连接，回滚未提交的事务"""
+        try:
+            connection.rollback()
+        finally:
+            with self._available:
+                self.busy -= 1
+                self.idle.append(connection)
+                self._available.notify()
+
+    def close(self) -> None:
+        """关闭空闲连接"""
+        with self._available:
+            for connection in self.idle:
+                connection.close()
+            self.idle = []
+
+
+class SQLiteBackend(DatabaseBackend):
+    """SQLite 后端
+
+    参考实现，用于在没有 Oracle 实例的环境中测试和基准测试处理器本身的开销。
+    SQLite 同一时刻只允许一个写事务，因此不支持并行会话。
+    """
+
+    name = "sqlite"
+    dialect = SQLiteDialect()
+    supports_parallel = False
+
+    @property
+    def error(self) -> Type[Exception]:
+        return sqlite3.Error
+
+    def connect(self, config: DatabaseConfig) -> Any:
+        # 默认隔离级别下 DML 自动开启事务，需显式提交
+        return sqlite3.connect(config.database or ":memory:")
+
+    def create_pool(self, config: DatabaseConfig) -> Any:
+        return SQLitePool(config)
+
+    def acquire(self, pool: Any) -> Any:
+        return pool.acquire()
+
+    def release(self, pool: Any, connection: Any) -> None:
+        pool.release(connection)
+
+    def close_pool(self, pool: Any) -> None:
+        pool.close()
+
+    def explain(self, cursor: Any, sql: str, params: Sequence[Any]) -> List[PlanStep]:
+        # EXPLAIN QUERY PLAN 没有代价估算；"SCAN <表>" 表示全表（全索引）扫描
+        rows = cursor.execute(f"EXPLAIN QUERY PLAN {sql}", list(params)).fetchall()
+        depths: Dict[int, int] = {}
+        steps = []
+        for node_id, parent, _, detail in rows:
+            depths[node_id] = depths.get(parent, -1) + 1
+            words = detail.split()
+            full_scan = words[0] == "SCAN" and words[1:2] != ["CONSTANT"]
+            steps.append(
+                PlanStep(
+                    depth=depths[node_id],
+                    operation=detail,
+                    object_name=words[1] if full_scan else None,
+                    full_scan=full_scan,
+                )
+            )
+        return steps
+
+    @staticmethod
+    def _column_kind(declared_type: str) -> str:
+        """按声明类型归类（SQLite 类型亲和性规则，日期只能从声明类型识别）"""
+        declared_type = declared_type.upper()
+        if "DATE" in declared_type or "TIME" in declared_type:
+            return "date"
+        if "INT" in declared_type:
+            return "number"
+        if any(t in declared_type for t in ("CHAR", "CLOB", "TEXT")):
+            return "text"
+        if any(t in declared_type for t in ("REAL", "FLOA", "DOUB", "NUMERIC", "DEC")):
+            return "number"
+        return "other"
+
+    def read_schema(self, cursor: Any, table_name: str) -> Optional[TableSchema]:
+        rows = cursor.execute(f'PRAGMA table_info("{table_name}")').fetchall()
+        if not rows:
+            return None
+        return TableSchema(
+            table_name=table_name,
+            columns={
+                name.lower(): self._column_kind(decl) for _, name, decl, *_ in rows
+            },
+            primary_key=[
+                row[1].lower() for row in sorted(rows, key=lambda r: r[5]) if row[5]
+            ],
+        )
+
+    def execute_many(
+        self, cursor: Any, sql: str, params: Sequence[Sequence[Any]]
+    ) -> List[int]:
+        # executemany 只返回总行数，逐组执行以获取每组的影响行数（进程内调用，无网络往返）
+        row_counts = []
+        for row in params:
+            cursor.execute(sql, list(row))
+            row_counts.append(cursor.rowcount)
+        return row_counts
+
+    def execute_many_returning(
+        self,
+        cursor: Any,
+        sql: str,
+        params: Sequence[Sequence[Any]],
+        returning_types: Sequence[type],
+    ) -> Tuple[List[int], List[List[tuple]]]:
+        row_counts, returned = [], []
+        for row in params:
+            rows = [tuple(r) for r in cursor.execute(sql, list(row)).fetchall()]
+            row_counts.append(len(rows))
+            returned.append(rows)
+        return row_counts, returned
+
+    def execute_returning(
+        self,
+        cursor: Any,
+        sql: str,
+        params: Sequence[Any],
+        returning_types: Sequence[type],
+    ) -> List[tuple]:
+        return [tuple(r) for r in cursor.execute(sql, list(params)).fetchall()]
@@ -0,0 +1,591 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+import click
+import pandas as pd
+from rich.console import Console
+from rich.panel import Panel
+from .models import (
+    SQLOperation,
+    OperationShape,
+    CommandType,
+    ShapePlan,
+    to_bind_value,
+)
+from .database import DatabaseManager
+from .preview import PreviewRenderer
+
+console = Console()
+
+# 未匹配条件面板中最多显示的行数
+MAX_UNMATCHED_DISPLAY = 20
+
+
+def is_keyed(operation: SQLOperation) -> bool:
+    """操作的条件是否包含主键（最多影响主键值对应的一行）"""
+    return operation.table_config.primary_key in operation.conditions
+
+
+def operation_key(operation: SQLOperation) -> Hashable:
+    """操作影响的行的标识，用于保持同一行上操作的文件顺序
+
+    条件包含主键时为 (表, 主键值)，否则为 (表, 全部条件)。
+    """
+    primary_key = operation.table_config.primary_key
+    if is_keyed(operation):
+        value = to_bind_value(operation.conditions[primary_key])
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return operation.table_name, value
+    return operation.table_name, tuple(
+        (column, to_bind_value(operation.conditions[column]))
+        for column in sorted(operation.conditions)
+    )
+
+
+def may_overlap(first: SQLOperation, second: SQLOperation) -> bool:
+    """两个操作是否可能作用于同一行且无法通过主键值区分
+
+    同一张表上任一操作的条件不含主键时，其影响的行无法预先确定；
+    两个操作都按主键时由 operation_key 区分。
+    """
+    return first.table_name == second.table_name and not (
+        is_keyed(first) and is_keyed(second)
+    )
+
+
+def crosses_later_group(
+    pending: Dict[OperationShape, List[SQLOperation]],
+    shape: OperationShape,
+    operation: SQLOperation,
+) -> bool:
+    """将操作追加到 shape 的待执行组时，是否会越过之后创建的可能重叠的组
+
+    待执行组按创建顺序执行，追加到较早的组相当于把操作提前到之后的组之前。
+    """
+    later = False
+    for other, operations in pending.items():
+        if later and may_overlap(operation, operations[0]):
+            return True
+        later = later or other == shape
+    return False
+
+
+class BatchExecutor:
+    """按形状分组的批量执行器
+
+    相同形状的操作编译为一条参数化SQL，并按 batch_size 分块通过
+    executemany 发送，每块只需一次解析和一次往返。
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        batch_size: int = 1000,
+        preview_enabled: bool = True,
+        require_confirmation: bool = True,
+        backup_enabled: bool = True,
+        change_detector: Optional[
+            Callable[[pd.DataFrame, pd.DataFrame, str], pd.DataFrame]
+        ] = None,
+        preview_renderer: Optional[PreviewRenderer] = None,
+    ):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.preview_enabled = preview_enabled
+        self.require_confirmation = require_confirmation
+        self.backup_enabled = backup_enabled
+        self.change_detector = change_detector
+        self.preview_renderer = preview_renderer or PreviewRenderer()
+        self.profiler = db_manager.profiler
+
+    @staticmethod
+    def group_by_shape(
+        operations: Iterable[SQLOperation],
+    ) -> List[Tuple[OperationShape, List[SQLOperation]]]:
+        """按形状分组，保持同一行上操作的文件顺序
+
+        某个操作的键（见 operation_key）已在另一个形状的待执行组中，或追加到
+        所属形状的组会越过之后创建的、可能作用于同一行的组（同一张表上条件
+        不含主键的操作）时，先依次输出当前所有组再继续分组，因此同一形状
+        可能输出多个组。
+        """
+        groups: List[Tuple[OperationShape, List[SQLOperation]]] = []
+        pending: Dict[OperationShape, List[SQLOperation]] = {}
+        owners: Dict[Hashable, OperationShape] = {}
+        for operation in operations:
+            shape = operation.get_shape()
+            key = operation_key(operation)
+            if owners.get(key, shape) != shape or crosses_later_group(
+                pending, shape, operation
+            ):
+                groups.extend(pending.items())
+                pending = {}
+                owners = {}
+            pending.setdefault(shape, []).append(operation)
+            owners[key] = shape
+        groups.extend(pending.items())
+        return groups
+
+    def execute(self, operations: Iterable[SQLOperation]) -> int:
+        """按形状分组执行所有操作，返回总影响行数"""
+        return sum(
+            self.execute_shape(shape, shape_ops)
+            for shape, shape_ops in self.group_by_shape(operations)
+        )
+
+    def execute_shape(
+        self, shape: OperationShape, operations: List[SQLOperation]
+    ) -> int:
+        """执行同一形状的一组操作，返回影响行数"""
+        with self.profiler.scope(shape.table_name, shape.command_type.value):
+            self.profiler.count("operations", len(operations))
+            if shape.command_type == CommandType.DELETE:
+                affected = self.execute_deletes(shape, operations)
+            else:
+                affected = self.execute_updates(shape, operations)
+            self.profiler.count("rows_affected", affected)
+            return affected
+
+    def plan_shape(
+        self, shape: OperationShape, operations: List[SQLOperation]
+    ) -> ShapePlan:
+        """规划阶段：统计同一形状的操作匹配的行数，不读取整行数据"""
+        keys = list(dict.fromkeys(op.get_condition_binds() for op in operations))
+        chunk_size = shape.get_key_chunk_size(self.db_manager.dialect)
+        matched = 0
+        with self.profiler.scope(shape.table_name, shape.command_type.value):
+            with self.profiler.phase("plan"):
+                for i in range(0, len(keys), chunk_size):
+                    n_keys, params = self._pad_keys(shape, keys[i : i + chunk_size])
+                    df_count = self.db_manager.fetch_data(
+                        self.db_manager.compiler.count(shape, n_keys), params
+                    )
+                    matched += int(df_count.iloc[0, 0])
+        return ShapePlan(
+            shape=shape,
+            operations=len(operations),
+            keys=len(keys),
+            matched_rows=matched,
+        )
+
+    def plan(self, operations: Iterable[SQLOperation]) -> List[ShapePlan]:
+        """规划阶段：按形状汇总所有操作的影响"""
+        plans: Dict[OperationShape, ShapePlan] = {}
+        for shape, shape_ops in self.group_by_shape(operations):
+            plan = self.plan_shape(shape, shape_ops)
+            if shape in plans:
+                plans[shape].merge(plan)
+            else:
+                plans[shape] = plan
+        return list(plans.values())
+
+    def confirm_plan(self, plans: List[ShapePlan]) -> bool:
+        """显示执行计划的影响汇总并请求一次确认"""
+        with self.profiler.phase("render"):
+            self.preview_renderer.render_plan(plans)
+
+        operations = sum(plan.operations for plan in plans)
+        matched = sum(plan.matched_rows for plan in plans)
+        tables = len({plan.shape.table_name for plan in plans})
+        with self.profiler.phase("confirm"):
+            confirmed = click.confirm(
+                f"Do you want to proceed with {operations} operations "
+                f"matching {matched} rows on {tables} tables?"
+            )
+        if not confirmed:
+            console.print("[yellow]Operation cancelled by user[/yellow]")
+        return confirmed
+
+    def _confirm_chunk(self, sql: str, command: str, count: int) -> bool:
+        """显示参数化SQL并请求确认（每块一次）"""
+        if self.preview_enabled:
+            with self.profiler.phase("render"):
+                console.print(
+                    Panel(
+                        sql,
+                        title=f"[bold yellow]SQL to execute x {count}[/bold yellow]",
+                    )
+                )
+
+        if self.require_confirmation:
+            with self.profiler.phase("confirm"):
+                confirmed = click.confirm(
+                    f"Do you want to proceed with {count} {command} operations?"
+                )
+            if not confirmed:
+                console.print("[yellow]Batch cancelled by user[/yellow]")
+                return False
+        return True
+
+    def execute_updates(
+        self, shape: OperationShape, operations: List[SQLOperation]
+    ) -> int:
+        """批量执行同一形状的UPDATE操作，返回总影响行数
+
+        每块的往返次数固定：一次集合查询获取变更前数据，一次备份，
+        一次带 RETURNING 的 executemany 同时获取变更后数据。
+        """
+        total_rows = 0
+
+        for i in range(0, len(operations), self.batch_size):
+            chunk = operations[i : i + self.batch_size]
+            self.profiler.count("batches")
+            console.print(
+                f"\n[cyan]Processing {shape.table_name} update batch "
+                f"{i // self.batch_size + 1} ({len(chunk)} rows)...[/cyan]"
+            )
+
+            df_before = self._fetch_before(
+                shape, [op.get_condition_binds() for op in chunk]
+            )
+            if df_before.empty:
+                self._display_unmatched(shape, chunk)
+                continue
+
+            pk_column = self._resolve_primary_key(chunk[0], df_before)
+            returning = [pk_column] + [
+                self._resolve_column(column, df_before)
+                for column in shape.update_columns
+            ]
+            sql = self.db_manager.compiler.update(shape, returning)
+
+            self._display_before(df_before)
+            if not self._confirm_chunk(sql, "update", len(chunk)):
+                continue
+
+            # 先备份再执行
+            self._backup(shape, chunk[0], pk_column, df_before)
+            row_counts, returned = self.db_manager.execute_many_returning(
+                sql,
+                [op.get_bind_values() for op in chunk],
+                [
+                    self._returning_type(df_before[column], column == pk_column)
+                    for column in returning
+                ],
+            )
+
+            with self.profiler.phase("verify"):
+                unmatched = []
+                for operation, count in zip(chunk, row_counts):
+                    operation.affected_rows = count
+                    if count == 0:
+                        unmatched.append(operation)
+                total_rows += sum(row_counts)
+
+            console.print(
+                f"[green]Successfully updated {sum(row_counts)} rows "
+                f"({len(chunk)} operations)[/green]"
+            )
+            if unmatched:
+                self._display_unmatched(shape, unmatched)
+            self._display_after(
+                df_before,
+                returning,
+                [row for rows in returned for row in rows],
+            )
+
+        return total_rows
+
+    def execute_deletes(
+        self, shape: OperationShape, operations: List[SQLOperation]
+    ) -> int:
+        """批量执行同一形状的DELETE操作，返回总删除行数
+
+        条件键去重后按IN列表上限分块，每块一条语句；多列条件使用元组IN。
+        被删除行的主键通过 RETURNING 取回，用于与变更前数据核对。
+        """
+        keys = list(dict.fromkeys(op.get_condition_binds() for op in operations))
+        chunk_size = shape.get_key_chunk_size(self.db_manager.dialect)
+        total_rows = 0
+
+        for i in range(0, len(keys), chunk_size):
+            chunk = keys[i : i + chunk_size]
+            self.profiler.count("batches")
+            console.print(
+                f"\n[cyan]Processing {shape.table_name} delete batch "
+                f"{i // chunk_size + 1} ({len(chunk)} keys)...[/cyan]"
+            )
+
+            df_before = self._fetch_before(shape, chunk)
+            if df_before.empty:
+                self.profiler.count("unmatched", len(chunk))
+                console.print(
+                    f"[yellow]No matching data found for {len(chunk)} delete keys[/yellow]"
+                )
+                continue
+
+            pk_column = self._resolve_primary_key(operations[0], df_before)
+            n_keys, params = self._pad_keys(shape, chunk)
+            sql = self.db_manager.compiler.delete(shape, n_keys, returning=[pk_column])
+
+            self._display_before(df_before)
+            if not self._confirm_chunk(sql, "delete", len(chunk)):
+                continue
+
+            self._backup(shape, operations[0], pk_column, df_before)
+            deleted = self.db_manager.execute_returning(
+                sql,
+                params,
+                [self._returning_type(df_before[pk_column], True)],
+            )
+            total_rows += len(deleted)
+
+            # 核对变更前数据是否全部被删除
+            with self.profiler.phase("verify"):
+                deleted_keys = {row[0] for row in deleted}
+                remaining = df_before[~df_before[pk_column].isin(deleted_keys)]
+            if not remaining.empty:
+                console.print(
+                    Panel(
+                        self.preview_renderer.select(remaining).to_string(),
+                        title=(
+                            f"[bold red]Warning: {len(remaining)} rows were not "
+                            f"deleted![/bold red]"
+                        ),
+                    )
+                )
+                raise RuntimeError("Delete operation failed: Some rows still exist")
+
+            console.print(
+                f"[green]Successfully deleted {len(deleted)} rows "
+                f"({len(chunk)} keys)[/green]"
+            )
+
+        return total_rows
+
+    def _backup(
+        self,
+        shape: OperationShape,
+        operation: SQLOperation,
+        pk_column: str,
+        df_before: pd.DataFrame,
+    ) -> None:
+        """按变更前数据的主键集合批量备份
+
+        每个IN列表块一条 INSERT ... SELECT，表或全局关闭备份时跳过。
+        """
+        if not (self.backup_enabled and operation.table_config.backup_enabled):
+            return
+
+        key_shape = shape.key_shape([pk_column])
+        keys = [(to_bind_value(v),) for v in df_before[pk_column].drop_duplicates()]
+        chunk_size = key_shape.get_key_chunk_size(self.db_manager.dialect)
+        with self.profiler.phase("backup"):
+            for i in range(0, len(keys), chunk_size):
+                n_keys, params = self._pad_keys(key_shape, keys[i : i + chunk_size])
+                self.db_manager.execute_sql(
+                    self.db_manager.compiler.backup(key_shape, n_keys), params
+                )
+
+    def _pad_keys(
+        self, shape: OperationShape, keys: List[tuple]
+    ) -> Tuple[int, List[Any]]:
+        """用最后一个键补齐到固定档位，保持SQL文本稳定，返回 (键数, 展开的绑定值)"""
+        n_keys = shape.get_padded_size(len(keys), self.db_manager.dialect)
+        padded = keys + [keys[-1]] * (n_keys - len(keys))
+        return n_keys, [value for key in padded for value in key]
+
+    def _fetch_before(self, shape: OperationShape, keys: List[tuple]) -> pd.DataFrame:
+        """按条件键集合批量获取变更前数据，每个IN列表块一次查询"""
+        keys = list(dict.fromkeys(keys))
+        chunk_size = shape.get_key_chunk_size(self.db_manager.dialect)
+        frames = []
+        for i in range(0, len(keys), chunk_size):
+            n_keys, params = self._pad_keys(shape, keys[i : i + chunk_size])
+            frames.append(
+                self.db_manager.fetch_data(
+                    self.db_manager.compiler.select(shape, n_keys), params
+                )
+            )
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def _resolve_column(column: str, df: pd.DataFrame) -> str:
+        """按大小写无关方式查找结果集中的列名"""
+        for df_column in df.columns:
+            if df_column.lower() == column.lower():
+                return df_column
+        raise ValueError(f"Column {column} not found in query result")
+
+    def _resolve_primary_key(self, operation: SQLOperation, df: pd.DataFrame) -> str:
+        """获取结果集中的主键列名"""
+        primary_key = operation.table_config.primary_key
+        try:
+            return self._resolve_column(primary_key, df)
+        except ValueError:
+            raise ValueError(
+                f"Primary key {primary_key} not found in table {operation.table_name}"
+            )
+
+    @staticmethod
+    def _returning_type(series: pd.Series, is_key: bool) -> type:
+        """根据变更前数据的类型确定 RETURNING 输出变量类型"""
+        if pd.api.types.is_integer_dtype(series):
+            # 非主键的整数列可能被更新为小数，统一按浮点数取回
+            return int if is_key else float
+        if pd.api.types.is_numeric_dtype(series):
+            return float
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return datetime
+        return str
+
+    @staticmethod
+    def _build_after_image(
+        df_before: pd.DataFrame, columns: List[str], rows: List[tuple]
+    ) -> pd.DataFrame:
+        """用 RETURNING 取回的列值覆盖变更前数据，得到变更后数据"""
+        pk_column = columns[0]
+        df_returned = pd.DataFrame(rows, columns=columns).drop_duplicates(
+            subset=[pk_column], keep="last"
+        )
+        df_after = df_before.set_index(pk_column)
+        df_returned = df_returned.set_index(pk_column)
+        df_returned = df_returned[df_returned.index.isin(df_after.index)]
+
+        for column in columns[1:]:
+            values = df_returned[column]
+            if (
+                pd.api.types.is_integer_dtype(df_after[column])
+                and pd.api.types.is_float_dtype(values)
+                and values.notna().all()
+                and (values == values.round()).all()
+            ):
+                values = values.astype(df_after[column].dtype)
+            df_after[column] = df_after[column].astype(object)
+            df_after.loc[values.index, column] = values
+            df_after[column] = df_after[column].infer_objects()
+
+        return df_after.loc[df_after.index.isin(df_returned.index)].reset_index()
+
+    def _display_before(self, df_before: pd.DataFrame) -> None:
+        """显示受影响的变更前数据"""
+        if self.preview_enabled:
+            with self.profiler.phase("render"):
+                self.preview_renderer.render(df_before, "Affected data")
+
+    def _display_after(
+        self, df_before: pd.DataFrame, returning: List[str], rows: List[tuple]
+    ) -> None:
+        """显示变更后数据及数据变化
+
+        变更后数据和数据变化只在启用预览时才构建。
+        """
+        if not rows:
+            console.print(
+                "[red]Warning: Cannot find updated rows for verification[/red]"
+            )
+            return
+        if not self.preview_enabled:
+            return
+
+        with self.profiler.phase("render"):
+            primary_key = returning[0]
+            df_after = self._build_after_image(df_before, returning, rows)
+            self.preview_renderer.render(df_after, "Data after update")
+
+            if self.change_detector is None:
+                return
+            changes = self.change_detector(df_before, df_after, primary_key)
+            if not changes.empty:
+                console.print("\n[bold green]Changes made:[/bold green]")
+                self.preview_renderer.render_changes(changes, primary_key)
+            else:
+                console.print(
+                    "[yellow]Warning: No changes detected in the data[/yellow]"
+                )
+
+    def _display_unmatched(
+        self, shape: OperationShape, operations: List[SQLOperation]
+    ) -> None:
+        """显示未匹配任何数据的操作条件"""
+        self.profiler.count("unmatched", len(operations))
+        with self.profiler.phase("render"):
+            lines = [
+                ", ".join(
+                    f"{col} = {op.conditions[col]!r}" for col in shape.condition_columns
+                )
+                for op in operations[:MAX_UNMATCHED_DISPLAY]
+            ]
+            if len(operations) > MAX_UNMATCHED_DISPLAY:
+                lines.append(f"... and {len(operations) - MAX_UNMATCHED_DISPLAY} more")
+            console.print(
+                f"[yellow]No matching data found for {len(operations)} operations:[/yellow]"
+            )
+            console.print(
+                Panel(
+                    "\n".join(lines),
+                    title="[bold yellow]Unmatched Conditions[/bold yellow]",
+                )
+            )
+
+
+class ShapeAccumulator:
+    """按形状累积操作的缓冲区
+
+    某个形状累积到 batch_size 时输出一个批次；所有形状的缓冲总数超过
+    max_buffered 时，提前输出缓冲最多的形状，以限制内存占用。操作的键
+    （见 operation_key）已在另一个形状中缓冲时，先输出那个形状；追加操作
+    会越过之后缓冲的、可能作用于同一行的形状时，先输出全部缓冲。输出某个
+    形状前先输出之前缓冲的、可能与其重叠的形状，保持同一行上操作的文件顺序。
+    """
+
+    def __init__(self, batch_size: int, max_buffered: int):
+        self.batch_size = batch_size
+        self.max_buffered = max_buffered
+        self.pending: Dict[OperationShape, List[SQLOperation]] = {}
+        self.owners: Dict[Hashable, OperationShape] = {}
+        self.buffered = 0
+
+    def add(
+        self, operation: SQLOperation
+    ) -> List[Tuple[OperationShape, List[SQLOperation]]]:
+        """加入一个操作，返回需要立即执行的批次"""
+        shape = operation.get_shape()
+        key = operation_key(operation)
+        ready = []
+        owner = self.owners.get(key, shape)
+        if owner != shape:
+            ready.extend(self._pop(owner))
+        if crosses_later_group(self.pending, shape, operation):
+            ready.extend(self.drain())
+
+        self.pending.setdefault(shape, []).append(operation)
+        self.owners[key] = shape
+        self.buffered += 1
+
+        if len(self.pending[shape]) >= self.batch_size:
+            ready.extend(self._pop(shape))
+
+        while self.buffered > self.max_buffered:
+            largest = max(self.pending, key=lambda s: len(self.pending[s]))
+            ready.extend(self._pop(largest))
+
+        return ready
+
+    def drain(self) -> List[Tuple[OperationShape, List[SQLOperation]]]:
+        """输出所有剩余批次"""
+        return [self._take(shape) for shape in list(self.pending)]
+
+    def _pop(
+        self, shape: OperationShape
+    ) -> List[Tuple[OperationShape, List[SQLOperation]]]:
+        """取出某个形状，以及在它之前缓冲的、可能与其重叠的形状"""
+        first = self.pending[shape][0]
+        ready = []
+        for other in list(self.pending):
+            if other == shape:
+                break
+            if other in self.pending and may_overlap(first, self.pending[other][0]):
+                ready.extend(self._pop(other))
+        ready.append(self._take(shape))
+        return ready
+
+    def _take(self, shape: OperationShape) -> Tuple[OperationShape, List[SQLOperation]]:
+        """取出某个形状的全部缓冲操作"""
+        operations = self.pending.pop(shape)
+        self.buffered -= len(operations)
+        for operation in operations:
+            self.owners.pop(operation_key(operation), None)
+        return shape, operations
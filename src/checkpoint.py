@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# 计算输入文件哈希时每次读取的字节数
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class CheckpointJournal:
+    """断点日志
+
+    分段提交模式下，每次提交后记录已提交的批次数。批次按输入文件和
+    影响分批方式的设置确定地编号，恢复时跳过已提交的批次。日志中保存
+    输入文件的哈希和这些设置，任一变化时拒绝恢复。
+    """
+
+    def __init__(self, path: str, input_file: str, settings: Dict[str, Any]):
+        self.path = path
+        self.input_file = os.path.abspath(input_file)
+        self.input_hash = self.file_hash(input_file)
+        self.settings = settings
+        self.completed_batches = 0
+        self.finished = False
+
+    @staticmethod
+    def default_path(input_file: str) -> str:
+        """默认日志路径：输入文件旁的 <文件名>.journal.json"""
+        return f"{input_file}.journal.json"
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        """输入文件的 SHA-256"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def start(self, resume: bool) -> None:
+        """开始新的运行或从已有日志恢复"""
+        data = self._read()
+
+        if not resume:
+            if data is not None and not data.get("finished"):
+                raise ValueError(
+                    f"Unfinished journal found at {self.path}, "
+                    "resume the run or delete the journal"
+                )
+            self.record(0)
+            return
+
+        if data is None:
+            raise ValueError(f"No journal found at {self.path}")
+        if data.get("input_sha256") != self.input_hash:
+            raise ValueError("Input file has changed since the journal was written")
+        if data.get("settings") != self.settings:
+            raise ValueError(
+                f"Processor settings have changed since the journal was written: "
+                f"{data.get('settings')} != {self.settings}"
+            )
+        self.completed_batches = data.get("completed_batches", 0)
+        self.finished = data.get("finished", False)
+
+    def record(self, completed_batches: int, finished: bool = False) -> None:
+        """记录已提交的批次数（先写临时文件再替换，避免中断时损坏日志）"""
+        self.completed_batches = completed_batches
+        self.finished = finished
+        data = {
+            "input_file": self.input_file,
+            "input_sha256": self.input_hash,
+            "settings": self.settings,
+            "completed_batches": completed_batches,
+            "finished": finished,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
@@ -0,0 +1,99 @@
+from typing import Any, Dict, List, Optional, Tuple
+from .models import CommandType, SQLOperation, to_bind_value
+
+
+class OperationCoalescer:
+    """按主键合并操作
+
+    条件只有主键的操作按 (表, 主键值) 合并为净效果：连续的更新合并更新值
+    （后面的值覆盖前面的值，'+' 追加拼接到前面的值之后），删除吸收之前的
+    更新，删除之后的操作不会再匹配任何行而被丢弃。合并后的操作保留在该键
+    第一次出现的位置，因此不跨越可能作用于同一行的其他操作合并：同一张表
+    上条件不含主键的操作之后，该表已有的键重新开始合并；条件包含主键和其他
+    列的操作之后，该主键重新开始合并。其他条件的操作原样保留；某张表存在
+    更新主键的操作时，该表不做合并。
+    """
+
+    def __init__(self):
+        self.removed = 0
+
+    def coalesce(self, operations: List[SQLOperation]) -> List[SQLOperation]:
+        """合并操作，返回合并后的操作列表（保持原有顺序）"""
+        rekeyed_tables = {
+            op.table_name
+            for op in operations
+            if op.table_config.primary_key in (op.update_values or {})
+        }
+        result: List[SQLOperation] = []
+        # 表名 -> {主键值: 合并结果在 result 中的位置}
+        latest: Dict[str, Dict[Any, int]] = {}
+        for operation in operations:
+            key = self._key(operation)
+            if key is None or operation.table_name in rekeyed_tables:
+                self._barrier(latest, operation)
+                result.append(operation)
+                continue
+
+            table_latest = latest.setdefault(operation.table_name, {})
+            index = table_latest.get(key[1])
+            merged = None if index is None else self._merge(result[index], operation)
+            if merged is None:
+                table_latest[key[1]] = len(result)
+                result.append(operation)
+                continue
+            result[index] = merged
+            self.removed += 1
+        return result
+
+    @staticmethod
+    def _key(operation: SQLOperation) -> Optional[Tuple[str, Any]]:
+        """合并键，条件不是只有主键时返回 None"""
+        primary_key = operation.table_config.primary_key
+        if list(operation.conditions) != [primary_key]:
+            return None
+        return operation.table_name, to_bind_value(operation.conditions[primary_key])
+
+    @staticmethod
+    def _barrier(latest: Dict[str, Dict[Any, int]], operation: SQLOperation) -> None:
+        """不合并的操作之后，它可能作用的行上的键重新开始合并"""
+        table_latest = latest.get(operation.table_name)
+        if not table_latest:
+            return
+        primary_key = operation.table_config.primary_key
+        if primary_key in operation.conditions:
+            table_latest.pop(to_bind_value(operation.conditions[primary_key]), None)
+        else:
+            table_latest.clear()
+
+    @staticmethod
+    def _merge(
+        previous: SQLOperation, operation: SQLOperation
+    ) -> Optional[SQLOperation]:
+        """合并同一主键的两个操作，无法合并时返回 None"""
+        if previous.command_type == CommandType.DELETE:
+            return previous
+        if operation.command_type == CommandType.DELETE:
+            return operation
+
+        updates = dict(previous.update_values or {})
+        for column, value in (operation.update_values or {}).items():
+            if not (isinstance(value, str) and value.startswith("+")):
+                updates[column] = value
+            elif value == "+":
+                updates.setdefault(column, value)
+            elif column not in updates or updates[column] == "+":
+                updates[column] = value
+            elif isinstance(updates[column], str):
+                # 前一个值为追加时结果仍为追加，为文本时结果为新的文本
+                updates[column] = updates[column] + value[1:]
+            else:
+                # 追加到数字等非文本值的结果取决于数据库的类型转换
+                return None
+
+        return SQLOperation(
+            command_type=CommandType.UPDATE,
+            table_name=previous.table_name,
+            conditions=previous.conditions,
+            table_config=previous.table_config,
+            update_values=updates,
+        )
@@ -0,0 +1,124 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Sequence
+from .dialect import SQLDialect
+from .models import CommandType, OperationShape
+
+# 默认缓存的SQL模板数
+DEFAULT_TEMPLATE_CACHE_SIZE = 256
+
+
+class StatementCompiler:
+    """参数化SQL模板编译器
+
+    按 (语句类型, 形状, 键数, RETURNING 列) 缓存编译好的SQL文本，同一形状的
+    所有操作共享一条模板，只需绑定不同的值。超过 max_entries 时淘汰最久
+    未使用的模板。同一个编译器可由多个工作会话共享。
+    """
+
+    def __init__(
+        self, dialect: SQLDialect, max_entries: int = DEFAULT_TEMPLATE_CACHE_SIZE
+    ):
+        if max_entries < 1:
+            raise ValueError("Template cache size must be at least 1")
+        self.dialect = dialect
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._templates: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: Hashable, build: Callable[[], str]) -> str:
+        """从缓存获取模板，未命中时编译并加入缓存"""
+        with self._lock:
+            sql = self._templates.get(key)
+            if sql is not None:
+                self._templates.move_to_end(key)
+                self.hits += 1
+                return sql
+
+        sql = build()
+        with self._lock:
+            self.misses += 1
+            self._templates[key] = sql
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_entries:
+                self._templates.popitem(last=False)
+        return sql
+
+    def update(self, shape: OperationShape, returning: Sequence[str] = ()) -> str:
+        """UPDATE 模板：绑定值为 SQLOperation.get_bind_values()"""
+        returning = tuple(returning)
+        return self._get(
+            ("update", shape, returning),
+            lambda: shape.get_update_sql(returning, self.dialect),
+        )
+
+    def delete(
+        self, shape: OperationShape, n_keys: int = 1, returning: Sequence[str] = ()
+    ) -> str:
+        """IN列表 DELETE 模板：绑定值为 n_keys 组条件键依次展开"""
+        returning = tuple(returning)
+        return self._get(
+            ("delete", shape, n_keys, returning),
+            lambda: shape.get_delete_sql(n_keys, returning, self.dialect),
+        )
+
+    def select(self, shape: OperationShape, n_keys: int = 1) -> str:
+        """IN列表查询模板"""
+        shape = self._condition_shape(shape)
+        return self._get(
+            ("select", shape, n_keys),
+            lambda: shape.get_select_sql(n_keys, self.dialect),
+        )
+
+    def count(self, shape: OperationShape, n_keys: int = 1) -> str:
+        """IN列表计数模板"""
+        shape = self._condition_shape(shape)
+        return self._get(
+            ("count", shape, n_keys),
+            lambda: shape.get_count_sql(n_keys, self.dialect),
+        )
+
+    def backup(self, shape: OperationShape, n_keys: int = 1) -> str:
+        """IN列表备份模板"""
+        shape = self._condition_shape(shape)
+        return self._get(
+            ("backup", shape, n_keys),
+            lambda: shape.get_backup_sql(n_keys, self.dialect),
+        )
+
+    def staged(self, shape: OperationShape, statement: str) -> str:
+        """暂存表模式的语句模板"""
+        return self._get(
+            ("staged", statement, shape),
+            lambda: shape.get_staged_sql(statement, self.dialect),
+        )
+
+    def statement(self, shape: OperationShape) -> str:
+        """单个操作的执行模板"""
+        if shape.command_type == CommandType.DELETE:
+            return self.delete(shape)
+        return self.update(shape)
+
+    @staticmethod
+    def _condition_shape(shape: OperationShape) -> OperationShape:
+        """查询和备份只依赖条件列，去掉更新列使不同更新形状共享模板"""
+        if not shape.update_columns:
+            return shape
+        return shape.key_shape(shape.condition_columns)
+
+    def cache_info(self) -> Dict[str, int]:
+        """缓存统计"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._templates),
+                "max_entries": self.max_entries,
+            }
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._templates.clear()
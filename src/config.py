@@ -1,6 +1,6 @@
 import json
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .models import DatabaseConfig
 from dataclasses import dataclass
 
@@ -13,8 +13,24 @@ class ProcessorConfig:
     batch_size: int = 1000
     backup_enabled: bool = True
     preview_enabled: bool = True
+    preview_max_rows: int = 20
+    preview_mode: str = "head"
     require_confirmation: bool = True
+    confirmation_mode: str = "batch"
+    execution_mode: str = "batch"
     date_format: str = "YYYY-MM-DD"
+    streaming_enabled: bool = False
+    memory_budget_mb: int = 256
+    workers: int = 1
+    parallel_partition: str = "table"
+    coalesce_enabled: bool = False
+    commit_every: int = 0
+    journal_path: Optional[str] = None
+    isolate_failures: bool = False
+    reject_file: Optional[str] = None
+    schema_cache_enabled: bool = False
+    schema_cache_path: str = ".schema_cache.json"
+    schema_cache_ttl: int = 86400
 
     @classmethod
     def from_dict(cls, config: Dict[str, Any]) -> "ProcessorConfig":
@@ -1,35 +1,92 @@
-import cx_Oracle
-from contextlib import contextmanager
-from typing import Generator, List, Dict, Any
+from contextlib import closing, contextmanager
+from typing import Generator, Iterator, List, Dict, Any, Optional, Sequence, Tuple
 import pandas as pd
 from rich.console import Console
-from .models import DatabaseConfig, SQLOperation
+from .backends import DatabaseBackend, get_backend
+from .compiler import StatementCompiler
+from .models import CommandType, DatabaseConfig, PlanStep, SQLOperation, TableSchema
+from .profiler import Profiler
 
 console = Console()
 
+# fetch_chunks 默认每块的行数
+FETCH_CHUNK_ROWS = 100_000
+
 
 class DatabaseManager:
     """数据库管理类"""
 
-    def __init__(self, config: DatabaseConfig):
+    def __init__(
+        self,
+        config: DatabaseConfig,
+        connection: Any = None,
+        backend: Optional[DatabaseBackend] = None,
+        profiler: Optional[Profiler] = None,
+        compiler: Optional[StatementCompiler] = None,
+    ):
         self.config = config
-        self.connection = None
-        self._connect()
+        self.profiler = profiler or Profiler(enabled=False)
+        self.backend = backend or get_backend(config.backend)
+        self.dialect = self.backend.dialect
+        self.compiler = compiler or StatementCompiler(self.dialect)
+        self.pool = None
+        self.connection = connection
+        self._owns_connection = connection is None
+        if connection is None:
+            self._connect()
 
     def _connect(self) -> None:
-        """建立数据库连接"""
+        """建立数据库连接，配置了连接池时从池中获取主连接"""
         try:
-            dsn = cx_Oracle.makedsn(
-                self.config.host,
-                self.config.port,
-                service_name=self.config.service_name,
+            if self.config.pool:
+                self.pool = self.backend.create_pool(self.config)
+                self.connection = self.backend.acquire(self.pool)
+            else:
+                self.connection = self.backend.connect(self.config)
+        except self.backend.error as e:
+            raise ConnectionError(f"Failed to connect to database: {e}")
+
+    def _cursor(self) -> Any:
+        """获取自动关闭的游标"""
+        return closing(self.connection.cursor())
+
+    @property
+    def pool_enabled(self) -> bool:
+        """是否启用了连接池"""
+        return self.pool is not None
+
+    @contextmanager
+    def worker(self) -> Generator["DatabaseManager", None, None]:
+        """从连接池获取一个独立会话
+
+        返回绑定该会话的 DatabaseManager，退出时归还连接池；
+        未提交的事务在归还时由连接池回滚。
+        """
+        if self.pool is None:
+            raise RuntimeError(
+                "Connection pool is not enabled, configure 'pool' for this database"
             )
-            self.connection = cx_Oracle.connect(
-                self.config.username, self.config.password, dsn
+
+        try:
+            connection = self.backend.acquire(self.pool)
+        except self.backend.error as e:
+            raise ConnectionError(f"Failed to acquire pooled connection: {e}")
+
+        try:
+            yield DatabaseManager(
+                self.config,
+                connection=connection,
+                backend=self.backend,
+                profiler=self.profiler,
+                compiler=self.compiler,
             )
-            self.connection.autocommit = False
-        except cx_Oracle.Error as e:
-            raise ConnectionError(f"Failed to connect to database: {e}")
+        finally:
+            try:
+                self.backend.release(self.pool, connection)
+            except self.backend.error as e:
+                console.print(
+                    f"[yellow]Warning: Error releasing pooled connection: {e}[/yellow]"
+                )
 
     @contextmanager
     def transaction(self) -> Generator[None, None, None]:
@@ -41,54 +98,212 @@ class DatabaseManager:
             self.connection.rollback()
             raise
 
+    def commit(self) -> None:
+        """提交当前事务"""
+        with self.profiler.phase("commit"):
+            self.connection.commit()
+
+    def savepoint(self, name: str) -> None:
+        """在当前事务中创建保存点"""
+        try:
+            with self._cursor() as cursor:
+                cursor.execute(self.dialect.savepoint_sql(name))
+        except self.backend.error as e:
+            raise RuntimeError(f"Failed to create savepoint: {e}")
+
+    def rollback_to_savepoint(self, name: str) -> None:
+        """回滚到保存点"""
+        try:
+            with self.profiler.phase("rollback"), self._cursor() as cursor:
+                cursor.execute(self.dialect.rollback_to_savepoint_sql(name))
+        except self.backend.error as e:
+            raise RuntimeError(f"Failed to roll back to savepoint: {e}")
+
     def backup_data(self, operation: SQLOperation) -> None:
         """备份数据"""
+        if not operation.table_config.backup_enabled:
+            return
+
         try:
-            # 构建备份SQL
-            backup_sql = f"""
-                INSERT INTO {operation.table_name}_bak 
-                SELECT t.*, SYSTIMESTAMP as backup_time 
-                FROM {operation.table_name} t 
-                WHERE {operation.get_where_clause()}
-            """
-
-            with self.connection.cursor() as cursor:
-                cursor.execute(backup_sql)
-
-        except cx_Oracle.Error as e:
+            # 按条件列编译的参数化备份SQL
+            backup_sql = self.compiler.backup(operation.get_shape())
+
+            with self.profiler.phase("backup"), self._cursor() as cursor:
+                cursor.execute(backup_sql, list(operation.get_condition_binds()))
+            self.profiler.count("statements")
+
+        except self.backend.error as e:
             raise RuntimeError(f"Failed to backup data: {e}")
 
-    def fetch_data(self, sql: str) -> pd.DataFrame:
+    def fetch_data(self, sql: str, params: Sequence[Any] = ()) -> pd.DataFrame:
         """执行查询并返回DataFrame"""
+        frames = list(self.fetch_chunks(sql, params))
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames, ignore_index=True)
+
+    def fetch_chunks(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        chunk_rows: Optional[int] = None,
+    ) -> Iterator[pd.DataFrame]:
+        """执行查询，按块返回DataFrame
+
+        每块最多 chunk_rows 行，按 arraysize 批量取回后直接按列构建类型化的
+        NumPy 数组，不经过整个结果集的行元组列表。结果集为空时返回一个空块。
+        """
+        chunk_rows = chunk_rows or FETCH_CHUNK_ROWS
         try:
-            with self.connection.cursor() as cursor:
-                cursor.execute(sql)
-                columns = [desc[0].lower() for desc in cursor.description]
-                data = cursor.fetchall()
-                return pd.DataFrame(data, columns=columns)
-        except cx_Oracle.Error as e:
+            with self._cursor() as cursor:
+                with self.profiler.phase("fetch"):
+                    self.backend.prepare_fetch(cursor, self.config)
+                    cursor.execute(sql, list(params))
+                    columns = [desc[0].lower() for desc in cursor.description]
+                    dtypes = self.backend.column_dtypes(cursor.description)
+                self.profiler.count("statements")
+
+                first = True
+                while True:
+                    with self.profiler.phase("fetch"):
+                        rows = cursor.fetchmany(chunk_rows)
+                        if not rows and not first:
+                            return
+                        frame = self._build_frame(rows, columns, dtypes)
+                    self.profiler.count("rows_fetched", len(rows))
+                    yield frame
+                    if len(rows) < chunk_rows:
+                        return
+                    first = False
+        except self.backend.error as e:
             raise RuntimeError(f"Failed to fetch data: {e}")
 
+    @staticmethod
+    def _build_frame(
+        rows: List[tuple], columns: List[str], dtypes: List[Optional[str]]
+    ) -> pd.DataFrame:
+        """将一块行元组转换为DataFrame，并按结果集描述设置列类型
+
+        行到列的转换由 pandas 在 C 层完成；含空值或超出范围的列保留推断的类型。
+        """
+        frame = pd.DataFrame(rows, columns=columns)
+        if not rows:
+            return frame
+        for i, dtype in enumerate(dtypes):
+            if dtype is None or frame.dtypes.iloc[i] == dtype:
+                continue
+            column = frame.iloc[:, i]
+            if column.isna().any():
+                continue
+            try:
+                frame.isetitem(i, column.to_numpy().astype(dtype))
+            except (TypeError, ValueError, OverflowError):
+                pass
+        return frame
+
     def execute_operation(self, operation: SQLOperation) -> int:
         """执行SQL操作"""
-        with self.connection.cursor() as cursor:
+        if operation.command_type == CommandType.DELETE:
+            params = operation.get_condition_binds()
+        else:
+            params = operation.get_bind_values()
+
+        with self._cursor() as cursor:
             try:
+                sql = self.compiler.statement(operation.get_shape())
+
                 # 如果启用了备份，先备份数据
                 self.backup_data(operation)
 
                 # 执行操作
-                cursor.execute(operation.get_sql())
+                with self.profiler.phase("execute"):
+                    cursor.execute(sql, list(params))
+                self.profiler.count("statements")
                 return cursor.rowcount
 
-            except cx_Oracle.Error as e:
+            except self.backend.error as e:
                 raise RuntimeError(f"Failed to execute SQL: {e}")
 
+    def execute_sql(self, sql: str, params: Sequence[Any] = ()) -> int:
+        """执行单条参数化SQL，返回影响的行数"""
+        try:
+            with self.profiler.phase("execute"), self._cursor() as cursor:
+                cursor.execute(sql, list(params))
+                self.profiler.count("statements")
+                return cursor.rowcount
+        except self.backend.error as e:
+            raise RuntimeError(f"Failed to execute SQL: {e}")
+
+    def execute_many(self, sql: str, params: Sequence[tuple]) -> List[int]:
+        """批量执行参数化SQL，返回每组绑定值影响的行数"""
+        params = list(params)
+        if not params:
+            return []
+        try:
+            with self.profiler.phase("execute"), self._cursor() as cursor:
+                self.profiler.count("statements")
+                return self.backend.execute_many(cursor, sql, params)
+        except self.backend.error as e:
+            raise RuntimeError(f"Failed to execute SQL: {e}")
+
+    def execute_many_returning(
+        self, sql: str, params: Sequence[tuple], returning_types: Sequence[type]
+    ) -> Tuple[List[int], List[List[tuple]]]:
+        """批量执行带 RETURNING 的参数化SQL
+
+        返回 (每组绑定值影响的行数, 每组绑定值返回的行列表)。
+        """
+        params = list(params)
+        if not params:
+            return [], []
+        try:
+            with self.profiler.phase("execute"), self._cursor() as cursor:
+                self.profiler.count("statements")
+                return self.backend.execute_many_returning(
+                    cursor, sql, params, returning_types
+                )
+        except self.backend.error as e:
+            raise RuntimeError(f"Failed to execute SQL: {e}")
+
+    def execute_returning(
+        self, sql: str, params: Sequence[Any], returning_types: Sequence[type]
+    ) -> List[tuple]:
+        """执行带 RETURNING 的单条参数化SQL，返回受影响行的列值"""
+        try:
+            with self.profiler.phase("execute"), self._cursor() as cursor:
+                self.profiler.count("statements")
+                return self.backend.execute_returning(
+                    cursor, sql, params, returning_types
+                )
+        except self.backend.error as e:
+            raise RuntimeError(f"Failed to execute SQL: {e}")
+
+    def explain(self, sql: str, params: Sequence[Any] = ()) -> List[PlanStep]:
+        """获取语句的执行计划，不执行语句本身"""
+        try:
+            with self.profiler.phase("explain"), self._cursor() as cursor:
+                return self.backend.explain(cursor, sql, params)
+        except self.backend.error as e:
+            raise RuntimeError(f"Failed to explain SQL: {e}")
+
+    def read_schema(self, table_name: str) -> Optional[TableSchema]:
+        """从数据字典读取表结构，表不存在时返回 None"""
+        try:
+            with self.profiler.phase("schema"), self._cursor() as cursor:
+                return self.backend.read_schema(cursor, table_name)
+        except self.backend.error as e:
+            raise RuntimeError(f"Failed to read schema of {table_name}: {e}")
+
     def close(self) -> None:
-        """关闭数据库连接"""
-        if self.connection:
+        """关闭数据库连接（工作会话由 worker() 负责归还，不在此关闭）"""
+        if self.connection and self._owns_connection:
             try:
-                self.connection.close()
-            except cx_Oracle.Error as e:
+                if self.pool is not None:
+                    self.backend.release(self.pool, self.connection)
+                    self.backend.close_pool(self.pool)
+                else:
+                    self.connection.close()
+            except self.backend.error as e:
                 console.print(
                     f"[yellow]Warning: Error closing database connection: {e}[/yellow]"
                 )
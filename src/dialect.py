@@ -0,0 +1,136 @@
+from typing import List, Sequence
+
+
+class SQLDialect:
+    """SQL方言
+
+    封装各数据库在绑定变量、日期转换、字符串拼接、时间戳、IN列表和
+    RETURNING 语法上的差异。默认实现为 Oracle 语法。
+    """
+
+    name = "oracle"
+    # IN 列表最多的元素个数（Oracle: ORA-01795）
+    max_in_list_size = 1000
+    # 单条语句最多的绑定变量个数
+    max_bind_variables = 65535
+
+    def placeholder(self, position: int) -> str:
+        """生成第 position 个绑定变量占位符（从1开始）"""
+        return f":{position}"
+
+    def date_value(self, expr: str, date_format: str = "YYYY-MM-DD") -> str:
+        """将字符串表达式转换为日期"""
+        return f"TO_DATE({expr}, '{date_format}')"
+
+    def concat(self, left: str, right: str) -> str:
+        """字符串拼接"""
+        return f"{left} || {right}"
+
+    def current_timestamp(self) -> str:
+        """当前时间戳表达式"""
+        return "SYSTIMESTAMP"
+
+    def in_list(self, columns: Sequence[str], rows: List[List[str]]) -> str:
+        """生成IN子句，多列条件使用元组IN"""
+        if len(columns) == 1:
+            return f"{columns[0]} IN ({','.join(row[0] for row in rows)})"
+        values = ",".join(f"({','.join(row)})" for row in rows)
+        return f"({','.join(columns)}) IN ({values})"
+
+    def returning_clause(self, columns: Sequence[str], offset: int) -> str:
+        """生成 RETURNING 子句，输出变量从 offset + 1 开始编号"""
+        if not columns:
+            return ""
+        outputs = ", ".join(
+            self.placeholder(offset + i) for i in range(1, len(columns) + 1)
+        )
+        return f" RETURNING {', '.join(columns)} INTO {outputs}"
+
+    def savepoint_sql(self, name: str) -> str:
+        """创建保存点"""
+        return f"SAVEPOINT {name}"
+
+    def rollback_to_savepoint_sql(self, name: str) -> str:
+        """回滚到保存点（保存点之前的工作保留）"""
+        return f"ROLLBACK TO SAVEPOINT {name}"
+
+    def staged_update_sql(
+        self,
+        table_name: str,
+        staging_table: str,
+        condition_columns: Sequence[str],
+        update_columns: Sequence[str],
+        append_columns: Sequence[str],
+    ) -> str:
+        """用暂存表中的行一次更新目标表（MERGE）"""
+        on = " AND ".join(f"t.{column} = s.{column}" for column in condition_columns)
+        updates = ", ".join(
+            (
+                f"t.{column} = {self.concat(f't.{column}', f's.{column}')}"
+                if column in append_columns
+                else f"t.{column} = s.{column}"
+            )
+            for column in update_columns
+        )
+        return (
+            f"MERGE INTO {table_name} t USING {staging_table} s ON ({on}) "
+            f"WHEN MATCHED THEN UPDATE SET {updates}"
+        )
+
+    def backup_sql(self, table_name: str, where_clause: str) -> str:
+        """生成备份语句：将匹配行连同备份时间写入 <表名>_bak"""
+        return (
+            f"INSERT INTO {table_name}_bak "
+            f"SELECT t.*, {self.current_timestamp()} as backup_time "
+            f"FROM {table_name} t WHERE {where_clause}"
+        )
+
+
+class SQLiteDialect(SQLDialect):
+    """SQLite 方言"""
+
+    name = "sqlite"
+    max_in_list_size = 1000
+    # SQLITE_MAX_VARIABLE_NUMBER 默认值（3.32+）
+    max_bind_variables = 32766
+
+    def placeholder(self, position: int) -> str:
+        return f"?{position}"
+
+    def date_value(self, expr: str, date_format: str = "YYYY-MM-DD") -> str:
+        # SQLite 以 ISO 文本存储日期，保持原值
+        return expr
+
+    def current_timestamp(self) -> str:
+        return "CURRENT_TIMESTAMP"
+
+    def staged_update_sql(
+        self,
+        table_name: str,
+        staging_table: str,
+        condition_columns: Sequence[str],
+        update_columns: Sequence[str],
+        append_columns: Sequence[str],
+    ) -> str:
+        # SQLite 没有 MERGE，使用 UPDATE ... FROM（3.33+）
+        where = " AND ".join(
+            f"{table_name}.{column} = s.{column}" for column in condition_columns
+        )
+        updates = ", ".join(
+            (
+                f"{column} = {self.concat(f'{table_name}.{column}', f's.{column}')}"
+                if column in append_columns
+                else f"{column} = s.{column}"
+            )
+            for column in update_columns
+        )
+        return f"UPDATE {table_name} SET {updates} FROM {staging_table} s WHERE {where}"
+
+    def returning_clause(self, columns: Sequence[str], offset: int) -> str:
+        # SQLite 的 RETURNING 以结果集形式返回，没有输出变量
+        if not columns:
+            return ""
+        return f" RETURNING {', '.join(columns)}"
+
+
+ORACLE_DIALECT = SQLDialect()
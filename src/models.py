@@ -1,6 +1,7 @@
-from dataclasses import dataclass, field
-from typing import Set, Any, Dict, Optional, List
+from dataclasses import dataclass, field, replace
+from typing import Set, Any, Dict, Optional, List, Tuple, Sequence
 from enum import Enum
+from .dialect import SQLDialect, ORACLE_DIALECT
 
 
 class CommandType(Enum):
@@ -19,25 +20,59 @@ class UnmatchedData:
     condition: str
 
 
+@dataclass
+class PoolConfig:
+    """连接池配置模型"""
+
+    min: int = 1
+    max: int = 4
+    increment: int = 1
+    stmt_cache_size: int = 50
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> "PoolConfig":
+        """从字典创建配置对象"""
+        return cls(
+            min=config.get("min", 1),
+            max=config.get("max", 4),
+            increment=config.get("increment", 1),
+            stmt_cache_size=config.get("stmt_cache_size", 50),
+        )
+
+
 @dataclass
 class DatabaseConfig:
     """数据库配置模型"""
 
-    username: str
-    password: str
-    host: str
-    port: str
-    service_name: str
+    username: str = ""
+    password: str = ""
+    host: str = ""
+    port: str = ""
+    service_name: str = ""
+    pool: Optional[PoolConfig] = None
+    backend: str = "oracle"
+    database: str = ""
+    # 查询时每次往返取回的行数
+    arraysize: int = 1000
+    # 执行查询时随首次往返预取的行数（Oracle）
+    prefetchrows: int = 1000
 
     @classmethod
-    def from_dict(cls, config: Dict[str, str]) -> "DatabaseConfig":
+    def from_dict(cls, config: Dict[str, Any]) -> "DatabaseConfig":
         """从字典创建配置对象"""
+        backend = config.get("backend", "oracle")
+        # Oracle 的连接信息为必填项，其他后端按需读取
+        connection_fields = {
+            key: config[key] if backend == "oracle" else config.get(key, "")
+            for key in ("username", "password", "host", "port", "service_name")
+        }
         return cls(
-            username=config["username"],
-            password=config["password"],
-            host=config["host"],
-            port=config["port"],
-            service_name=config["service_name"],
+            **connection_fields,
+            pool=PoolConfig.from_dict(config["pool"]) if "pool" in config else None,
+            backend=backend,
+            database=config.get("database", ""),
+            arraysize=config.get("arraysize", 1000),
+            prefetchrows=config.get("prefetchrows", 1000),
         )
 
 
@@ -50,6 +85,8 @@ class TableConfig:
     number_columns: List[str]
     backup_enabled: bool = True
     columns_mapping: Dict[str, str] = field(default_factory=dict)
+    # 表的全部列名（来自数据字典），为空表示未知
+    columns: List[str] = field(default_factory=list)
 
     @classmethod
     def from_dict(cls, config: Dict[str, Any]) -> "TableConfig":
@@ -65,10 +102,335 @@ class TableConfig:
         """将CSV列名映射到实际表列名"""
         return self.columns_mapping.get(csv_column, csv_column)
 
+    def with_schema(self, schema: "TableSchema") -> "TableConfig":
+        """用数据字典中的列、列类型和主键替换手工维护的配置"""
+        return replace(
+            self,
+            primary_key=(
+                schema.primary_key[0]
+                if len(schema.primary_key) == 1
+                else self.primary_key
+            ),
+            date_columns=schema.columns_of("date"),
+            number_columns=schema.columns_of("number"),
+            columns=list(schema.columns),
+        )
+
+
+@dataclass
+class TableSchema:
+    """从数据字典读取的表结构"""
+
+    table_name: str
+    # 列名（小写）到类型的映射：number / date / text / other
+    columns: Dict[str, str]
+    primary_key: List[str] = field(default_factory=list)
+
+    def columns_of(self, kind: str) -> List[str]:
+        """某种类型的全部列"""
+        return [column for column, k in self.columns.items() if k == kind]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"columns": self.columns, "primary_key": self.primary_key}
+
+    @classmethod
+    def from_dict(cls, table_name: str, data: Dict[str, Any]) -> "TableSchema":
+        return cls(
+            table_name=table_name,
+            columns=data["columns"],
+            primary_key=data.get("primary_key", []),
+        )
+
+
+def to_bind_value(value: Any) -> Any:
+    """将numpy标量等转换为数据库驱动可绑定的Python原生类型"""
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        return value.item()
+    return value
+
+
+@dataclass(frozen=True)
+class OperationShape:
+    """操作形状模型
+
+    相同形状（表、命令、条件列、更新列、追加列）的操作共享同一条参数化SQL。
+    """
+
+    table_name: str
+    command_type: CommandType
+    condition_columns: Tuple[str, ...]
+    update_columns: Tuple[str, ...] = ()
+    append_columns: Tuple[str, ...] = ()
+    date_columns: Tuple[str, ...] = ()
+
+    def _placeholder(self, column: str, position: int, dialect: SQLDialect) -> str:
+        """生成绑定变量占位符"""
+        placeholder = dialect.placeholder(position)
+        if column in self.date_columns:
+            return dialect.date_value(placeholder)
+        return placeholder
+
+    def _require_conditions(self) -> None:
+        """检查条件列，禁止生成无WHERE条件的语句"""
+        if not self.condition_columns:
+            raise ValueError(
+                f"Conditions are required for {self.command_type.value} "
+                f"operation on {self.table_name}"
+            )
+
+    def get_where_clause(
+        self, offset: int = 0, dialect: SQLDialect = ORACLE_DIALECT
+    ) -> str:
+        """获取参数化WHERE子句，绑定变量从 offset + 1 开始编号"""
+        self._require_conditions()
+        return " AND ".join(
+            f"{column} = {self._placeholder(column, offset + i, dialect)}"
+            for i, column in enumerate(self.condition_columns, start=1)
+        )
+
+    def get_update_sql(
+        self, returning: Sequence[str] = (), dialect: SQLDialect = ORACLE_DIALECT
+    ) -> str:
+        """生成参数化UPDATE语句，可选返回更新后的列值"""
+        if not self.update_columns:
+            raise ValueError("No valid update values provided")
+
+        updates = []
+        for i, column in enumerate(self.update_columns, start=1):
+            if column in self.append_columns:
+                value = dialect.concat(column, dialect.placeholder(i))
+            else:
+                value = self._placeholder(column, i, dialect)
+            updates.append(f"{column} = {value}")
+
+        n_binds = len(self.update_columns) + len(self.condition_columns)
+        return (
+            f"UPDATE {self.table_name} SET {', '.join(updates)} "
+            f"WHERE {self.get_where_clause(len(self.update_columns), dialect)}"
+            f"{dialect.returning_clause(returning, n_binds)}"
+        )
+
+    def get_key_chunk_size(self, dialect: SQLDialect = ORACLE_DIALECT) -> int:
+        """获取IN列表每块的最大键数"""
+        return max(
+            1,
+            min(
+                dialect.max_in_list_size,
+                dialect.max_bind_variables // max(1, len(self.condition_columns)),
+            ),
+        )
+
+    def get_padded_size(self, n_keys: int, dialect: SQLDialect = ORACLE_DIALECT) -> int:
+        """将键数向上取整到固定档位，使不同批次共享有限几条SQL文本"""
+        limit = self.get_key_chunk_size(dialect)
+        size = 1
+        while size < n_keys and size < limit:
+            size *= 2
+        return min(size, limit)
+
+    def get_in_clause(self, n_keys: int, dialect: SQLDialect = ORACLE_DIALECT) -> str:
+        """生成参数化IN子句，多列条件使用元组IN"""
+        self._require_conditions()
+        width = len(self.condition_columns)
+        rows = [
+            [
+                self._placeholder(column, i * width + j, dialect)
+                for j, column in enumerate(self.condition_columns, start=1)
+            ]
+            for i in range(n_keys)
+        ]
+        return dialect.in_list(self.condition_columns, rows)
+
+    def get_select_sql(self, n_keys: int, dialect: SQLDialect = ORACLE_DIALECT) -> str:
+        """生成参数化IN列表查询语句（用于批量获取变更前数据）"""
+        return (
+            f"SELECT * FROM {self.table_name} "
+            f"WHERE {self.get_in_clause(n_keys, dialect)}"
+        )
+
+    def get_count_sql(self, n_keys: int, dialect: SQLDialect = ORACLE_DIALECT) -> str:
+        """生成参数化IN列表计数语句（用于规划阶段统计匹配行数）"""
+        return (
+            f"SELECT COUNT(*) AS matched FROM {self.table_name} "
+            f"WHERE {self.get_in_clause(n_keys, dialect)}"
+        )
+
+    def get_delete_sql(
+        self,
+        n_keys: int,
+        returning: Sequence[str] = (),
+        dialect: SQLDialect = ORACLE_DIALECT,
+    ) -> str:
+        """生成参数化IN列表DELETE语句，可选返回被删除行的列值"""
+        n_binds = n_keys * len(self.condition_columns)
+        return (
+            f"DELETE FROM {self.table_name} "
+            f"WHERE {self.get_in_clause(n_keys, dialect)}"
+            f"{dialect.returning_clause(returning, n_binds)}"
+        )
+
+    def get_backup_sql(self, n_keys: int, dialect: SQLDialect = ORACLE_DIALECT) -> str:
+        """生成参数化IN列表备份语句"""
+        return dialect.backup_sql(self.table_name, self.get_in_clause(n_keys, dialect))
+
+    @property
+    def staging_table(self) -> str:
+        """暂存表名"""
+        return f"{self.table_name}_stg"
+
+    def _in_staging(self) -> str:
+        """条件键在暂存表中的子查询条件"""
+        self._require_conditions()
+        columns = ", ".join(self.condition_columns)
+        keys = columns if len(self.condition_columns) == 1 else f"({columns})"
+        return f"{keys} IN (SELECT {columns} FROM {self.staging_table})"
+
+    def get_staged_sql(
+        self, statement: str, dialect: SQLDialect = ORACLE_DIALECT
+    ) -> str:
+        """生成暂存表模式的语句
+
+        insert: 将一个操作写入暂存表（绑定值为 SQLOperation.get_bind_values()）；
+        count / unmatched: 匹配的目标行数 / 未匹配任何行的暂存键数；
+        select / backup: 变更前数据 / 备份；update / delete: 一条集合语句应用全部暂存行。
+        """
+        if statement == "insert":
+            columns = self.update_columns + self.condition_columns
+            values = [
+                (
+                    dialect.placeholder(i)
+                    if column in self.append_columns
+                    else self._placeholder(column, i, dialect)
+                )
+                for i, column in enumerate(columns, start=1)
+            ]
+            return (
+                f"INSERT INTO {self.staging_table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join(values)})"
+            )
+        if statement == "count":
+            return (
+                f"SELECT COUNT(*) AS matched FROM {self.table_name} "
+                f"WHERE {self._in_staging()}"
+            )
+        if statement == "unmatched":
+            self._require_conditions()
+            join = " AND ".join(
+                f"t.{column} = s.{column}" for column in self.condition_columns
+            )
+            return (
+                f"SELECT COUNT(*) AS unmatched FROM {self.staging_table} s "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {self.table_name} t WHERE {join})"
+            )
+        if statement == "select":
+            return f"SELECT * FROM {self.table_name} WHERE {self._in_staging()}"
+        if statement == "backup":
+            return dialect.backup_sql(self.table_name, self._in_staging())
+        if statement == "update":
+            if not self.update_columns:
+                raise ValueError("No valid update values provided")
+            self._require_conditions()
+            return dialect.staged_update_sql(
+                self.table_name,
+                self.staging_table,
+                self.condition_columns,
+                self.update_columns,
+                self.append_columns,
+            )
+        if statement == "delete":
+            return f"DELETE FROM {self.table_name} WHERE {self._in_staging()}"
+        raise ValueError(f"Unknown staged statement: {statement}")
+
+    def key_shape(self, key_columns: Sequence[str]) -> "OperationShape":
+        """获取以指定列（通常为主键）为条件的同表形状"""
+        key_columns = tuple(key_columns)
+        return OperationShape(
+            table_name=self.table_name,
+            command_type=self.command_type,
+            condition_columns=key_columns,
+            date_columns=tuple(c for c in key_columns if c in self.date_columns),
+        )
+
+
+@dataclass
+class ShapePlan:
+    """单个形状的执行计划（规划阶段的影响汇总）"""
+
+    shape: OperationShape
+    operations: int = 0
+    keys: int = 0
+    matched_rows: int = 0
+
+    def merge(self, other: "ShapePlan") -> None:
+        """合并同一形状的另一批计划"""
+        self.operations += other.operations
+        self.keys += other.keys
+        self.matched_rows += other.matched_rows
+
+
+@dataclass
+class ValidationIssue:
+    """输入校验发现的问题"""
+
+    message: str
+    row: Optional[int] = None
+    table: Optional[str] = None
+    column: Optional[str] = None
+    value: Any = None
+    severity: str = "error"
+
+
+@dataclass
+class PlanStep:
+    """执行计划中的一步"""
+
+    depth: int
+    operation: str
+    object_name: Optional[str] = None
+    cost: Optional[float] = None
+    cardinality: Optional[int] = None
+    full_scan: bool = False
+
+
+@dataclass
+class StatementEstimate:
+    """某个形状的一条语句的执行计划和代价估算"""
+
+    shape: OperationShape
+    statement: str
+    sql: str
+    executions: int
+    steps: List[PlanStep] = field(default_factory=list)
+
+    @property
+    def cost(self) -> Optional[float]:
+        """单次执行的估算代价（计划根节点），后端不提供代价时为 None"""
+        return self.steps[0].cost if self.steps else None
+
+    @property
+    def cardinality(self) -> Optional[int]:
+        """单次执行的估算行数"""
+        return self.steps[0].cardinality if self.steps else None
+
+    @property
+    def projected_cost(self) -> Optional[float]:
+        """全部执行次数的估算代价"""
+        return None if self.cost is None else self.cost * self.executions
+
+    @property
+    def full_scans(self) -> List[str]:
+        """执行计划中全表（全索引）扫描的对象"""
+        return [
+            step.object_name or step.operation for step in self.steps if step.full_scan
+        ]
+
 
 @dataclass
 class SQLOperation:
-    """SQL操作模型"""
+    """SQL操作模型
+
+    只保存条件值和更新值，SQL文本按形状由 StatementCompiler 编译并缓存。
+    """
 
     command_type: CommandType
     table_name: str
@@ -77,89 +439,57 @@ class SQLOperation:
     update_values: Optional[Dict[str, Any]] = None
     affected_rows: Optional[int] = None
 
-    def _process_append_value(self, column: str, value: str) -> str:
-        """处理追加值的特殊语法"""
-        if not isinstance(value, str) or not value.startswith("+"):
-            return value
-
-        append_text = value[1:]  # 移除 '+' 前缀
-        if not append_text:  # 如果只有 '+'，忽略这个更新
-            return None
-
-        # 使用 CONCAT 函数（Oracle 使用 ||）
-        return f"{column} || '{append_text}'"
-
-    def _format_value(self, column: str, value: Any) -> str:
-        """格式化值，处理特殊类型"""
-        if value is None:
-            return "NULL"
-
-        # 处理追加文本的情况
-        if isinstance(value, str) and value.startswith("+"):
-            processed_value = self._process_append_value(column, value)
-            if processed_value is None:
-                return column  # 返回原列名，相当于不更新
-            return processed_value
-
-        # 处理其他类型
-        elif column in self.table_config.number_columns:
-            return str(value)
-        elif column in self.table_config.date_columns:
-            return f"TO_DATE('{value}', 'YYYY-MM-DD')"
-        else:
-            return f"'{str(value)}'"
-
-    def get_where_clause(self) -> str:
-        """获取WHERE子句"""
-        conditions = []
-        for column, value in self.conditions.items():
-            if isinstance(value, list):
-                # 处理IN查询
-                values_str = self._generate_in_clause(value)
-                conditions.append(f"{column} IN {values_str}")
-            else:
-                # 处理单值查询
-                formatted_value = self._format_value(column, value)
-                conditions.append(f"{column} = {formatted_value}")
-
-        return " AND ".join(conditions)
-
-    def _generate_in_clause(self, values: List[Any]) -> str:
-        """生成IN子句"""
-        if all(isinstance(v, (int, float)) for v in values):
-            return f"({','.join(str(v) for v in values)})"
-        return f"""({','.join(f"'{str(v)}'" for v in values)})"""
-
-    def get_select_sql(self) -> str:
-        """生成查询SQL语句"""
-        return f"SELECT * FROM {self.table_name} WHERE {self.get_where_clause()}"
-
-    def get_sql(self) -> str:
-        """生成操作SQL语句"""
-        if self.command_type == CommandType.DELETE:
-            return f"DELETE FROM {self.table_name} WHERE {self.get_where_clause()}"
-
-        elif self.command_type == CommandType.UPDATE:
-            if not self.update_values:
-                raise ValueError("Update values are required for UPDATE operation")
-
-            updates = []
-            for column, value in self.update_values.items():
-                formatted_value = self._format_value(column, value)
-                if formatted_value != column:  # 只有当值不等于列名时才添加更新
-                    updates.append(f"{column} = {formatted_value}")
-
-            if not updates:  # 如果没有有效的更新，抛出异常
-                raise ValueError("No valid update values provided")
-
-            return f"UPDATE {self.table_name} SET {', '.join(updates)} WHERE {self.get_where_clause()}"
-
-        raise ValueError(f"Unsupported command type: {self.command_type}")
-
     def get_backup_table_name(self) -> str:
         """获取备份表名"""
         return f"{self.table_name}_bak"
 
+    def _get_effective_updates(self) -> Dict[str, Any]:
+        """获取实际生效的更新值（忽略只有 '+' 的追加）"""
+        return {
+            column: value
+            for column, value in (self.update_values or {}).items()
+            if not (isinstance(value, str) and value == "+")
+        }
+
+    def get_shape(self) -> OperationShape:
+        """获取操作形状"""
+        updates = self._get_effective_updates()
+        update_columns = tuple(sorted(updates))
+        condition_columns = tuple(sorted(self.conditions))
+        return OperationShape(
+            table_name=self.table_name,
+            command_type=self.command_type,
+            condition_columns=condition_columns,
+            update_columns=update_columns,
+            append_columns=tuple(
+                column
+                for column in update_columns
+                if isinstance(updates[column], str) and updates[column].startswith("+")
+            ),
+            date_columns=tuple(
+                column
+                for column in condition_columns + update_columns
+                if column in self.table_config.date_columns
+            ),
+        )
+
+    def get_condition_binds(self) -> Tuple[Any, ...]:
+        """获取条件列的绑定值（按形状中的列顺序）"""
+        return tuple(
+            to_bind_value(self.conditions[column]) for column in sorted(self.conditions)
+        )
+
+    def get_bind_values(self) -> Tuple[Any, ...]:
+        """获取参数化SQL的绑定值：先更新列，后条件列"""
+        updates = self._get_effective_updates()
+        values = []
+        for column in sorted(updates):
+            value = updates[column]
+            if isinstance(value, str) and value.startswith("+"):
+                value = value[1:]
+            values.append(to_bind_value(value))
+        return tuple(values) + self.get_condition_binds()
+
 
 @dataclass
 class YAMLOperation:
@@ -0,0 +1,211 @@
+import queue
+import threading
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from rich.console import Console
+from .database import DatabaseManager
+from .models import SQLOperation, to_bind_value
+
+console = Console()
+
+# 并行任务：(任务名称, 在工作会话上执行的函数)
+ParallelTask = Tuple[str, Callable[[DatabaseManager], Any]]
+# 两阶段提交的事务标识格式
+XID_FORMAT_ID = 0x4353
+
+
+def key_bucket(value: Any, n_buckets: int) -> int:
+    """主键值所在的哈希桶（与进程无关的稳定哈希，整数值的浮点形式视为同一键）"""
+    value = to_bind_value(value)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return zlib.crc32(str(value).encode("utf-8")) % n_buckets
+
+
+def partition_by_key(
+    operations: List[SQLOperation], n_buckets: int
+) -> Optional[List[List[SQLOperation]]]:
+    """将同一张表的操作按主键哈希划分为互不相交的桶
+
+    每个操作的条件必须包含主键，使其最多影响主键值所在桶的一行；存在
+    不含主键条件或更新主键的操作时无法保证各桶互不相交，返回 None。
+    桶内保持原有顺序，空桶被丢弃。
+    """
+    buckets: List[List[SQLOperation]] = [[] for _ in range(n_buckets)]
+    for operation in operations:
+        primary_key = operation.table_config.primary_key
+        if primary_key not in operation.conditions or primary_key in (
+            operation.update_values or {}
+        ):
+            return None
+        buckets[key_bucket(operation.conditions[primary_key], n_buckets)].append(
+            operation
+        )
+    return [bucket for bucket in buckets if bucket]
+
+
+class ParallelExecutor:
+    """并行执行器
+
+    每个工作线程从连接池获取独立会话，依次领取任务执行。各会话是同一个
+    分布式事务的分支：所有任务成功后以两阶段提交统一提交全部会话，任一任务
+    失败或任一会话准备提交失败则回滚全部会话。
+    """
+
+    def __init__(self, db_manager: DatabaseManager, workers: int):
+        self.db_manager = db_manager
+        self.workers = workers
+
+    def run(self, tasks: List[ParallelTask]) -> None:
+        """并行执行任务并协调提交"""
+        if not tasks:
+            return
+
+        n_workers = min(self.workers, len(tasks))
+        self._check_pool(n_workers)
+
+        task_queue: "queue.Queue[ParallelTask]" = queue.Queue()
+        for task in tasks:
+            task_queue.put(task)
+
+        failed = threading.Event()
+        errors: List[Tuple[str, BaseException]] = []
+        completed: Dict[int, List[str]] = {}
+
+        with ExitStack() as stack:
+            sessions = [
+                stack.enter_context(self.db_manager.worker()) for _ in range(n_workers)
+            ]
+            global_id = uuid.uuid4().hex
+            for i, session in enumerate(sessions):
+                self.db_manager.backend.tpc_begin(
+                    session.connection, (XID_FORMAT_ID, global_id, str(i + 1))
+                )
+            console.print(
+                f"[cyan]Running {len(tasks)} tasks on {n_workers} workers...[/cyan]"
+            )
+
+            with ThreadPoolExecutor(max_workers=n_workers) as executor:
+                futures = [
+                    executor.submit(
+                        self._drain,
+                        session,
+                        task_queue,
+                        failed,
+                        errors,
+                        completed.setdefault(i, []),
+                    )
+                    for i, session in enumerate(sessions)
+                ]
+                for future in futures:
+                    future.result()
+
+            if errors:
+                self._rollback_all(sessions)
+                names = ", ".join(name for name, _ in errors)
+                raise RuntimeError(
+                    f"Parallel execution failed for: {names}; all workers rolled back"
+                ) from errors[0][1]
+
+            self._commit_all(sessions, completed, global_id)
+
+    def _check_pool(self, n_workers: int) -> None:
+        """检查连接池是否足够容纳主连接和全部工作会话"""
+        if not self.db_manager.backend.supports_parallel:
+            raise ValueError(
+                f"Parallel execution is not supported by "
+                f"{self.db_manager.backend.name} backend"
+            )
+        pool_config = self.db_manager.config.pool
+        if not self.db_manager.pool_enabled or pool_config is None:
+            raise ValueError(
+                "Parallel execution requires a connection pool, "
+                "configure 'pool' for this database"
+            )
+        if pool_config.max < n_workers + 1:
+            raise ValueError(
+                f"Connection pool max ({pool_config.max}) must be at least "
+                f"workers + 1 ({n_workers + 1})"
+            )
+
+    @staticmethod
+    def _drain(
+        session: DatabaseManager,
+        task_queue: "queue.Queue[ParallelTask]",
+        failed: threading.Event,
+        errors: List[Tuple[str, BaseException]],
+        completed: List[str],
+    ) -> None:
+        """工作线程：在自己的会话上依次执行任务，任一任务失败后停止领取"""
+        while not failed.is_set():
+            try:
+                name, func = task_queue.get_nowait()
+            except queue.Empty:
+                return
+
+            try:
+                func(session)
+                completed.append(name)
+            except Exception as e:
+                console.print(f"[red]Worker task {name} failed: {str(e)}[/red]")
+                errors.append((name, e))
+                failed.set()
+
+    @staticmethod
+    def _rollback_all(sessions: List[DatabaseManager]) -> None:
+        """回滚全部会话"""
+        for session in sessions:
+            try:
+                session.connection.rollback()
+            except Exception as e:
+                console.print(
+                    f"[yellow]Warning: Error rolling back worker: {e}[/yellow]"
+                )
+
+    def _commit_all(
+        self,
+        sessions: List[DatabaseManager],
+        completed: Dict[int, List[str]],
+        global_id: str,
+    ) -> None:
+        """以两阶段提交统一提交全部会话
+
+        先准备全部分支，任一分支准备失败时回滚全部分支，不提交任何会话；
+        全部准备成功后再逐个提交。准备成功后的提交失败使该分支处于未决
+        状态（需在数据库中按全局事务标识处理），此时报告失败而不是成功。
+        """
+        backend = self.db_manager.backend
+        prepared: List[int] = []
+        for i, session in enumerate(sessions):
+            try:
+                if backend.tpc_prepare(session.connection):
+                    prepared.append(i)
+            except Exception as e:
+                self._rollback_all(sessions)
+                raise RuntimeError(
+                    f"Prepare failed for worker {i + 1}: {e}; all workers rolled back"
+                ) from e
+
+        in_doubt: List[Tuple[int, Exception]] = []
+        for i in prepared:
+            try:
+                backend.tpc_commit(sessions[i].connection)
+            except Exception as e:
+                console.print(f"[red]Commit failed for worker {i + 1}: {e}[/red]")
+                in_doubt.append((i, e))
+        if in_doubt:
+            tasks = [name for i, _ in in_doubt for name in completed[i]]
+            raise RuntimeError(
+                f"Commit failed for {len(in_doubt)} of {len(prepared)} prepared "
+                f"workers; tasks {', '.join(tasks) or 'none'} are in doubt in "
+                f"global transaction {global_id} and must be resolved in the database"
+            ) from in_doubt[0][1]
+
+        committed = [name for i in range(len(sessions)) for name in completed[i]]
+        console.print(
+            f"[green]Committed {len(sessions)} worker sessions "
+            f"({', '.join(committed)})[/green]"
+        )
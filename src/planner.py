@@ -0,0 +1,259 @@
+import math
+from typing import Any, Dict, Iterable, List, Set, Tuple
+from rich.console import Console
+from rich.table import Table
+from .database import DatabaseManager
+from .models import (
+    CommandType,
+    OperationShape,
+    SQLOperation,
+    StatementEstimate,
+    to_bind_value,
+)
+from .staging import StagingExecutor
+
+console = Console()
+
+
+class DryRunPlanner:
+    """试运行规划器
+
+    按形状汇总输入文件中的操作，编译每个形状实际执行时使用的SQL，
+    对每条SQL用一个代表性的操作获取执行计划，再按执行次数推算总代价。
+    只获取执行计划，不执行任何 DML。
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        batch_size: int = 1000,
+        backup_enabled: bool = True,
+        execution_mode: str = "batch",
+    ):
+        self.db_manager = db_manager
+        self.batch_size = batch_size
+        self.backup_enabled = backup_enabled
+        self.execution_mode = execution_mode
+        self.profiler = db_manager.profiler
+
+    def summarize(
+        self, operations: Iterable[SQLOperation]
+    ) -> Dict[OperationShape, Tuple[SQLOperation, int, bool]]:
+        """按形状统计操作数，保留每个形状的第一个操作作为代表
+
+        暂存表模式下同时记录形状内是否有重复的条件键（决定能否走暂存表路径）。
+        """
+        shapes: Dict[OperationShape, Tuple[SQLOperation, int, bool]] = {}
+        keys: Dict[OperationShape, Set[tuple]] = {}
+        staging = self.execution_mode == "staging"
+        for operation in operations:
+            shape = operation.get_shape()
+            first, count, repeated = shapes.get(shape, (operation, 0, False))
+            if staging:
+                key = operation.get_condition_binds()
+                shape_keys = keys.setdefault(shape, set())
+                repeated = repeated or key in shape_keys
+                shape_keys.add(key)
+            shapes[shape] = (first, count + 1, repeated)
+        return shapes
+
+    @staticmethod
+    def _chunks(n_operations: int, batch_size: int, chunk_size: int) -> int:
+        """按 batch_size 分批、每批再按 chunk_size 分块后的总块数"""
+        full, rest = divmod(n_operations, batch_size)
+        return full * math.ceil(batch_size / chunk_size) + math.ceil(rest / chunk_size)
+
+    def estimate_shape(
+        self,
+        shape: OperationShape,
+        representative: SQLOperation,
+        n_operations: int,
+        repeated_keys: bool = False,
+    ) -> List[StatementEstimate]:
+        """获取一个形状的各条语句的执行计划
+
+        使用执行器实际选择的语句：暂存表模式下能走暂存表路径的形状为每个
+        操作写入暂存表一次，计数、未匹配计数、备份和一条集合语句各一次；其他形状为
+        DELETE：每个IN列表块一次变更前查询、一次备份和一次带 RETURNING 的删除；
+        UPDATE：每个批次按IN列表块查询变更前数据并备份，每个操作执行一次
+        带 RETURNING 的更新。
+        执行次数按操作数推算（不扣除重复的条件键，按每个键匹配一行估算备份）。
+        """
+        if self.execution_mode == "staging" and (
+            StagingExecutor.can_stage_shape(shape)
+            and (shape.command_type == CommandType.DELETE or not repeated_keys)
+        ):
+            statements = self._staged_statements(shape, representative, n_operations)
+        else:
+            statements = self._batch_statements(shape, representative, n_operations)
+
+        estimates = []
+        with self.profiler.scope(shape.table_name, shape.command_type.value):
+            for statement, sql, params, executions in statements:
+                estimates.append(
+                    StatementEstimate(
+                        shape=shape,
+                        statement=statement,
+                        sql=sql,
+                        executions=executions,
+                        steps=self.db_manager.explain(sql, params),
+                    )
+                )
+        return estimates
+
+    def _backup_enabled(self, representative: SQLOperation) -> bool:
+        return self.backup_enabled and representative.table_config.backup_enabled
+
+    def _batch_statements(
+        self, shape: OperationShape, representative: SQLOperation, n_operations: int
+    ) -> List[Tuple[str, str, List[Any], int]]:
+        """逐行（IN列表）模式的语句：(语句, SQL, 代表性绑定值, 执行次数)"""
+        dialect = self.db_manager.dialect
+        compiler = self.db_manager.compiler
+        chunk_size = shape.get_key_chunk_size(dialect)
+        # 执行器从变更前数据的结果集中取列名，结果集列名为小写（见 fetch_chunks）
+        pk_column = representative.table_config.primary_key.lower()
+        batch_size = (
+            chunk_size if shape.command_type == CommandType.DELETE else self.batch_size
+        )
+
+        n_keys = shape.get_padded_size(
+            min(n_operations, batch_size, chunk_size), dialect
+        )
+        key_params = list(representative.get_condition_binds()) * n_keys
+        statements = [
+            (
+                "select",
+                compiler.select(shape, n_keys),
+                key_params,
+                self._chunks(n_operations, batch_size, chunk_size),
+            )
+        ]
+
+        if self._backup_enabled(representative):
+            key_shape = shape.key_shape([pk_column])
+            key_chunk_size = key_shape.get_key_chunk_size(dialect)
+            n_backup_keys = key_shape.get_padded_size(
+                min(n_operations, batch_size, key_chunk_size), dialect
+            )
+            pk_value = to_bind_value(
+                representative.conditions.get(representative.table_config.primary_key)
+            )
+            statements.append(
+                (
+                    "backup",
+                    compiler.backup(key_shape, n_backup_keys),
+                    [pk_value] * n_backup_keys,
+                    self._chunks(n_operations, batch_size, key_chunk_size),
+                )
+            )
+
+        if shape.command_type == CommandType.DELETE:
+            statements.append(
+                (
+                    "delete",
+                    compiler.delete(shape, n_keys, returning=[pk_column]),
+                    key_params,
+                    math.ceil(n_operations / chunk_size),
+                )
+            )
+        else:
+            returning = [pk_column] + [
+                column.lower() for column in shape.update_columns
+            ]
+            statements.append(
+                (
+                    "update",
+                    compiler.update(shape, returning),
+                    list(representative.get_bind_values()),
+                    n_operations,
+                )
+            )
+        return statements
+
+    def _staged_statements(
+        self, shape: OperationShape, representative: SQLOperation, n_operations: int
+    ) -> List[Tuple[str, str, List[Any], int]]:
+        """暂存表模式的语句：(语句, SQL, 代表性绑定值, 执行次数)"""
+        compiler = self.db_manager.compiler
+        command = shape.command_type.value
+        if shape.command_type == CommandType.DELETE:
+            insert_params = list(representative.get_condition_binds())
+        else:
+            insert_params = list(representative.get_bind_values())
+
+        statements = [
+            ("stage", compiler.staged(shape, "insert"), insert_params, n_operations),
+            ("count", compiler.staged(shape, "count"), [], 1),
+            ("unmatched", compiler.staged(shape, "unmatched"), [], 1),
+        ]
+        if self._backup_enabled(representative):
+            statements.append(("backup", compiler.staged(shape, "backup"), [], 1))
+        statements.append((command, compiler.staged(shape, command), [], 1))
+        return statements
+
+    def plan(self, operations: Iterable[SQLOperation]) -> List[StatementEstimate]:
+        """汇总全部操作并估算每个形状的代价"""
+        estimates = []
+        for shape, (representative, count, repeated) in self.summarize(
+            operations
+        ).items():
+            estimates.extend(
+                self.estimate_shape(shape, representative, count, repeated)
+            )
+        return estimates
+
+    @staticmethod
+    def display(estimates: List[StatementEstimate]) -> None:
+        """显示估算结果、全表扫描警告和预计总工作量"""
+        table = Table(title="Dry-run Plan")
+        table.add_column("Table", style="cyan")
+        table.add_column("Command")
+        table.add_column("Conditions")
+        table.add_column("Statement")
+        table.add_column("Executions", justify="right")
+        table.add_column("Cost", justify="right")
+        table.add_column("Rows", justify="right")
+        table.add_column("Projected cost", justify="right", style="green")
+        table.add_column("Full scans", style="red")
+
+        for estimate in estimates:
+            shape = estimate.shape
+            table.add_row(
+                shape.table_name,
+                shape.command_type.value,
+                ", ".join(shape.condition_columns),
+                estimate.statement,
+                f"{estimate.executions:,}",
+                f"{estimate.cost:,.0f}" if estimate.cost is not None else "-",
+                (
+                    f"{estimate.cardinality:,}"
+                    if estimate.cardinality is not None
+                    else "-"
+                ),
+                (
+                    f"{estimate.projected_cost:,.0f}"
+                    if estimate.projected_cost is not None
+                    else "-"
+                ),
+                ", ".join(estimate.full_scans) or "-",
+            )
+        console.print(table)
+
+        for estimate in estimates:
+            if estimate.full_scans:
+                console.print(
+                    f"[red bold]Warning: {estimate.statement} on "
+                    f"{estimate.shape.table_name} performs a full scan of "
+                    f"{', '.join(estimate.full_scans)} "
+                    f"({estimate.executions:,} executions)[/red bold]"
+                )
+                console.print(f"  {estimate.sql}")
+
+        costs = [e.projected_cost for e in estimates if e.projected_cost is not None]
+        console.print(
+            f"[bold]Projected work: {sum(e.executions for e in estimates):,} "
+            f"statement executions"
+            + (f", total cost {sum(costs):,.0f}" if costs else "")
+            + "[/bold]"
+        )
@@ -0,0 +1,167 @@
+from typing import Iterable, List, Optional
+import numpy as np
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+from .models import ShapePlan
+
+console = Console()
+
+# 预览模式：前 N 行、后 N 行、随机抽样 N 行
+PREVIEW_MODES = ("head", "tail", "sample")
+
+
+class PreviewRenderer:
+    """受限的数据预览
+
+    最多显示 max_rows 行（按 head / tail / sample 方式选取），并附带各列的
+    统计信息（非空行数、不同值个数、数值和日期列的最小值和最大值），
+    渲染耗时与受影响的行数基本无关。只在实际显示时才选取行和计算统计。
+    """
+
+    def __init__(self, max_rows: int = 20, mode: str = "head", seed: int = 0):
+        if max_rows < 1:
+            raise ValueError("Preview max rows must be at least 1")
+        if mode not in PREVIEW_MODES:
+            raise ValueError(
+                f"Invalid preview mode: {mode}, expected one of {PREVIEW_MODES}"
+            )
+        self.max_rows = max_rows
+        self.mode = mode
+        self.seed = seed
+
+    def select(self, df: pd.DataFrame) -> pd.DataFrame:
+        """选取要显示的行"""
+        if len(df) <= self.max_rows:
+            return df
+        if self.mode == "tail":
+            return df.tail(self.max_rows)
+        if self.mode == "sample":
+            return df.sample(n=self.max_rows, random_state=self.seed).sort_index()
+        return df.head(self.max_rows)
+
+    def select_chunks(self, chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        """从分块的查询结果中选取要显示的行
+
+        内存中最多保留 max_rows 行：head 方式取满即停止读取，tail 方式保留
+        最后的行，sample 方式为每行生成随机键并保留键最小的行（均匀抽样）。
+        行索引为其在结果集中的位置。
+        """
+        rng = np.random.default_rng(self.seed)
+        kept: Optional[pd.DataFrame] = None
+        keys = pd.Series(dtype=float)
+        offset = 0
+        for chunk in chunks:
+            chunk = chunk.set_axis(range(offset, offset + len(chunk)))
+            offset += len(chunk)
+            kept = chunk if kept is None else pd.concat([kept, chunk])
+            if self.mode == "head":
+                if len(kept) >= self.max_rows:
+                    break
+            elif self.mode == "tail":
+                kept = kept.tail(self.max_rows)
+            else:
+                chunk_keys = pd.Series(rng.random(len(chunk)), index=chunk.index)
+                keys = pd.concat([keys, chunk_keys]).nsmallest(self.max_rows)
+                kept = kept.loc[keys.index.sort_values()]
+        if kept is None:
+            return pd.DataFrame()
+        return kept.head(self.max_rows)
+
+    @staticmethod
+    def statistics(df: pd.DataFrame) -> Table:
+        """各列的统计信息"""
+        table = Table(title=f"{len(df):,} rows")
+        table.add_column("Column", style="cyan")
+        table.add_column("Non-null", justify="right")
+        table.add_column("Distinct", justify="right")
+        table.add_column("Min", justify="right")
+        table.add_column("Max", justify="right")
+
+        for column in df.columns:
+            series = df[column]
+            low: Optional[str] = ""
+            high: Optional[str] = ""
+            if pd.api.types.is_numeric_dtype(
+                series
+            ) or pd.api.types.is_datetime64_any_dtype(series):
+                if series.notna().any():
+                    low, high = str(series.min()), str(series.max())
+            table.add_row(
+                str(column),
+                f"{series.notna().sum():,}",
+                f"{series.nunique():,}",
+                low,
+                high,
+            )
+        return table
+
+    def render(self, df: pd.DataFrame, title: str, total: Optional[int] = None) -> None:
+        """显示数据预览
+
+        total 为结果集的总行数，df 只是其中已选取的行时，只显示这些行，
+        不计算统计信息。
+        """
+        console.print(f"\n[bold cyan]{title}:[/bold cyan]")
+        total = len(df) if total is None else total
+        shown = self.select(df)
+        console.print(shown.to_string())
+        if len(shown) < total:
+            console.print(
+                f"[dim]Showing {len(shown):,} of {total:,} rows ({self.mode})[/dim]"
+            )
+            if len(df) == total:
+                console.print(self.statistics(df))
+
+    @staticmethod
+    def render_plan(plans: List[ShapePlan]) -> None:
+        """显示执行计划：每个形状一行影响汇总"""
+        table = Table(title="Execution Plan")
+        table.add_column("Table", style="cyan")
+        table.add_column("Command")
+        table.add_column("Conditions")
+        table.add_column("Columns changed")
+        table.add_column("Operations", justify="right")
+        table.add_column("Rows matched", justify="right", style="green")
+
+        for plan in plans:
+            shape = plan.shape
+            changed = [
+                f"{column} (append)" if column in shape.append_columns else column
+                for column in shape.update_columns
+            ]
+            table.add_row(
+                shape.table_name,
+                shape.command_type.value,
+                ", ".join(shape.condition_columns),
+                ", ".join(changed) or "-",
+                f"{plan.operations:,}",
+                f"{plan.matched_rows:,}",
+            )
+
+        table.add_row(
+            "[bold]Total[/bold]",
+            "",
+            "",
+            "",
+            f"{sum(plan.operations for plan in plans):,}",
+            f"{sum(plan.matched_rows for plan in plans):,}",
+        )
+        console.print(table)
+
+    def render_changes(self, changes: pd.DataFrame, primary_key: str) -> None:
+        """显示数据变化，超过上限时附带按列汇总的变化数"""
+        shown = self.select(changes)
+        for change in shown.itertuples(index=False):
+            console.print(
+                f"{primary_key} {change[0]} column {change.column}: "
+                f"[red]{change.old}[/red] → [green]{change.new}[/green]"
+            )
+        if len(shown) < len(changes):
+            summary = changes.groupby("column", sort=True).size()
+            console.print(
+                f"[dim]Showing {len(shown):,} of {len(changes):,} changes "
+                f"({self.mode}); changes per column: "
+                + ", ".join(f"{col}={n:,}" for col, n in summary.items())
+                + "[/dim]"
+            )
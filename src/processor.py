@@ -1,308 +1,739 @@
-from typing import List, Dict, Set, Tuple, Any
+from typing import List, Dict, Tuple, Any, Iterator, Mapping, Optional, Callable
 import pandas as pd
 from rich.console import Console
 from rich.panel import Panel
-import click
-from .models import UnmatchedData, SQLOperation, CommandType, TableConfig
+from .models import (
+    UnmatchedData,
+    SQLOperation,
+    CommandType,
+    TableConfig,
+    OperationShape,
+    ShapePlan,
+)
 from .database import DatabaseManager
+from .batch import BatchExecutor, ShapeAccumulator
+from .checkpoint import CheckpointJournal
+from .coalesce import OperationCoalescer
+from .rejects import RejectFile
+from .staging import StagingExecutor
+from .schema import SchemaCache
+from .validation import DataValidator
+from .parallel import ParallelExecutor, partition_by_key
+from .preview import PreviewRenderer
 from pathlib import Path
 
 console = Console()
 
+# 流式读取时用于估算每行内存的采样行数
+STREAM_SAMPLE_ROWS = 1000
+# 解析后的操作对象相对原始CSV行的内存放大系数（粗略估计）
+OPERATION_MEMORY_FACTOR = 4
+# 失败隔离时每个批次使用的保存点名称
+BATCH_SAVEPOINT = "csvp_batch"
+# 确认方式：batch 每个批次确认一次；plan 先规划并汇总影响，整体确认一次
+CONFIRMATION_MODES = ("batch", "plan")
+# 并行划分方式：table 每张表一个任务；key 将每张表按主键哈希划分为 workers 个任务
+PARALLEL_PARTITIONS = ("table", "key")
+# 执行方式：batch 按形状批量执行参数化语句；staging 写入暂存表后用集合语句应用
+EXECUTION_MODES = ("batch", "staging")
+
 
 class DataProcessor:
     """数据处理类"""
 
     def __init__(self, db_manager: DatabaseManager, config: Dict[str, Any]):
         self.db_manager = db_manager
+        self.profiler = db_manager.profiler
         self.config = config
         self.tables_config = {
             name: TableConfig.from_dict(cfg)
             for name, cfg in config.get("tables", {}).items()
         }
+        # 启用表结构缓存时，列类型和主键以数据字典为准
+        self.schema_cache = SchemaCache.from_config(
+            config, db_manager.config, db_manager
+        )
+        if self.schema_cache is not None:
+            self.tables_config = self.schema_cache.apply(self.tables_config)
+        self.validator = DataValidator(self.tables_config)
         self.batch_size = config.get("processor", {}).get("batch_size", 1000)
         self.preview_enabled = config.get("processor", {}).get("preview_enabled", True)
+        self.preview_renderer = PreviewRenderer(
+            max_rows=config.get("processor", {}).get("preview_max_rows", 20),
+            mode=config.get("processor", {}).get("preview_mode", "head"),
+        )
         self.require_confirmation = config.get("processor", {}).get(
             "require_confirmation", True
         )
+        self.confirmation_mode = config.get("processor", {}).get(
+            "confirmation_mode", "batch"
+        )
+        if self.confirmation_mode not in CONFIRMATION_MODES:
+            raise ValueError(
+                f"Invalid confirmation mode: {self.confirmation_mode}, "
+                f"expected one of {CONFIRMATION_MODES}"
+            )
+        self.backup_enabled = config.get("processor", {}).get("backup_enabled", True)
+        self.execution_mode = config.get("processor", {}).get("execution_mode", "batch")
+        if self.execution_mode not in EXECUTION_MODES:
+            raise ValueError(
+                f"Invalid execution mode: {self.execution_mode}, "
+                f"expected one of {EXECUTION_MODES}"
+            )
+        self.streaming_enabled = config.get("processor", {}).get(
+            "streaming_enabled", False
+        )
+        self.memory_budget_mb = config.get("processor", {}).get("memory_budget_mb", 256)
+        self.workers = config.get("processor", {}).get("workers", 1)
+        self.coalesce_enabled = config.get("processor", {}).get(
+            "coalesce_enabled", False
+        )
+        if self.workers > 1 and self.streaming_enabled:
+            raise ValueError("Parallel workers cannot be combined with streaming mode")
+        self.parallel_partition = config.get("processor", {}).get(
+            "parallel_partition", "table"
+        )
+        if self.parallel_partition not in PARALLEL_PARTITIONS:
+            raise ValueError(
+                f"Invalid parallel partition: {self.parallel_partition}, "
+                f"expected one of {PARALLEL_PARTITIONS}"
+            )
+        self.commit_every = config.get("processor", {}).get("commit_every", 0)
+        self.journal_path = config.get("processor", {}).get("journal_path")
+        if self.commit_every and self.workers > 1:
+            raise ValueError(
+                "Checkpointed commits cannot be combined with parallel workers"
+            )
+        self.isolate_failures = config.get("processor", {}).get(
+            "isolate_failures", False
+        )
+        self.reject_file = config.get("processor", {}).get("reject_file")
+        if self.isolate_failures and self.workers > 1:
+            raise ValueError(
+                "Failure isolation cannot be combined with parallel workers"
+            )
+        self.journal: Optional[CheckpointJournal] = None
+        self.rejects: Optional[RejectFile] = None
+        self._batch_index = 0
+        self.batch_executor = self._create_batch_executor(db_manager)
+
+    def _create_batch_executor(
+        self, db_manager: DatabaseManager, require_confirmation: Optional[bool] = None
+    ) -> BatchExecutor:
+        """创建绑定指定会话的批量执行器"""
+        executor_class = (
+            StagingExecutor if self.execution_mode == "staging" else BatchExecutor
+        )
+        return executor_class(
+            db_manager,
+            batch_size=self.batch_size,
+            preview_enabled=self.preview_enabled,
+            require_confirmation=(
+                self.require_confirmation
+                if require_confirmation is None
+                else require_confirmation
+            ),
+            backup_enabled=self.backup_enabled,
+            change_detector=self._get_data_changes,
+            preview_renderer=self.preview_renderer,
+        )
 
-    def _prepare_operation(self, row: pd.Series) -> SQLOperation:
-        """准备SQL操作"""
-        table_name = row["table"]
-        table_config = self.tables_config.get(table_name)
-        if not table_config:
-            raise ValueError(f"Unknown table: {table_name}")
-
-        command = CommandType(row["command"].lower())
-
-        # 获取条件列（排除table、command和new_开头的列）
-        condition_cols = [
-            col
-            for col in row.index
+    @property
+    def plan_confirmation(self) -> bool:
+        """是否先规划再整体确认一次"""
+        return self.require_confirmation and self.confirmation_mode == "plan"
+
+    def _prepare_operation(self, row: Mapping[str, Any]) -> SQLOperation:
+        """准备SQL操作（数据行已由 DataValidator 校验并转换）"""
+        # 条件列为 table、command 和 new_ 开头以外的非空列
+        conditions = {
+            col: row[col]
+            for col in row.keys()
             if col not in ["table", "command"]
             and not col.startswith("new_")
             and pd.notna(row[col])
-        ]
+        }
+        new_values = {
+            col[len("new_") :]: row[col]
+            for col in row.keys()
+            if col.startswith("new_") and pd.notna(row[col])
+        }
+        return self._build_operation(
+            row["table"], row["command"], conditions, new_values
+        )
 
-        # 映射列名并构建条件字典
-        conditions = {table_config.map_column(col): row[col] for col in condition_cols}
+    def _build_operation(
+        self,
+        table_name: str,
+        command: str,
+        conditions: Mapping[str, Any],
+        new_values: Optional[Mapping[str, Any]] = None,
+        coerce: bool = False,
+    ) -> SQLOperation:
+        """由条件和更新值构建SQL操作，映射列名
+
+        coerce 为 True 时按表配置逐个转换数字和日期值，用于不经过
+        DataFrame 校验的结构化输入（如YAML）。
+        """
+        table_config = self.tables_config.get(table_name)
+        if not table_config:
+            raise ValueError(f"Unknown table: {table_name}")
+        try:
+            command_type = CommandType(str(command).lower())
+        except ValueError:
+            raise ValueError(f"Invalid command: {command}")
+
+        def mapped(values: Mapping[str, Any], update: bool) -> Dict[str, Any]:
+            result = {}
+            for column, value in values.items():
+                if value is None:
+                    continue
+                db_column = table_config.map_column(column)
+                if coerce:
+                    value = self.validator.coerce_value(
+                        table_config, db_column, value, update
+                    )
+                result[db_column] = value
+            return result
 
-        if command == CommandType.DELETE:
+        if command_type == CommandType.DELETE:
             return SQLOperation(
-                command_type=command,
+                command_type=command_type,
                 table_name=table_name,
-                conditions=conditions,
+                conditions=mapped(conditions, False),
                 table_config=table_config,
             )
 
-        elif command == CommandType.UPDATE:
-            # 获取更新列
-            update_cols = [
-                col
-                for col in row.index
-                if col.startswith("new_") and pd.notna(row[col])
-            ]
+        return SQLOperation(
+            command_type=command_type,
+            table_name=table_name,
+            conditions=mapped(conditions, False),
+            update_values=mapped(new_values or {}, True),
+            table_config=table_config,
+        )
 
-            # 映射列名并构建更新值字典
-            update_values = {
-                table_config.map_column(col.replace("new_", "")): row[col]
-                for col in update_cols
-            }
+    def process_file(self, file_path: str, resume: bool = False) -> None:
+        """处理输入文件
+
+        启用 commit_every 时每执行 N 个批次提交一次并写入断点日志；
+        resume 为 True 时跳过日志中已提交的批次。启用 isolate_failures 时
+        失败的操作写入拒绝文件，其余批次照常执行。
+        """
+        self._start_journal(file_path, resume)
+        self.rejects = None
+        if self.isolate_failures:
+            self.rejects = RejectFile(
+                self.reject_file or RejectFile.default_path(file_path), append=resume
+            )
+        if self.journal is not None and self.journal.finished:
+            console.print(
+                f"[green]All {self.journal.completed_batches} batches were already "
+                f"committed according to {self.journal.path}[/green]"
+            )
+            return
 
-            return SQLOperation(
-                command_type=command,
-                table_name=table_name,
-                conditions=conditions,
-                update_values=update_values,
-                table_config=table_config,
+        file_type = Path(file_path).suffix.lower()
+
+        try:
+            if file_type == ".yaml" or file_type == ".yml":
+                from .yaml_processor import YAMLProcessor
+
+                yaml_processor = YAMLProcessor(self)
+                yaml_processor.process_yaml(file_path)
+            elif file_type == ".csv":
+                self._process_csv(file_path)
+            else:
+                raise ValueError(f"Unsupported file type: {file_type}")
+        finally:
+            # 分段提交时只保存已提交批次的拒绝记录，未提交的批次恢复时会重新执行
+            if self.rejects is not None and self.journal is None:
+                self.rejects.flush()
+
+        if self.journal is not None:
+            self._checkpoint(finished=True)
+        if self.rejects:
+            console.print(
+                f"[red bold]{len(self.rejects)} operations were rejected, "
+                f"see {self.rejects.path}[/red bold]"
             )
 
-    def process_file(self, file_path: str) -> None:
-        """处理输入文件"""
+    def _start_journal(self, file_path: str, resume: bool) -> None:
+        """初始化断点日志"""
+        self._batch_index = 0
+        self.journal = None
+        if not self.commit_every:
+            if resume:
+                raise ValueError(
+                    "Resuming requires checkpointed commits (commit_every)"
+                )
+            return
+
+        # 批次编号取决于输入文件和分批方式，恢复时这些设置必须一致
+        self.journal = CheckpointJournal(
+            self.journal_path or CheckpointJournal.default_path(file_path),
+            file_path,
+            {
+                "batch_size": self.batch_size,
+                "streaming_enabled": self.streaming_enabled,
+                "memory_budget_mb": self.memory_budget_mb,
+                "execution_mode": self.execution_mode,
+                "coalesce_enabled": self.coalesce_enabled,
+            },
+        )
+        self.journal.start(resume)
+        if self.journal.completed_batches:
+            console.print(
+                f"[cyan]Resuming after {self.journal.completed_batches} "
+                f"committed batches[/cyan]"
+            )
+
+    def _checkpoint(self, finished: bool = False) -> None:
+        """提交当前事务并记录已完成的批次数"""
+        self.db_manager.commit()
+        if self.rejects is not None:
+            self.rejects.flush()
+        self.journal.record(self._batch_index, finished=finished)
+
+    def _batches(
+        self, operations: List[SQLOperation]
+    ) -> Iterator[Tuple[OperationShape, List[SQLOperation]]]:
+        """按形状分组并按 batch_size 切分为批次
+
+        暂存表模式下每个形状只有一个批次，由一条集合语句整体应用。
+        """
+        for shape, shape_ops in self.batch_executor.group_by_shape(operations):
+            if self.execution_mode == "staging":
+                yield shape, shape_ops
+                continue
+            for i in range(0, len(shape_ops), self.batch_size):
+                yield shape, shape_ops[i : i + self.batch_size]
+
+    def _execute_batches(
+        self,
+        executor: BatchExecutor,
+        batches: Iterator[Tuple[OperationShape, List[SQLOperation]]],
+    ) -> None:
+        """依次执行批次
+
+        启用断点日志时跳过已提交的批次，并每执行 commit_every 个批次提交一次。
+        """
+        for shape, operations in batches:
+            self._batch_index += 1
+            if self.journal is None:
+                self._execute_batch(executor, shape, operations)
+                continue
+            if self._batch_index <= self.journal.completed_batches:
+                self.profiler.count("batches_skipped")
+                continue
+            self._execute_batch(executor, shape, operations)
+            if self._batch_index % self.commit_every == 0:
+                self._checkpoint()
+
+    def _execute_batch(
+        self,
+        executor: BatchExecutor,
+        shape: OperationShape,
+        operations: List[SQLOperation],
+    ) -> int:
+        """执行一个批次，返回影响行数
+
+        启用失败隔离时批次在保存点内执行。失败后回滚到保存点，将批次二分
+        重试（不再逐批确认），直到隔离出单个失败的操作并写入拒绝文件；
+        同一批次中其余操作的结果保留。
+        """
+        if self.rejects is None:
+            return executor.execute_shape(shape, operations)
+
+        self.db_manager.savepoint(BATCH_SAVEPOINT)
+        try:
+            return executor.execute_shape(shape, operations)
+        except RuntimeError as e:
+            self.db_manager.rollback_to_savepoint(BATCH_SAVEPOINT)
+            if len(operations) == 1:
+                self.profiler.count("rejected")
+                console.print(
+                    f"[red]Rejected {shape.table_name} "
+                    f"{shape.command_type.value}: {e}[/red]"
+                )
+                self.rejects.add(operations[0], str(e))
+                return 0
+
+            console.print(
+                f"[yellow]Batch of {len(operations)} operations failed ({e}), "
+                f"retrying in halves to isolate failing rows[/yellow]"
+            )
+            retry = self._create_batch_executor(
+                self.db_manager, require_confirmation=False
+            )
+            middle = len(operations) // 2
+            return self._execute_batch(
+                retry, shape, operations[:middle]
+            ) + self._execute_batch(retry, shape, operations[middle:])
+
+    def iter_operations(self, file_path: str) -> Iterator[SQLOperation]:
+        """解析输入文件并逐个返回操作，不访问数据库
+
+        CSV 按内存预算分块读取，YAML 按批次转换。
+        """
         file_type = Path(file_path).suffix.lower()
 
         if file_type == ".yaml" or file_type == ".yml":
             from .yaml_processor import YAMLProcessor
 
-            yaml_processor = YAMLProcessor(self)
-            yaml_processor.process_yaml(file_path)
+            yield from YAMLProcessor(self).iter_operations(file_path)
         elif file_type == ".csv":
-            self._process_csv(file_path)
+            budget_bytes = self.memory_budget_mb * 1024 * 1024
+            with pd.read_csv(file_path, iterator=True) as reader:
+                for chunk, _ in self._iter_csv_chunks(reader, budget_bytes):
+                    self.profiler.count("rows_read", len(chunk))
+                    with self.profiler.phase("validate"):
+                        self._validate_dataframe(chunk)
+                    with self.profiler.phase("prepare"):
+                        operations = [
+                            self._prepare_operation(row)
+                            for row in chunk.to_dict("records")
+                        ]
+                    yield from self._coalesce(operations)
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
 
     def _process_csv(self, csv_path: str) -> None:
         """处理CSV文件"""
+        if self.streaming_enabled:
+            self._process_csv_stream(csv_path)
+            return
+
         try:
-            df = pd.read_csv(csv_path)
-            self._validate_dataframe(df)
+            with self.profiler.phase("csv_parse"):
+                df = pd.read_csv(csv_path)
+            self.profiler.count("rows_read", len(df))
+            with self.profiler.phase("validate"):
+                self._validate_dataframe(df)
+
+            if self.workers > 1:
+                with self.profiler.phase("prepare"):
+                    operations = [
+                        self._prepare_operation(row) for row in df.to_dict("records")
+                    ]
+                self._execute_parallel(self._coalesce(operations))
+                return
 
-            # 按表名和命令类型分组处理
-            for table_name in df["table"].unique():
-                df_table = df[df["table"] == table_name]
-                for command_type in CommandType:
-                    df_cmd = df_table[
-                        df_table["command"].str.lower() == command_type.value
+            groups = self._prepare_groups(df)
+            if self.plan_confirmation:
+                # 先准备全部操作，规划并确认一次后连续执行
+                self._execute_planned(
+                    [
+                        operation
+                        for _, _, operations in groups
+                        for operation in operations
                     ]
-                    if not df_cmd.empty:
-                        self._process_batch(df_cmd)
+                )
+                return
+
+            for table_name, command, operations in groups:
+                with self.profiler.scope(table_name, command):
+                    self._execute_operations(operations)
 
         except Exception as e:
             console.print(f"[red bold]Error processing CSV file: {str(e)}[/red bold]")
             raise
 
-    def _process_batch(self, df: pd.DataFrame) -> None:
-        """批量处理数据"""
-        # 如果是删除操作且条件列相同，合并为一个IN查询
-        if all(df["command"].str.lower() == "delete"):
-            # 获取第一行数据来确定表名和条件列
-            first_row = df.iloc[0]
-            table_name = first_row["table"]
-            table_config = self.tables_config[table_name]
-
-            # 获取除table和command外的条件列
-            condition_cols = [
-                col for col in df.columns if col not in ["table", "command"]
-            ]
-
-            # 检查所有行的条件列是否相同
-            if condition_cols and all(df[condition_cols].notna().all()):
-                # 获取映射后的列名
-                db_column = table_config.columns_mapping.get(
-                    condition_cols[0], condition_cols[0]
-                )
-
-                # 收集所有行的条件值
-                values = set()
-                for _, row in df.iterrows():
-                    values.add(row[condition_cols[0]])
-
-                # 创建一个合并的操作
-                operation = SQLOperation(
-                    command_type=CommandType.DELETE,
-                    table_name=table_name,
-                    conditions={db_column: list(values)},
-                    table_config=table_config,
+    def _prepare_groups(
+        self, df: pd.DataFrame
+    ) -> List[Tuple[str, str, List[SQLOperation]]]:
+        """按表名和命令类型分组准备操作
+
+        启用合并时先按文件顺序准备并合并全部操作再分组，使同一主键的
+        更新和删除能够合并。
+        """
+        if self.coalesce_enabled:
+            operations = self._coalesce(self._prepare_batch(df))
+            grouped: Dict[Tuple[str, str], List[SQLOperation]] = {}
+            for table_name in df["table"].unique():
+                for command_type in CommandType:
+                    grouped[(table_name, command_type.value)] = []
+            for operation in operations:
+                grouped[(operation.table_name, operation.command_type.value)].append(
+                    operation
                 )
-                self._execute_operation(operation)
-                return
+            return [
+                (table_name, command, group)
+                for (table_name, command), group in grouped.items()
+                if group
+            ]
 
-        # 其他情况按原方式处理
-        for i in range(0, len(df), self.batch_size):
-            batch = df.iloc[i : i + self.batch_size]
+        groups = []
+        for table_name in df["table"].unique():
+            df_table = df[df["table"] == table_name]
+            for command_type in CommandType:
+                df_cmd = df_table[df_table["command"].str.lower() == command_type.value]
+                if not df_cmd.empty:
+                    with self.profiler.scope(table_name, command_type.value):
+                        groups.append(
+                            (
+                                table_name,
+                                command_type.value,
+                                self._prepare_batch(df_cmd),
+                            )
+                        )
+        return groups
+
+    def _coalesce(self, operations: List[SQLOperation]) -> List[SQLOperation]:
+        """按主键合并操作并报告减少的操作数，未启用时原样返回"""
+        if not self.coalesce_enabled:
+            return operations
+        coalescer = OperationCoalescer()
+        with self.profiler.phase("coalesce"):
+            coalesced = coalescer.coalesce(operations)
+        if coalescer.removed:
+            self.profiler.count("coalesced", coalescer.removed)
             console.print(
-                f"\n[cyan]Processing batch {i//self.batch_size + 1}...[/cyan]"
+                f"[cyan]Coalesced {len(operations)} operations into "
+                f"{len(coalesced)} ({coalescer.removed} removed)[/cyan]"
             )
+        return coalesced
 
-            for _, row in batch.iterrows():
-                operation = self._prepare_operation(row)
-                self._execute_operation(operation)
+    def _process_csv_stream(self, csv_path: str) -> None:
+        """流式处理CSV文件
 
-    def _validate_dataframe(self, df: pd.DataFrame) -> None:
-        """验证DataFrame格式"""
-        if "command" not in df.columns:
-            raise ValueError("CSV must contain 'command' column")
+        按块读取CSV，逐行送入按形状划分的累加器，累加器达到 batch_size
+        时立即执行，内存占用受 memory_budget_mb 约束而与文件大小无关。
+        规划确认模式下先完整读取一遍文件统计影响，确认后再读取一遍执行。
+        """
+        try:
+            executor = self.batch_executor
+            if self.plan_confirmation:
+                plans: Dict[OperationShape, ShapePlan] = {}
+                for shape, operations in self._iter_stream_batches(csv_path):
+                    plan = executor.plan_shape(shape, operations)
+                    if shape in plans:
+                        plans[shape].merge(plan)
+                    else:
+                        plans[shape] = plan
+                if not executor.confirm_plan(list(plans.values())):
+                    return
+                executor = self._create_batch_executor(
+                    self.db_manager, require_confirmation=False
+                )
 
-        invalid_commands = set(df["command"]) - {cmd.value for cmd in CommandType}
-        if invalid_commands:
-            raise ValueError(f"Invalid commands found: {invalid_commands}")
+            self._execute_batches(executor, self._iter_stream_batches(csv_path))
 
-    def _execute_operation(self, operation: SQLOperation) -> None:
-        """执行操作"""
-        try:
-            # 获取受影响的数据
-            df_before = self.db_manager.fetch_data(operation.get_select_sql())
+        except Exception as e:
+            console.print(f"[red bold]Error processing CSV file: {str(e)}[/red bold]")
+            raise
 
-            if df_before.empty:
-                console.print(
-                    f"[yellow]No matching data found for conditions:[/yellow]"
-                )
-                console.print(
-                    Panel(
-                        operation.get_where_clause(),
-                        title="[bold yellow]Unmatched Conditions[/bold yellow]",
+    def _iter_stream_batches(
+        self, csv_path: str
+    ) -> Iterator[Tuple[OperationShape, List[SQLOperation]]]:
+        """流式读取CSV，按形状输出待执行的批次"""
+        budget_bytes = self.memory_budget_mb * 1024 * 1024
+        accumulator = None
+        with pd.read_csv(csv_path, iterator=True) as reader:
+            for chunk, row_bytes in self._iter_csv_chunks(reader, budget_bytes):
+                if accumulator is None:
+                    # 一半预算给原始数据块，另一半给待执行的操作
+                    max_buffered = (
+                        budget_bytes // 2 // (row_bytes * OPERATION_MEMORY_FACTOR)
                     )
-                )
+                    accumulator = ShapeAccumulator(
+                        self.batch_size, max(self.batch_size, max_buffered)
+                    )
+
+                self.profiler.count("rows_read", len(chunk))
+                with self.profiler.phase("validate"):
+                    self._validate_dataframe(chunk)
+                if self.coalesce_enabled:
+                    # 流式模式下只在每个数据块内合并，跨数据块的同一主键不合并
+                    for operation in self._coalesce(self._prepare_batch(chunk)):
+                        yield from accumulator.add(operation)
+                    continue
+                for row in chunk.to_dict("records"):
+                    with self.profiler.phase("prepare"):
+                        operation = self._prepare_operation(row)
+                    yield from accumulator.add(operation)
+
+        if accumulator is not None:
+            yield from accumulator.drain()
+
+    def _iter_csv_chunks(
+        self, reader: Any, budget_bytes: int
+    ) -> Iterator[Tuple[pd.DataFrame, int]]:
+        """按内存预算分块读取CSV，返回 (数据块, 每行估算字节数)"""
+        try:
+            with self.profiler.phase("csv_parse"):
+                sample = reader.get_chunk(STREAM_SAMPLE_ROWS)
+        except StopIteration:
+            return
+        if sample.empty:
+            return
+
+        row_bytes = max(1, int(sample.memory_usage(deep=True).sum() / len(sample)))
+        # 合并时整个数据块的操作列表与数据块同时驻留内存，按比例缩小数据块
+        factor = 1 + OPERATION_MEMORY_FACTOR if self.coalesce_enabled else 1
+        chunk_rows = max(1, budget_bytes // 2 // (row_bytes * factor))
+        yield sample, row_bytes
+
+        while True:
+            try:
+                with self.profiler.phase("csv_parse"):
+                    chunk = reader.get_chunk(chunk_rows)
+            except StopIteration:
                 return
+            yield chunk, row_bytes
+
+    def _prepare_batch(self, df: pd.DataFrame) -> List[SQLOperation]:
+        """将数据行转换为操作"""
+        with self.profiler.phase("prepare"):
+            return [self._prepare_operation(row) for row in df.to_dict("records")]
+
+    def _execute_operations(self, operations: List[SQLOperation]) -> None:
+        """执行准备好的操作"""
+        # 按形状分组后批量执行：UPDATE 使用 executemany，DELETE 使用分块IN列表
+        if self.workers > 1:
+            self._execute_parallel(operations)
+        elif self.plan_confirmation:
+            self._execute_planned(operations)
+        else:
+            self._execute_batches(self.batch_executor, self._batches(operations))
+
+    def _execute_planned(self, operations: List[SQLOperation]) -> None:
+        """规划全部操作并显示影响汇总，确认一次后不再逐批确认"""
+        if not self.batch_executor.confirm_plan(self.batch_executor.plan(operations)):
+            return
+        self._execute_batches(
+            self._create_batch_executor(self.db_manager, require_confirmation=False),
+            self._batches(operations),
+        )
 
-            # 显示数据和SQL
-            if self.preview_enabled:
-                console.print("\n[bold cyan]Affected data:[/bold cyan]")
-                console.print(df_before.to_string())
-                console.print(
-                    Panel(
-                        operation.get_sql(),
-                        title="[bold yellow]SQL to execute[/bold yellow]",
-                    )
-                )
+    def _execute_parallel(self, operations: List[SQLOperation]) -> None:
+        """按表（或按主键哈希桶）并行执行操作
+
+        每个任务在独立会话上执行，所有任务成功后统一提交，任一失败则全部回滚。
+        任务内保持与串行模式相同的顺序（先DELETE后UPDATE）。
+        """
+        command_order = list(CommandType)
+        tables: Dict[str, List[SQLOperation]] = {}
+        for operation in sorted(
+            operations, key=lambda op: command_order.index(op.command_type)
+        ):
+            tables.setdefault(operation.table_name, []).append(operation)
+
+        tasks = [
+            (name, task_ops)
+            for table_name, table_ops in tables.items()
+            for name, task_ops in self._partition(table_name, table_ops)
+        ]
 
-            # 用户确认
-            if self.require_confirmation and not click.confirm(
-                "Do you want to proceed with this operation?"
+        # 工作线程中无法交互，执行前规划并统一确认一次
+        if self.require_confirmation:
+            console.print(
+                f"[cyan]{len(tables)} tables ({len(tasks)} tasks) will run on "
+                f"{self.workers} workers[/cyan]"
+            )
+            if not self.batch_executor.confirm_plan(
+                self.batch_executor.plan(operations)
             ):
-                console.print("[yellow]Operation cancelled by user[/yellow]")
                 return
 
-            # 获取表配置和主键列名
-            table_config = operation.table_config
-            primary_key = table_config.primary_key
+        def make_task(
+            table_ops: List[SQLOperation],
+        ) -> Callable[[DatabaseManager], int]:
+            return lambda session: self._create_batch_executor(
+                session, require_confirmation=False
+            ).execute(table_ops)
 
-            # 确保列名大小写匹配
-            pk_column = next(
-                col for col in df_before.columns if col.lower() == primary_key.lower()
-            )
-            affected_ids = df_before[pk_column].tolist()
-
-            # 执行操作
-            affected_rows = self.db_manager.execute_operation(operation)
-
-            # 使用主键查询更新后的数据
-            id_conditions = []
-            for id_val in affected_ids:
-                if isinstance(id_val, (int, float)):
-                    id_conditions.append(str(id_val))
-                else:
-                    id_conditions.append(f"'{id_val}'")
-
-            id_list = ",".join(id_conditions)
-            df_after = self.db_manager.fetch_data(
-                f"SELECT * FROM {operation.table_name} WHERE {primary_key} IN ({id_list})"
+        ParallelExecutor(self.db_manager, self.workers).run(
+            [(name, make_task(task_ops)) for name, task_ops in tasks]
+        )
+
+    def _partition(
+        self, table_name: str, operations: List[SQLOperation]
+    ) -> List[Tuple[str, List[SQLOperation]]]:
+        """将一张表的操作划分为并行任务
+
+        key 方式下按主键哈希划分为 workers 个互不相交的桶，不同会话不会
+        修改同一行；无法按主键划分时整张表作为一个任务。
+        """
+        if self.parallel_partition != "key":
+            return [(table_name, operations)]
+        buckets = partition_by_key(operations, self.workers)
+        if buckets is None:
+            console.print(
+                f"[yellow]{table_name} has operations without primary key "
+                f"conditions, running it as a single task[/yellow]"
             )
+            return [(table_name, operations)]
+        return [
+            (f"{table_name}#{i}", bucket) for i, bucket in enumerate(buckets, start=1)
+        ]
 
-            # 根据操作类型验证结果
-            if operation.command_type == CommandType.DELETE:
-                if df_after.empty:
-                    console.print(
-                        f"[green]Successfully deleted {affected_rows} rows[/green]"
-                    )
-                else:
-                    console.print(
-                        Panel(
-                            df_after.to_string(),
-                            title="[bold red]Warning: Some rows were not deleted![/bold red]",
-                        )
-                    )
-                    raise RuntimeError("Delete operation failed: Some rows still exist")
-            else:
-                if df_after.empty:
-                    console.print(
-                        "[red]Warning: Cannot find updated rows for verification[/red]"
-                    )
-                else:
-                    console.print("\n[bold cyan]Data after update:[/bold cyan]")
-                    console.print(df_after.to_string())
-
-                    # 显示数据变化
-                    changes = self._get_data_changes(df_before, df_after)
-                    if changes:
-                        console.print("\n[bold green]Changes made:[/bold green]")
-                        for change in changes:
-                            console.print(change)
-                    else:
-                        console.print(
-                            "[yellow]Warning: No changes detected in the data[/yellow]"
-                        )
+    def _validate_dataframe(self, df: pd.DataFrame) -> None:
+        """验证DataFrame格式，并就地转换数字列和日期列"""
+        self.validator.check(df)
 
+    def _execute_operation(self, operation: SQLOperation) -> None:
+        """执行单个操作（与批量路径共用按形状编译的参数化SQL和核对逻辑）"""
+        try:
+            self.batch_executor.execute([operation])
         except Exception as e:
             console.print(f"[red]Error executing operation: {str(e)}[/red]")
             raise
 
+    @staticmethod
     def _get_data_changes(
-        self, df_before: pd.DataFrame, df_after: pd.DataFrame
-    ) -> List[str]:
-        """比较更新前后的数据变化"""
-        changes = []
-
-        # 确保列名小写，便于统一处理
-        df_before.columns = df_before.columns.str.lower()
-        df_after.columns = df_after.columns.str.lower()
-
-        # 对每一行进行较
-        for idx in df_after.index:
-            if idx < len(df_before):
-                row_before = df_before.iloc[idx]
-                row_after = df_after.iloc[idx]
-
-                # 比较每一列的值
-                for col in df_after.columns:
-                    # 转换为字符串进行比较，避免数据类型不一致的问题
-                    before_val = str(row_before[col])
-                    after_val = str(row_after[col])
-                    if before_val != after_val:
-                        changes.append(
-                            f"Column {col}: "
-                            f"[red]{before_val}[/red] → "
-                            f"[green]{after_val}[/green]"
-                        )
-
-        return changes
+        df_before: pd.DataFrame, df_after: pd.DataFrame, primary_key: str
+    ) -> pd.DataFrame:
+        """比较更新前后的数据变化
+
+        按主键对齐前后数据，逐列向量化比较，返回 (主键, column, old, new)
+        格式的变化表。
+        """
+        # 列名统一小写，不修改调用方的数据
+        before = df_before.rename(columns=str.lower)
+        after = df_after.rename(columns=str.lower)
+        pk = primary_key.lower()
+
+        before = before.drop_duplicates(subset=[pk], keep="last").set_index(pk)
+        after = after.drop_duplicates(subset=[pk], keep="last").set_index(pk)
+        keys = before.index.intersection(after.index)
+        columns = [col for col in after.columns if col in before.columns]
+
+        frames = []
+        for col in columns:
+            old = before[col].reindex(keys)
+            new = after[col].reindex(keys)
+            if pd.api.types.is_numeric_dtype(old) and pd.api.types.is_numeric_dtype(
+                new
+            ):
+                old_values = old.to_numpy(dtype=float)
+                new_values = new.to_numpy(dtype=float)
+            else:
+                old_values = old.to_numpy(dtype=object)
+                new_values = new.to_numpy(dtype=object)
+
+            # 两侧同为空值不算变化
+            old_null = pd.isna(old).to_numpy()
+            new_null = pd.isna(new).to_numpy()
+            changed = (old_null != new_null) | (
+                ~old_null & ~new_null & (old_values != new_values)
+            )
+            if changed.any():
+                frames.append(
+                    pd.DataFrame(
+                        {
+                            pk: keys[changed],
+                            "column": col,
+                            "old": old[changed].to_numpy(dtype=object),
+                            "new": new[changed].to_numpy(dtype=object),
+                        }
+                    )
+                )
 
-    @staticmethod
-    def _generate_in_clause(values: Set[Any]) -> str:
-        """生成IN子句"""
-        if all(isinstance(v, (int, float)) for v in values):
-            return f"({','.join(str(v) for v in values)})"
-        return f"""({','.join(f"'{str(v)}'" for v in values)})"""
+        if not frames:
+            return pd.DataFrame(columns=[pk, "column", "old", "new"])
+        return pd.concat(frames, ignore_index=True).sort_values(
+            pk, kind="stable", ignore_index=True
+        )
 
     @staticmethod
     def _display_operation_info(df: pd.DataFrame, operation: SQLOperation) -> None:
@@ -0,0 +1,226 @@
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, ContextManager, Dict, Generator, Optional, Tuple
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+
+# 直方图桶数：上界从 1 微秒起按 2 的幂递增，最后一个桶约 71 分钟
+HISTOGRAM_BUCKETS = 33
+
+# (阶段或计数器名称, 表名, 命令类型)
+ProfileKey = Tuple[str, str, str]
+
+
+class LatencyHistogram:
+    """对数分桶的延迟直方图
+
+    只保存各桶计数，内存占用与记录次数无关；百分位数取所在桶的上界。
+    """
+
+    def __init__(self):
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    @staticmethod
+    def bucket_bound(index: int) -> float:
+        """第 index 个桶的上界（秒）"""
+        return (2**index) / 1_000_000
+
+    def record(self, seconds: float) -> None:
+        """记录一次耗时"""
+        micros = int(seconds * 1_000_000)
+        index = min(max(micros - 1, 0).bit_length(), HISTOGRAM_BUCKETS - 1)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """估算百分位数（秒）"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(self.bucket_bound(index), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为报告格式（毫秒）"""
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "min_ms": self.min * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+            "p50_ms": self.percentile(0.5) * 1000,
+            "p95_ms": self.percentile(0.95) * 1000,
+            "p99_ms": self.percentile(0.99) * 1000,
+            "histogram": {
+                f"<={self.bucket_bound(i) * 1000:g}ms": n
+                for i, n in enumerate(self.buckets)
+                if n
+            },
+        }
+
+
+class Profiler:
+    """分阶段计时和计数
+
+    按 (阶段, 表, 命令) 记录耗时直方图和计数器。表和命令由 scope() 设置，
+    按线程区分，并行工作线程互不影响。阶段嵌套时只计入最外层阶段，
+    使各阶段耗时互不重叠。未启用时所有方法均为空操作。
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.histograms: Dict[ProfileKey, LatencyHistogram] = {}
+        self.counters: Dict[ProfileKey, int] = {}
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _tags(self) -> Tuple[str, str]:
+        return getattr(self._local, "tags", ("", ""))
+
+    @contextmanager
+    def _scope(
+        self, table: Optional[str], command: Optional[str]
+    ) -> Generator[None, None, None]:
+        previous = self._tags()
+        self._local.tags = (table or previous[0], command or previous[1])
+        try:
+            yield
+        finally:
+            self._local.tags = previous
+
+    def scope(
+        self, table: Optional[str] = None, command: Optional[str] = None
+    ) -> ContextManager[None]:
+        """设置当前线程后续记录所属的表和命令"""
+        if not self.enabled:
+            return nullcontext()
+        return self._scope(table, command)
+
+    @contextmanager
+    def _phase(self, name: str) -> Generator[None, None, None]:
+        if getattr(self._local, "active", False):
+            # 已处于某个阶段中，耗时计入外层阶段
+            yield
+            return
+
+        self._local.active = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._local.active = False
+            key = (name, *self._tags())
+            with self._lock:
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = LatencyHistogram()
+                histogram.record(elapsed)
+
+    def phase(self, name: str) -> ContextManager[None]:
+        """记录一个阶段的耗时"""
+        if not self.enabled:
+            return nullcontext()
+        return self._phase(name)
+
+    def count(self, name: str, value: int = 1) -> None:
+        """累加计数器"""
+        if not self.enabled:
+            return
+        key = (name, *self._tags())
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def report(self) -> Dict[str, Any]:
+        """生成报告"""
+        wall = time.perf_counter() - self.started
+        with self._lock:
+            phases = [
+                {"phase": name, "table": table, "command": command, **h.to_dict()}
+                for (name, table, command), h in self.histograms.items()
+            ]
+            counters = [
+                {"counter": name, "table": table, "command": command, "value": value}
+                for (name, table, command), value in self.counters.items()
+            ]
+        phases.sort(key=lambda p: p["total_ms"], reverse=True)
+        counters.sort(key=lambda c: (c["counter"], c["table"], c["command"]))
+        measured = sum(p["total_ms"] for p in phases)
+        return {
+            "wall_ms": wall * 1000,
+            "unattributed_ms": max(0.0, wall * 1000 - measured),
+            "phases": phases,
+            "counters": counters,
+        }
+
+    def write_json(self, path: str) -> None:
+        """将报告写入JSON文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def display(self) -> None:
+        """显示报告"""
+        report = self.report()
+
+        table = Table(title=f"Profile (wall {report['wall_ms'] / 1000:.2f}s)")
+        table.add_column("Phase", style="cyan")
+        table.add_column("Table")
+        table.add_column("Command")
+        table.add_column("Count", justify="right")
+        table.add_column("Total (ms)", justify="right", style="green")
+        table.add_column("Mean (ms)", justify="right")
+        table.add_column("p95 (ms)", justify="right")
+        table.add_column("Max (ms)", justify="right")
+        for p in report["phases"]:
+            table.add_row(
+                p["phase"],
+                p["table"] or "-",
+                p["command"] or "-",
+                str(p["count"]),
+                f"{p['total_ms']:.1f}",
+                f"{p['mean_ms']:.2f}",
+                f"{p['p95_ms']:.2f}",
+                f"{p['max_ms']:.2f}",
+            )
+        table.add_row(
+            "(unattributed)",
+            "-",
+            "-",
+            "-",
+            f"{report['unattributed_ms']:.1f}",
+            "",
+            "",
+            "",
+        )
+        console.print(table)
+
+        if report["counters"]:
+            counters = Table(title="Counters")
+            counters.add_column("Counter", style="cyan")
+            counters.add_column("Table")
+            counters.add_column("Command")
+            counters.add_column("Value", justify="right", style="green")
+            for c in report["counters"]:
+                counters.add_row(
+                    c["counter"],
+                    c["table"] or "-",
+                    c["command"] or "-",
+                    f"{c['value']:,}",
+                )
+            console.print(counters)
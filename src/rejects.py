@@ -0,0 +1,61 @@
+import os
+from typing import Any, Dict, List
+import pandas as pd
+from .models import SQLOperation
+
+
+class RejectFile:
+    """拒绝文件
+
+    记录失败隔离时无法执行的操作及错误信息。列格式与输入CSV相同
+    （table、command、条件列、new_ 更新列），末尾附加 error 列，
+    修正后可直接作为输入文件重新处理。
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        self.rows: List[Dict[str, Any]] = []
+        self._dirty = False
+        if os.path.exists(path):
+            if append:
+                self.rows = pd.read_csv(path, dtype=str, keep_default_na=False).to_dict(
+                    "records"
+                )
+            else:
+                os.remove(path)
+
+    @staticmethod
+    def default_path(input_file: str) -> str:
+        """默认路径：输入文件旁的 <文件名>.rejects.csv"""
+        return f"{input_file}.rejects.csv"
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def add(self, operation: SQLOperation, error: str) -> None:
+        """记录一个失败的操作"""
+        row: Dict[str, Any] = {
+            "table": operation.table_name,
+            "command": operation.command_type.value,
+        }
+        row.update(operation.conditions)
+        row.update(
+            {
+                f"new_{column}": value
+                for column, value in (operation.update_values or {}).items()
+            }
+        )
+        row["error"] = error
+        self.rows.append(row)
+        self._dirty = True
+
+    def flush(self) -> None:
+        """写入文件（先写临时文件再替换）"""
+        if not self._dirty:
+            return
+        df = pd.DataFrame(self.rows)
+        df = df[[column for column in df.columns if column != "error"] + ["error"]]
+        temp_path = f"{self.path}.tmp"
+        df.to_csv(temp_path, index=False)
+        os.replace(temp_path, self.path)
+        self._dirty = False
@@ -0,0 +1,108 @@
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+from .database import DatabaseManager
+from .models import DatabaseConfig, TableConfig, TableSchema
+
+# 默认的表结构缓存文件和有效期（秒）
+DEFAULT_SCHEMA_CACHE_PATH = ".schema_cache.json"
+DEFAULT_SCHEMA_CACHE_TTL = 24 * 3600
+
+
+class SchemaCache:
+    """表结构缓存
+
+    每张表从数据字典（Oracle: ALL_TAB_COLUMNS / ALL_CONSTRAINTS，SQLite:
+    PRAGMA table_info）读取一次，按数据库分别保存到磁盘上的JSON文件，
+    超过 ttl 秒后重新读取。未连接数据库（db_manager 为 None）时只使用
+    磁盘上未过期的条目。
+    """
+
+    def __init__(
+        self,
+        config: DatabaseConfig,
+        db_manager: Optional[DatabaseManager] = None,
+        path: str = DEFAULT_SCHEMA_CACHE_PATH,
+        ttl: int = DEFAULT_SCHEMA_CACHE_TTL,
+    ):
+        self.key = self.database_key(config)
+        self.db_manager = db_manager
+        self.path = path
+        self.ttl = ttl
+        self.tables: Dict[str, Dict[str, Any]] = self._load().get(self.key, {})
+
+    @staticmethod
+    def database_key(config: DatabaseConfig) -> str:
+        """区分不同数据库的缓存键"""
+        if config.backend == "sqlite":
+            return f"sqlite:{os.path.abspath(config.database or ':memory:')}"
+        return (
+            f"{config.backend}:{config.username}@{config.host}:{config.port}"
+            f"/{config.service_name}"
+        )
+
+    def _load(self) -> Dict[str, Any]:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            # 缓存损坏时重新读取数据字典
+            return {}
+
+    def _save(self) -> None:
+        """写入磁盘（保留其他数据库的条目，先写临时文件再替换）"""
+        data = self._load()
+        data[self.key] = self.tables
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def get(self, table_name: str) -> Optional[TableSchema]:
+        """获取表结构
+
+        缓存过期或缺失时从数据字典读取；未连接数据库时返回 None。
+        """
+        entry = self.tables.get(table_name)
+        if entry is not None and time.time() - entry["fetched_at"] < self.ttl:
+            return TableSchema.from_dict(table_name, entry)
+        if self.db_manager is None:
+            return None
+
+        schema = self.db_manager.read_schema(table_name)
+        if schema is None:
+            raise ValueError(f"Table {table_name} not found in database")
+        self.tables[table_name] = {"fetched_at": time.time(), **schema.to_dict()}
+        self._save()
+        return schema
+
+    def apply(self, tables_config: Dict[str, TableConfig]) -> Dict[str, TableConfig]:
+        """用缓存的表结构替换各表手工配置的列类型和主键"""
+        applied = {}
+        for name, table_config in tables_config.items():
+            schema = self.get(name)
+            applied[name] = (
+                table_config if schema is None else table_config.with_schema(schema)
+            )
+        return applied
+
+    @classmethod
+    def from_config(
+        cls,
+        config: Dict[str, Any],
+        db_config: DatabaseConfig,
+        db_manager: Optional[DatabaseManager] = None,
+    ) -> Optional["SchemaCache"]:
+        """按处理器配置创建，未启用时返回 None"""
+        processor = config.get("processor", {})
+        if not processor.get("schema_cache_enabled", False):
+            return None
+        return cls(
+            db_config,
+            db_manager,
+            path=processor.get("schema_cache_path", DEFAULT_SCHEMA_CACHE_PATH),
+            ttl=processor.get("schema_cache_ttl", DEFAULT_SCHEMA_CACHE_TTL),
+        )
@@ -0,0 +1,118 @@
+from contextlib import closing
+from typing import List
+from rich.console import Console
+from .batch import BatchExecutor
+from .models import CommandType, OperationShape, SQLOperation
+
+console = Console()
+
+
+class StagingExecutor(BatchExecutor):
+    """暂存表模式的批量执行器
+
+    每个形状的全部操作先通过 executemany 写入暂存表 <表名>_stg（Oracle
+    中为 ON COMMIT DELETE ROWS 的全局临时表），再用一条 MERGE（SQLite:
+    UPDATE ... FROM）或一条 DELETE ... WHERE (键) IN (SELECT ...) 整体应用。
+    列映射和 '+' 追加语义与逐行模式相同。条件列与更新列重叠，或同一条件键
+    有多个更新操作时，回退到逐行模式。
+    """
+
+    def execute_shape(
+        self, shape: OperationShape, operations: List[SQLOperation]
+    ) -> int:
+        """执行同一形状的一组操作，返回影响行数"""
+        if not self.can_stage(shape, operations):
+            return super().execute_shape(shape, operations)
+
+        with self.profiler.scope(shape.table_name, shape.command_type.value):
+            self.profiler.count("operations", len(operations))
+            affected = self.execute_staged(shape, operations)
+            self.profiler.count("rows_affected", affected)
+            return affected
+
+    @staticmethod
+    def can_stage_shape(shape: OperationShape) -> bool:
+        """判断形状本身能否通过暂存表执行（条件列与更新列不重叠）"""
+        return not set(shape.condition_columns) & set(shape.update_columns)
+
+    @classmethod
+    def can_stage(cls, shape: OperationShape, operations: List[SQLOperation]) -> bool:
+        """判断形状能否通过暂存表执行"""
+        if not cls.can_stage_shape(shape):
+            return False
+        if shape.command_type == CommandType.DELETE:
+            return True
+        # 同一键的多个更新在逐行模式下依次生效，集合语句无法保证顺序
+        keys = {op.get_condition_binds() for op in operations}
+        return len(keys) == len(operations)
+
+    def execute_staged(
+        self, shape: OperationShape, operations: List[SQLOperation]
+    ) -> int:
+        """写入暂存表并用一条集合语句应用，返回影响行数"""
+        compiler = self.db_manager.compiler
+        command = shape.command_type.value
+        self.profiler.count("batches")
+
+        if shape.command_type == CommandType.DELETE:
+            # 删除只需要条件列，重复的键只写入一次
+            rows = list(dict.fromkeys(op.get_condition_binds() for op in operations))
+        else:
+            rows = [op.get_bind_values() for op in operations]
+        console.print(
+            f"\n[cyan]Staging {len(rows)} {shape.table_name} {command} rows in "
+            f"{shape.staging_table}...[/cyan]"
+        )
+
+        with self.profiler.phase("stage"):
+            self.db_manager.execute_sql(f"DELETE FROM {shape.staging_table}")
+            insert_sql = compiler.staged(shape, "insert")
+            for i in range(0, len(rows), self.batch_size):
+                self.db_manager.execute_many(insert_sql, rows[i : i + self.batch_size])
+
+        matched = int(
+            self.db_manager.fetch_data(compiler.staged(shape, "count")).iloc[0, 0]
+        )
+        unmatched = int(
+            self.db_manager.fetch_data(compiler.staged(shape, "unmatched")).iloc[0, 0]
+        )
+        if unmatched:
+            self.profiler.count("unmatched", unmatched)
+            console.print(
+                f"[yellow]No matching data found for {unmatched} staged "
+                f"{command} keys[/yellow]"
+            )
+        if matched == 0:
+            return 0
+
+        if self.preview_enabled:
+            self._display_staged_before(compiler.staged(shape, "select"), matched)
+        sql = compiler.staged(shape, command)
+        if not self._confirm_chunk(sql, command, len(rows)):
+            return 0
+
+        if self.backup_enabled and operations[0].table_config.backup_enabled:
+            with self.profiler.phase("backup"):
+                self.db_manager.execute_sql(compiler.staged(shape, "backup"))
+        affected = self.db_manager.execute_sql(sql)
+
+        if affected != matched:
+            raise RuntimeError(
+                f"Staged {command} on {shape.table_name} affected {affected} rows, "
+                f"expected {matched}"
+            )
+        console.print(
+            f"[green]Successfully {command}d {affected} rows "
+            f"({len(operations)} operations)[/green]"
+        )
+        return affected
+
+    def _display_staged_before(self, sql: str, matched: int) -> None:
+        """显示受影响的变更前数据（只读取预览行数，不加载整个结果集）"""
+        renderer = self.preview_renderer
+        with closing(
+            self.db_manager.fetch_chunks(sql, chunk_rows=renderer.max_rows)
+        ) as chunks:
+            shown = renderer.select_chunks(chunks)
+        with self.profiler.phase("render"):
+            renderer.render(shown, "Affected data", total=matched)
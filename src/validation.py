@@ -0,0 +1,328 @@
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List
+import pandas as pd
+from rich.console import Console
+from rich.table import Table
+from .models import CommandType, TableConfig, ValidationIssue
+
+console = Console()
+
+# 报告中最多显示的问题明细数
+MAX_REPORTED_ISSUES = 50
+# 校验整个文件时每次读取的CSV行数
+VALIDATE_CHUNK_ROWS = 100_000
+# 日期值格式，与 SQLDialect.date_value 的默认格式 YYYY-MM-DD 一致
+DATE_FORMAT = "%Y-%m-%d"
+RESERVED_COLUMNS = ("table", "command")
+
+
+class DataValidator:
+    """向量化的输入校验和类型转换
+
+    按表对整列检查命令、表名、条件列和更新列，并按 number_columns /
+    date_columns 将整列转换为数字和 YYYY-MM-DD 日期（就地修改）。所有问题
+    汇总为一份报告，而不是在执行中途逐行发现。行号为数据行的序号（从1开始）。
+    """
+
+    def __init__(self, tables_config: Dict[str, TableConfig]):
+        self.tables_config = tables_config
+
+    def validate(self, df: pd.DataFrame) -> List[ValidationIssue]:
+        """校验并转换数据，返回发现的问题"""
+        missing = [column for column in RESERVED_COLUMNS if column not in df.columns]
+        if missing:
+            return [
+                ValidationIssue(f"Input must contain '{column}' column")
+                for column in missing
+            ]
+
+        issues: List[ValidationIssue] = []
+        commands = df["command"].astype(str).str.lower()
+        valid_commands = commands.isin([cmd.value for cmd in CommandType])
+        issues.extend(
+            self._row_issues(df, ~valid_commands, "command", "Invalid command")
+        )
+        known_tables = df["table"].isin(list(self.tables_config))
+        issues.extend(self._row_issues(df, ~known_tables, "table", "Unknown table"))
+
+        columns = [column for column in df.columns if column not in RESERVED_COLUMNS]
+        for table_name, table_config in self.tables_config.items():
+            mask = (df["table"] == table_name) & valid_commands
+            if not mask.any():
+                continue
+            rows = df.loc[mask, columns]
+            used = [column for column in columns if rows[column].notna().any()]
+            conditions = [column for column in used if not column.startswith("new_")]
+            updates = [column for column in used if column.startswith("new_")]
+
+            no_conditions = (
+                rows[conditions].isna().all(axis=1)
+                if conditions
+                else pd.Series(True, index=rows.index)
+            )
+            issues.extend(
+                self._row_issues(
+                    df.loc[mask], no_conditions, None, "No condition columns"
+                )
+            )
+            is_update = commands[mask] == CommandType.UPDATE.value
+            no_updates = is_update & (
+                rows[updates].isna().all(axis=1) if updates else True
+            )
+            issues.extend(
+                self._row_issues(
+                    df.loc[mask], no_updates, None, "No new_ values for update"
+                )
+            )
+
+            issues.extend(self._check_mapping(rows, table_name, table_config, used))
+            for column in used:
+                db_column = table_config.map_column(column.replace("new_", "", 1))
+                if db_column in table_config.number_columns:
+                    issues.extend(self._coerce_numbers(df, mask, table_name, column))
+                elif db_column in table_config.date_columns:
+                    issues.extend(self._coerce_dates(df, mask, table_name, column))
+
+        return issues
+
+    @staticmethod
+    def _row_issues(
+        df: pd.DataFrame, bad: pd.Series, column: str, message: str
+    ) -> Iterable[ValidationIssue]:
+        """为 bad 标记的每一行生成问题"""
+        for index in bad[bad].index:
+            yield ValidationIssue(
+                message,
+                row=int(index) + 1,
+                table=str(df.at[index, "table"]),
+                column=column,
+                value=df.at[index, column] if column else None,
+            )
+
+    @staticmethod
+    def _check_mapping(
+        rows: pd.DataFrame,
+        table_name: str,
+        table_config: TableConfig,
+        used: List[str],
+    ) -> List[ValidationIssue]:
+        """检查映射冲突（同一行的两个列映射到同一表列）和未知的列
+
+        已知表结构时不存在的列为错误，否则不在表配置中的列只给出警告。
+        """
+        issues = []
+        targets: Dict[str, List[str]] = {}
+        for column in used:
+            prefix = "new_" if column.startswith("new_") else ""
+            db_column = table_config.map_column(column[len(prefix) :])
+            targets.setdefault(prefix + db_column, []).append(column)
+
+        for target, sources in targets.items():
+            if len(sources) < 2:
+                continue
+            conflict = rows[sources].notna().sum(axis=1) > 1
+            for index in conflict[conflict].index:
+                issues.append(
+                    ValidationIssue(
+                        f"Columns {', '.join(sources)} all map to {target}",
+                        row=int(index) + 1,
+                        table=table_name,
+                        column=sources[0],
+                    )
+                )
+
+        if table_config.columns:
+            for column in used:
+                db_column = table_config.map_column(column.replace("new_", "", 1))
+                if db_column not in table_config.columns:
+                    issues.append(
+                        ValidationIssue(
+                            f"Column {db_column} does not exist in {table_name}",
+                            table=table_name,
+                            column=column,
+                        )
+                    )
+            return issues
+
+        known = (
+            set(table_config.columns_mapping)
+            | set(table_config.columns_mapping.values())
+            | {table_config.primary_key}
+            | set(table_config.date_columns)
+            | set(table_config.number_columns)
+        )
+        for column in used:
+            if column.replace("new_", "", 1) not in known:
+                issues.append(
+                    ValidationIssue(
+                        "Column is not in the table configuration, used as-is",
+                        table=table_name,
+                        column=column,
+                        severity="warning",
+                    )
+                )
+        return issues
+
+    @staticmethod
+    def _values(df: pd.DataFrame, mask: pd.Series, column: str) -> pd.Series:
+        """某表在某列上需要转换的值（非空，更新列中 '+' 开头的追加值除外）"""
+        values = df.loc[mask, column].dropna()
+        if column.startswith("new_") and values.dtype == object:
+            values = values[~values.astype(str).str.startswith("+")]
+        return values
+
+    def _coerce_numbers(
+        self, df: pd.DataFrame, mask: pd.Series, table_name: str, column: str
+    ) -> List[ValidationIssue]:
+        """将数字列整列转换为数值"""
+        if pd.api.types.is_numeric_dtype(df[column]):
+            return []
+        values = self._values(df, mask, column)
+        numbers = pd.to_numeric(values, errors="coerce")
+        bad = numbers.isna()
+        if (~bad).any():
+            df[column] = df[column].astype(object)
+            df.loc[numbers.index[~bad], column] = numbers[~bad]
+        return [
+            ValidationIssue(
+                "Not a number",
+                row=int(index) + 1,
+                table=table_name,
+                column=column,
+                value=values[index],
+            )
+            for index in bad[bad].index
+        ]
+
+    def _coerce_dates(
+        self, df: pd.DataFrame, mask: pd.Series, table_name: str, column: str
+    ) -> List[ValidationIssue]:
+        """将日期列整列规范化为 YYYY-MM-DD 文本"""
+        values = self._values(df, mask, column)
+        dates = pd.to_datetime(values.astype(str), format=DATE_FORMAT, errors="coerce")
+        bad = dates.isna()
+        if (~bad).any():
+            df[column] = df[column].astype(object)
+            df.loc[dates.index[~bad], column] = dates[~bad].dt.strftime(DATE_FORMAT)
+        return [
+            ValidationIssue(
+                "Not a date (YYYY-MM-DD)",
+                row=int(index) + 1,
+                table=table_name,
+                column=column,
+                value=values[index],
+            )
+            for index in bad[bad].index
+        ]
+
+    @staticmethod
+    def coerce_value(
+        table_config: TableConfig, column: str, value: Any, update: bool = False
+    ) -> Any:
+        """按表配置转换单个值（与整列转换规则相同），无法转换时抛出 ValueError
+
+        column 为映射后的表列名；更新值中 '+' 开头的追加值不转换。
+        """
+        if update and isinstance(value, str) and value.startswith("+"):
+            return value
+        if column in table_config.number_columns:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return value
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"Not a number: {column} = {value!r}")
+            return (
+                int(number) if number.is_integer() and "." not in str(value) else number
+            )
+        if column in table_config.date_columns:
+            if isinstance(value, (date, datetime)):
+                return value.strftime(DATE_FORMAT)
+            try:
+                return datetime.strptime(str(value), DATE_FORMAT).strftime(DATE_FORMAT)
+            except ValueError:
+                raise ValueError(f"Not a date (YYYY-MM-DD): {column} = {value!r}")
+        return value
+
+    @staticmethod
+    def display(issues: List[ValidationIssue]) -> None:
+        """显示校验报告：问题明细（有上限）和按问题类型汇总的数量"""
+        table = Table(title="Validation Report")
+        table.add_column("Severity")
+        table.add_column("Row", justify="right")
+        table.add_column("Table", style="cyan")
+        table.add_column("Column")
+        table.add_column("Value")
+        table.add_column("Problem")
+        for issue in issues[:MAX_REPORTED_ISSUES]:
+            color = "red" if issue.severity == "error" else "yellow"
+            table.add_row(
+                f"[{color}]{issue.severity}[/{color}]",
+                str(issue.row) if issue.row is not None else "-",
+                issue.table or "-",
+                issue.column or "-",
+                "" if issue.value is None else repr(issue.value),
+                issue.message,
+            )
+        console.print(table)
+
+        if len(issues) > MAX_REPORTED_ISSUES:
+            counts: Dict[str, int] = {}
+            for issue in issues:
+                counts[issue.message] = counts.get(issue.message, 0) + 1
+            console.print(
+                f"[dim]Showing {MAX_REPORTED_ISSUES} of {len(issues):,} issues: "
+                + ", ".join(f"{message} x {n:,}" for message, n in counts.items())
+                + "[/dim]"
+            )
+
+    def check(self, df: pd.DataFrame) -> None:
+        """校验并转换数据，存在错误时显示报告并抛出 ValueError"""
+        self._report(self.validate(df), show_warnings=False)
+
+    def check_file(self, file_path: str) -> None:
+        """在连接数据库之前校验整个输入文件（CSV 分块读取），显示完整报告"""
+        file_type = Path(file_path).suffix.lower()
+        if file_type == ".yaml" or file_type == ".yml":
+            chunks: Iterable[pd.DataFrame] = self._yaml_chunks(file_path)
+        elif file_type == ".csv":
+            chunks = pd.read_csv(file_path, chunksize=VALIDATE_CHUNK_ROWS)
+        else:
+            raise ValueError(f"Unsupported file type: {file_type}")
+
+        issues: List[ValidationIssue] = []
+        warned = set()
+        for chunk in chunks:
+            for issue in self.validate(chunk):
+                # 列级警告每个文件只报告一次
+                if issue.severity == "warning":
+                    key = (issue.table, issue.column, issue.message)
+                    if key in warned:
+                        continue
+                    warned.add(key)
+                issues.append(issue)
+        self._report(issues, show_warnings=True)
+
+    @staticmethod
+    def _yaml_chunks(file_path: str) -> Iterator[pd.DataFrame]:
+        """流式读取YAML文件，每个批次一个数据块（行号按全文件连续编号）"""
+        from .models import YAMLBatch
+        from .yaml_processor import YAMLProcessor, YAMLStream
+
+        stream = YAMLStream(file_path, validate_header=YAMLProcessor.validate_yaml)
+        offset = 0
+        for batch in stream.batches():
+            df = YAMLProcessor.batch_frame(YAMLBatch.from_dict(batch))
+            df.index += offset
+            offset += len(df)
+            yield df
+        YAMLProcessor.validate_yaml(stream.data())
+
+    def _report(self, issues: List[ValidationIssue], show_warnings: bool) -> None:
+        """显示报告，存在错误时抛出 ValueError"""
+        errors = [issue for issue in issues if issue.severity == "error"]
+        if errors or (issues and show_warnings):
+            self.display(issues)
+        if errors:
+            raise ValueError(f"Input validation failed with {len(errors)} errors")
@@ -1,29 +1,212 @@
 import yaml
-from typing import List, Dict, Any
+from contextlib import contextmanager
+from typing import List, Dict, Any, Callable, Generator, Iterator, Optional
 import pandas as pd
 from pathlib import Path
 from rich.console import Console
-from .models import YAMLOperation, YAMLBatch
+from .models import YAMLOperation, YAMLBatch, SQLOperation
+
+# 优先使用 libyaml 的C加载器，未编译 libyaml 时使用纯Python加载器
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
 
 console = Console()
 
 
+class YAMLStream:
+    """流式YAML读取器
+
+    按解析事件读取文件，顶层字段（version、description 等）保存在 header
+    中，batches 列表不整体构造，每个批次单独构造后返回，处理完即可释放。
+    给定 validate_header 时，在返回第一个批次之前用全部顶层字段校验：
+    batches 之后还有顶层字段（如 yaml.dump 按键排序输出的文件）时，先只按
+    解析事件扫描一遍顶层字段。
+    """
+
+    def __init__(
+        self,
+        yaml_path: str,
+        validate_header: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.yaml_path = yaml_path
+        self.validate_header = validate_header
+        self.header: Dict[str, Any] = {}
+        self.batch_count = 0
+        self._batches_streamed = False
+        self._anchors: Dict[str, yaml.Node] = {}
+
+    def batches(self) -> Iterator[Dict[str, Any]]:
+        """依次返回 batches 列表中的每个批次"""
+        self.header = {}
+        self.batch_count = 0
+        self._batches_streamed = False
+        self._anchors = {}
+        with self._loader() as loader:
+            yield from self._read(loader)
+
+    def scan_header(self) -> Dict[str, Any]:
+        """只按解析事件扫描顶层字段，不构造 batches 等集合
+
+        集合类型的值替换为空列表或空字典，只用于类型校验。
+        """
+        with self._loader() as loader:
+            return self._scan(loader)
+
+    @contextmanager
+    def _loader(self) -> Generator[Any, None, None]:
+        with open(self.yaml_path, "r", encoding="utf-8") as f:
+            loader = SafeLoader(f)
+            try:
+                yield loader
+            except yaml.YAMLError as e:
+                console.print(f"[red]Error parsing YAML file: {e}[/red]")
+                raise
+            finally:
+                loader.dispose()
+
+    def data(self) -> Dict[str, Any]:
+        """读取完全部批次后的顶层字段（已流式处理的 batches 替换为空列表）"""
+        data = dict(self.header)
+        if self._batches_streamed:
+            data["batches"] = []
+        return data
+
+    @staticmethod
+    def _start(loader: Any) -> None:
+        """读取到顶层映射的第一个键之前"""
+        loader.get_event()
+        if loader.check_event(yaml.StreamEndEvent):
+            raise ValueError("YAML file is empty")
+        loader.get_event()
+        if not loader.check_event(yaml.MappingStartEvent):
+            raise ValueError("YAML document must be a mapping")
+        loader.get_event()
+
+    def _scan(self, loader: Any) -> Dict[str, Any]:
+        header: Dict[str, Any] = {}
+        self._start(loader)
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = loader.construct_document(self._compose(loader))
+            if loader.check_event(yaml.SequenceStartEvent, yaml.MappingStartEvent):
+                header[key] = [] if loader.check_event(yaml.SequenceStartEvent) else {}
+                depth = 0
+                while True:
+                    event = loader.get_event()
+                    if isinstance(
+                        event, (yaml.SequenceStartEvent, yaml.MappingStartEvent)
+                    ):
+                        depth += 1
+                    elif isinstance(
+                        event, (yaml.SequenceEndEvent, yaml.MappingEndEvent)
+                    ):
+                        depth -= 1
+                    if depth == 0:
+                        break
+            elif loader.check_event(yaml.AliasEvent):
+                loader.get_event()
+                header[key] = None
+            else:
+                header[key] = loader.construct_document(self._compose(loader))
+        return header
+
+    def _check_header(self) -> None:
+        """在返回第一个批次之前校验顶层字段"""
+        if self.validate_header is None:
+            return
+        try:
+            self.validate_header({**self.header, "batches": []})
+        except ValueError:
+            # 缺少的字段可能位于 batches 之后
+            self.validate_header(self.scan_header())
+
+    def _read(self, loader: Any) -> Iterator[Dict[str, Any]]:
+        self._start(loader)
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = loader.construct_document(self._compose(loader))
+            if key == "batches" and loader.check_event(yaml.SequenceStartEvent):
+                self._check_header()
+                loader.get_event()
+                self._batches_streamed = True
+                while not loader.check_event(yaml.SequenceEndEvent):
+                    self.batch_count += 1
+                    yield loader.construct_document(self._compose(loader))
+                loader.get_event()
+            else:
+                self.header[key] = loader.construct_document(self._compose(loader))
+
+    def _compose(self, loader: Any) -> yaml.Node:
+        """由解析事件组成一个节点（与 yaml.composer.Composer 相同的规则）"""
+        event = loader.get_event()
+        if isinstance(event, yaml.AliasEvent):
+            if event.anchor not in self._anchors:
+                raise yaml.composer.ComposerError(
+                    None,
+                    None,
+                    f"found undefined alias {event.anchor}",
+                    event.start_mark,
+                )
+            return self._anchors[event.anchor]
+
+        if isinstance(event, yaml.ScalarEvent):
+            tag = event.tag
+            if tag is None or tag == "!":
+                tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+            node: yaml.Node = yaml.ScalarNode(
+                tag, event.value, event.start_mark, event.end_mark, style=event.style
+            )
+            if event.anchor is not None:
+                self._anchors[event.anchor] = node
+            return node
+
+        if isinstance(event, yaml.SequenceStartEvent):
+            tag = event.tag
+            if tag is None or tag == "!":
+                tag = loader.resolve(yaml.SequenceNode, None, event.implicit)
+            node = yaml.SequenceNode(
+                tag, [], event.start_mark, None, flow_style=event.flow_style
+            )
+            if event.anchor is not None:
+                self._anchors[event.anchor] = node
+            while not loader.check_event(yaml.SequenceEndEvent):
+                node.value.append(self._compose(loader))
+            node.end_mark = loader.get_event().end_mark
+            return node
+
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = loader.resolve(yaml.MappingNode, None, event.implicit)
+        node = yaml.MappingNode(
+            tag, [], event.start_mark, None, flow_style=event.flow_style
+        )
+        if event.anchor is not None:
+            self._anchors[event.anchor] = node
+        while not loader.check_event(yaml.MappingEndEvent):
+            key = self._compose(loader)
+            node.value.append((key, self._compose(loader)))
+        node.end_mark = loader.get_event().end_mark
+        return node
+
+
 class YAMLProcessor:
     """YAML处理器"""
 
     def __init__(self, data_processor):
         self.data_processor = data_processor
 
-    def load_yaml(self, yaml_path: str) -> Dict[str, Any]:
+    @staticmethod
+    def load_yaml(yaml_path: str) -> Dict[str, Any]:
         """加载YAML文件"""
         try:
             with open(yaml_path, "r", encoding="utf-8") as f:
-                return yaml.safe_load(f)
+                return yaml.load(f, Loader=SafeLoader)
         except yaml.YAMLError as e:
             console.print(f"[red]Error parsing YAML file: {e}[/red]")
             raise
 
-    def validate_yaml(self, data: Dict[str, Any]) -> None:
+    @staticmethod
+    def validate_yaml(data: Dict[str, Any]) -> None:
         """验证YAML格式"""
         required_fields = {"version": str, "description": str, "batches": list}
 
@@ -34,17 +217,33 @@ class YAMLProcessor:
                 raise ValueError(f"Invalid type for {field}: expected {field_type}")
 
     def process_yaml(self, yaml_path: str) -> None:
-        """处理YAML文件"""
-        data = self.load_yaml(yaml_path)
-        self.validate_yaml(data)
+        """处理YAML文件
 
+        流式读取，每个批次解析后立即处理，不将整个文件载入内存。
+        顶层字段在处理第一个批次之前校验。
+        """
+        if self.data_processor.workers > 1:
+            # 每个批次的并行执行各自提交工作会话，之后的批次失败时无法整体回滚
+            raise ValueError("Parallel workers cannot be combined with YAML input")
         console.print(f"[cyan]Processing YAML file: {yaml_path}[/cyan]")
+        stream = YAMLStream(yaml_path, validate_header=self.validate_yaml)
+        for batch_data in stream.batches():
+            self._process_batch(YAMLBatch.from_dict(batch_data))
+
+        # 没有 batches 列表时在此报告
+        data = stream.data()
+        self.validate_yaml(data)
         console.print(f"Version: {data['version']}")
         console.print(f"Description: {data['description']}")
 
-        for batch_data in data["batches"]:
-            batch = YAMLBatch.from_dict(batch_data)
-            self._process_batch(batch)
+    def iter_operations(self, yaml_path: str) -> Iterator[SQLOperation]:
+        """流式解析YAML文件并逐个返回操作，不执行"""
+        stream = YAMLStream(yaml_path, validate_header=self.validate_yaml)
+        for batch_data in stream.batches():
+            yield from self.data_processor._coalesce(
+                self.prepare_operations(YAMLBatch.from_dict(batch_data))
+            )
+        self.validate_yaml(stream.data())
 
     def _process_batch(self, batch: YAMLBatch) -> None:
         """处理批次操作"""
@@ -52,7 +251,27 @@ class YAMLProcessor:
         if batch.description:
             console.print(f"Description: {batch.description}")
 
-        # 转换为DataFrame处理
+        operations = self.prepare_operations(batch)
+        self.data_processor._execute_operations(
+            self.data_processor._coalesce(operations)
+        )
+
+    def prepare_operations(self, batch: YAMLBatch) -> List[SQLOperation]:
+        """将批次操作直接转换为SQL操作，不经过 DataFrame
+
+        列名映射、数字和日期转换与CSV路径一致。
+        """
+        with self.data_processor.profiler.phase("prepare"):
+            return [
+                self.data_processor._build_operation(
+                    op.table, op.command, op.conditions, op.new_values, coerce=True
+                )
+                for op in batch.operations
+            ]
+
+    @staticmethod
+    def batch_frame(batch: YAMLBatch) -> pd.DataFrame:
+        """将批次操作转换为DataFrame"""
         operations_data = []
         for op in batch.operations:
             row_data = {"table": op.table, "command": op.command}
@@ -61,8 +280,7 @@ class YAMLProcessor:
                 row_data.update({f"new_{k}": v for k, v in op.new_values.items()})
             operations_data.append(row_data)
 
-        df = pd.DataFrame(operations_data)
-        self.data_processor._process_batch(df)
+        return pd.DataFrame(operations_data)
 
     def generate_template(self, output_path: str) -> None:
         """生成YAML模板文件"""
@@ -38,3 +38,12 @@ CREATE TABLE departments_bak (
     status VARCHAR2(20),
     backup_time TIMESTAMP
 );
+
+-- 创建暂存表（staging 执行模式，会话私有，提交时清空）
+CREATE GLOBAL TEMPORARY TABLE employees_stg
+ON COMMIT DELETE ROWS
+AS SELECT * FROM employees WHERE 1=0;
+
+CREATE GLOBAL TEMPORARY TABLE departments_stg
+ON COMMIT DELETE ROWS
+AS SELECT * FROM departments WHERE 1=0;
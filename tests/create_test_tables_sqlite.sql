@@ -0,0 +1,43 @@
+-- SQLite 测试表（与 create_test_tables.sql 结构一致）
+CREATE TABLE employees (
+    emp_id INTEGER PRIMARY KEY,
+    emp_name TEXT,
+    department_id INTEGER,
+    salary REAL,
+    hire_date TEXT,
+    birth_date TEXT,
+    status TEXT
+);
+
+CREATE TABLE departments (
+    dept_id TEXT PRIMARY KEY,
+    dept_name TEXT,
+    manager_id INTEGER,
+    create_date TEXT,
+    status TEXT
+);
+
+CREATE TABLE employees_bak (
+    emp_id INTEGER,
+    emp_name TEXT,
+    department_id INTEGER,
+    salary REAL,
+    hire_date TEXT,
+    birth_date TEXT,
+    status TEXT,
+    backup_time TEXT
+);
+
+CREATE TABLE departments_bak (
+    dept_id TEXT,
+    dept_name TEXT,
+    manager_id INTEGER,
+    create_date TEXT,
+    status TEXT,
+    backup_time TEXT
+);
+
+-- 暂存表（staging 执行模式）
+CREATE TABLE employees_stg AS SELECT * FROM employees WHERE 0;
+
+CREATE TABLE departments_stg AS SELECT * FROM departments WHERE 0;
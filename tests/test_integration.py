@@ -1,4 +1,5 @@
 import unittest
+import unittest.mock
 import os
 import pandas as pd
 import numpy as np
@@ -272,21 +273,28 @@ class TestIntegration(unittest.TestCase):
         test_data.to_csv(test_csv, index=False)
 
         # 记录SQL执行
-        executed_sql = []
-        original_execute = self.db_manager.execute_operation
+        executed = []
+        original_execute = self.db_manager.execute_returning
 
-        def mock_execute(operation):
-            executed_sql.append(operation.get_sql())
-            return original_execute(operation)
+        def mock_execute(sql, params, returning_types):
+            if sql.startswith("DELETE"):
+                executed.append((sql, list(params)))
+            return original_execute(sql, params, returning_types)
 
-        self.db_manager.execute_operation = mock_execute
-
-        self.processor.process_file(test_csv)
-
-        # 验证只执行了一条SQL
-        self.assertEqual(len(executed_sql), 1)
-        expected_sql = "DELETE FROM employees WHERE emp_id IN (1001,1002,1003)"
-        self.assertEqual(executed_sql[0], expected_sql)
+        self.db_manager.execute_returning = mock_execute
+        try:
+            self.processor.process_file(test_csv)
+        finally:
+            del self.db_manager.execute_returning
+
+        # 验证只执行了一条SQL（键数补齐到固定档位）
+        self.assertEqual(len(executed), 1)
+        expected_sql = (
+            "DELETE FROM employees WHERE emp_id IN (:1,:2,:3,:4) "
+            "RETURNING emp_id INTO :5"
+        )
+        self.assertEqual(executed[0][0], expected_sql)
+        self.assertEqual(executed[0][1], [1001, 1002, 1003, 1003])
 
         # 验证结果
         result = self.db_manager.fetch_data(
@@ -294,6 +302,162 @@ class TestIntegration(unittest.TestCase):
         )
         self.assertEqual(result.iloc[0]["cnt"], 0)
 
+    def test_batch_delete_composite_chunked(self):
+        """测试多列条件删除按IN列表上限分块"""
+        test_data = pd.DataFrame(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": emp_id,
+                    "status": status,
+                    "command": "delete",
+                }
+                for emp_id, status in self.db_manager.fetch_data(
+                    "SELECT emp_id, status FROM employees"
+                ).itertuples(index=False)
+            ]
+        )
+        test_csv = "tests/data/test_composite_delete.csv"
+        test_data.to_csv(test_csv, index=False)
+
+        executed = []
+        original_execute = self.db_manager.execute_returning
+
+        def mock_execute(sql, params, returning_types):
+            if sql.startswith("DELETE"):
+                executed.append(sql)
+            return original_execute(sql, params, returning_types)
+
+        self.db_manager.execute_returning = mock_execute
+        try:
+            with unittest.mock.patch.object(
+                self.db_manager.dialect, "max_in_list_size", 40
+            ):
+                self.processor.process_file(test_csv)
+        finally:
+            del self.db_manager.execute_returning
+
+        # 100行数据按每块40个键分为3条语句
+        self.assertEqual(len(executed), 3)
+        self.assertTrue(
+            executed[0].startswith(
+                "DELETE FROM employees WHERE (emp_id,status) IN ((:1,:2),"
+            )
+        )
+
+        result = self.db_manager.fetch_data("SELECT COUNT(*) as cnt FROM employees")
+        self.assertEqual(result.iloc[0]["cnt"], 0)
+
+    def test_batch_update_same_shape(self):
+        """测试相同形状的更新合并为一次批量执行"""
+        test_data = pd.DataFrame(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": emp_id,
+                    "command": "update",
+                    "new_salary": 7000 + i,
+                }
+                for i, emp_id in enumerate([1001, 1002, 1003])
+            ]
+        )
+        test_csv = "tests/data/test_batch_update.csv"
+        test_data.to_csv(test_csv, index=False)
+
+        # 记录批量SQL执行（更新通过带 RETURNING 的 executemany 发送）
+        executed = []
+        original_execute_many_returning = self.db_manager.execute_many_returning
+
+        def mock_execute_many_returning(sql, params, returning_types):
+            executed.append((sql, list(params)))
+            return original_execute_many_returning(sql, params, returning_types)
+
+        self.db_manager.execute_many_returning = mock_execute_many_returning
+        try:
+            self.processor.process_file(test_csv)
+        finally:
+            del self.db_manager.execute_many_returning
+
+        # 验证只执行了一条参数化SQL
+        self.assertEqual(len(executed), 1)
+        self.assertEqual(
+            executed[0][0],
+            "UPDATE employees SET salary = :1 WHERE emp_id = :2 "
+            "RETURNING emp_id, salary INTO :3, :4",
+        )
+        self.assertEqual(len(executed[0][1]), 3)
+
+        result = self.db_manager.fetch_data(
+            "SELECT emp_id, salary FROM employees "
+            "WHERE emp_id IN (1001, 1002, 1003) ORDER BY emp_id"
+        )
+        self.assertEqual(result["salary"].tolist(), [7000, 7001, 7002])
+
+    def test_batch_round_trips(self):
+        """测试每个批次的数据库往返次数固定，不随行数增长"""
+        test_data = pd.DataFrame(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": 1001 + i,
+                    "command": "update",
+                    "new_salary": 6000 + i,
+                }
+                for i in range(50)
+            ]
+        )
+        test_csv = "tests/data/test_round_trips.csv"
+        test_data.to_csv(test_csv, index=False)
+
+        fetches = []
+        original_fetch = self.db_manager.fetch_data
+
+        def mock_fetch(sql, params=()):
+            fetches.append(sql)
+            return original_fetch(sql, params)
+
+        self.db_manager.fetch_data = mock_fetch
+        try:
+            self.processor.process_file(test_csv)
+        finally:
+            del self.db_manager.fetch_data
+
+        # 变更前数据一次集合查询，变更后数据由 RETURNING 取回
+        self.assertEqual(len(fetches), 1)
+        result = self.db_manager.fetch_data(
+            "SELECT COUNT(*) as cnt FROM employees "
+            "WHERE emp_id BETWEEN 1001 AND 1050 AND salary >= 6000"
+        )
+        self.assertEqual(result.iloc[0]["cnt"], 50)
+
+    def test_streaming_mode(self):
+        """测试流式处理CSV"""
+        test_data = pd.DataFrame(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": 1001 + i,
+                    "command": "update",
+                    "new_salary": 5000 + i,
+                }
+                for i in range(50)
+            ]
+        )
+        test_csv = "tests/data/test_streaming.csv"
+        test_data.to_csv(test_csv, index=False)
+
+        self.processor.streaming_enabled = True
+        try:
+            self.processor.process_file(test_csv)
+        finally:
+            self.processor.streaming_enabled = False
+
+        result = self.db_manager.fetch_data(
+            "SELECT salary FROM employees WHERE emp_id BETWEEN 1001 AND 1050 "
+            "ORDER BY emp_id"
+        )
+        self.assertEqual(result["salary"].tolist(), [5000 + i for i in range(50)])
+
     def test_mixed_operations(self):
         """测试混合操作"""
         test_data = pd.DataFrame(
@@ -402,6 +566,31 @@ class TestIntegration(unittest.TestCase):
         self.assertFalse(backup_data.empty)
         self.assertEqual(backup_data.iloc[0]["salary"], original_data.iloc[0]["salary"])
 
+    def test_backup_disabled(self):
+        """测试关闭备份的表跳过备份"""
+        test_data = pd.DataFrame(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": 1001,
+                    "command": "update",
+                    "new_salary": 8000,
+                }
+            ]
+        )
+        test_csv = "tests/data/test_backup_disabled.csv"
+        test_data.to_csv(test_csv, index=False)
+
+        table_config = self.processor.tables_config["employees"]
+        table_config.backup_enabled = False
+        try:
+            self.processor.process_file(test_csv)
+        finally:
+            table_config.backup_enabled = True
+
+        backup_data = self.db_manager.fetch_data("SELECT * FROM employees_bak")
+        self.assertTrue(backup_data.empty)
+
     def test_append_text(self):
         """测试文本追加功能"""
         # 准备测试数据
@@ -469,10 +658,15 @@ class TestIntegration(unittest.TestCase):
             "test_condition_delete.csv",
             "test_date_update.csv",
             "test_batch_delete.csv",
+            "test_batch_update.csv",
+            "test_composite_delete.csv",
+            "test_streaming.csv",
+            "test_round_trips.csv",
             "test_mixed_ops.csv",
             "test_invalid_table.csv",
             "test_invalid_command.csv",
             "test_backup.csv",
+            "test_backup_disabled.csv",
         ]:
             if os.path.exists(f"tests/data/{file}"):
                 os.remove(f"tests/data/{file}")
@@ -0,0 +1,208 @@
+import sqlite3
+import threading
+import unittest
+from src.backends.sqlite import SQLiteBackend
+from src.database import DatabaseManager
+from src.models import DatabaseConfig, PoolConfig
+from src.parallel import ParallelExecutor
+
+
+class FakeConnection:
+    """记录两阶段提交各步骤的连接，可注入准备或提交失败"""
+
+    def __init__(
+        self, index: int, fail_prepare: bool = False, fail_commit: bool = False
+    ):
+        self.index = index
+        self.fail_prepare = fail_prepare
+        self.fail_commit = fail_commit
+        self.xid = None
+        self.prepared = False
+        self.commits = 0
+        self.rollbacks = 0
+
+    def begin(self, *xid):
+        self.xid = xid
+
+    def prepare(self):
+        if self.fail_prepare:
+            raise sqlite3.OperationalError("ORA-02054: transaction in-doubt")
+        self.prepared = True
+        return True
+
+    def commit(self):
+        if self.fail_commit:
+            raise sqlite3.OperationalError("disk I/O error")
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakePool:
+    """按顺序编号借出连接的连接池（0 为主连接）"""
+
+    def __init__(self, fail_prepare_at=None, fail_commit_at=None):
+        self.fail_prepare_at = fail_prepare_at
+        self.fail_commit_at = fail_commit_at
+        self.connections = []
+        self.released = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            index = len(self.connections)
+            connection = FakeConnection(
+                index,
+                fail_prepare=index == self.fail_prepare_at,
+                fail_commit=index == self.fail_commit_at,
+            )
+            self.connections.append(connection)
+            return connection
+
+
+class FakeBackend(SQLiteBackend):
+    """支持并行会话的假后端，只记录会话的提交和回滚"""
+
+    supports_parallel = True
+
+    def __init__(self, pool: FakePool):
+        self.pool = pool
+
+    def create_pool(self, config):
+        return self.pool
+
+    def acquire(self, pool):
+        return pool.acquire()
+
+    def release(self, pool, connection):
+        pool.released.append(connection)
+
+    def tpc_begin(self, connection, xid):
+        connection.begin(*xid)
+
+    def tpc_prepare(self, connection):
+        return connection.prepare()
+
+    def tpc_commit(self, connection):
+        assert connection.prepared, "commit before prepare"
+        connection.commit()
+
+
+class TestParallelExecutor(unittest.TestCase):
+    """并行执行器的任务分发、失败回滚和提交协调测试"""
+
+    def _create_manager(
+        self, fail_prepare_at=None, fail_commit_at=None, pool_max=5
+    ) -> DatabaseManager:
+        self.pool = FakePool(fail_prepare_at, fail_commit_at)
+        return DatabaseManager(
+            DatabaseConfig(backend="sqlite", pool=PoolConfig(min=1, max=pool_max)),
+            backend=FakeBackend(self.pool),
+        )
+
+    def _workers(self):
+        """工作会话的连接（不含主连接）"""
+        return self.pool.connections[1:]
+
+    def test_tasks_fan_out_and_commit_together(self):
+        """测试任务分发到全部会话，全部成功后每个会话提交一次"""
+        manager = self._create_manager()
+        ran = []
+        lock = threading.Lock()
+
+        def task(name):
+            def run(session):
+                with lock:
+                    ran.append((name, session.connection.index))
+
+            return name, run
+
+        ParallelExecutor(manager, workers=4).run(
+            [task(f"employees#{i}") for i in range(1, 9)]
+        )
+
+        self.assertEqual(
+            sorted(name for name, _ in ran),
+            sorted(f"employees#{i}" for i in range(1, 9)),
+        )
+        self.assertEqual(len(self._workers()), 4)
+        self.assertTrue(all(index > 0 for _, index in ran))
+        # 全部会话是同一个全局事务的不同分支，先准备再提交
+        xids = [connection.xid for connection in self._workers()]
+        self.assertEqual(len({global_id for _, global_id, _ in xids}), 1)
+        self.assertEqual(len({branch for _, _, branch in xids}), 4)
+        for connection in self._workers():
+            self.assertTrue(connection.prepared)
+            self.assertEqual(connection.commits, 1)
+            self.assertEqual(connection.rollbacks, 0)
+        self.assertCountEqual(self.pool.released, self._workers())
+        self.assertEqual(self.pool.connections[0].commits, 0)
+
+    def test_task_failure_rolls_back_all_sessions(self):
+        """测试任一任务失败时回滚全部会话，不提交任何会话"""
+        manager = self._create_manager()
+
+        def fail(session):
+            raise RuntimeError("ORA-00060: deadlock detected")
+
+        with self.assertRaises(RuntimeError) as cm:
+            ParallelExecutor(manager, workers=3).run(
+                [("employees#1", lambda session: None), ("employees#2", fail)]
+                + [(f"departments#{i}", lambda session: None) for i in range(1, 3)]
+            )
+
+        self.assertIn("employees#2", str(cm.exception))
+        for connection in self._workers():
+            self.assertEqual(connection.commits, 0)
+            self.assertEqual(connection.rollbacks, 1)
+
+    def _run_one_task_per_worker(self, manager: DatabaseManager) -> None:
+        barrier = threading.Barrier(4)
+
+        def task(session):
+            # 保证每个会话恰好执行一个任务
+            barrier.wait(5)
+
+        ParallelExecutor(manager, workers=4).run(
+            [(f"employees#{i}", task) for i in range(1, 5)]
+        )
+
+    def test_prepare_failure_rolls_back_all_sessions(self):
+        """测试某个会话准备提交失败时回滚全部会话，不提交任何会话"""
+        manager = self._create_manager(fail_prepare_at=3)
+        with self.assertRaises(RuntimeError) as cm:
+            self._run_one_task_per_worker(manager)
+
+        self.assertIn("Prepare failed for worker 3", str(cm.exception))
+        self.assertIn("all workers rolled back", str(cm.exception))
+        for connection in self._workers():
+            self.assertEqual(connection.commits, 0)
+            self.assertEqual(connection.rollbacks, 1)
+
+    def test_commit_failure_after_prepare_is_reported(self):
+        """测试全部准备成功后某个会话提交失败时报告未决的任务，而不是成功"""
+        manager = self._create_manager(fail_commit_at=2)
+        with self.assertRaises(RuntimeError) as cm:
+            self._run_one_task_per_worker(manager)
+
+        first, failed, *rest = self._workers()
+        self.assertIn("Commit failed for 1 of 4 prepared workers", str(cm.exception))
+        self.assertIn("in doubt in global transaction", str(cm.exception))
+        self.assertTrue(all(connection.prepared for connection in self._workers()))
+        self.assertEqual(failed.commits, 0)
+        # 提交决定已作出，其余已准备的分支照常提交
+        for connection in [first] + rest:
+            self.assertEqual(connection.commits, 1)
+
+    def test_pool_too_small(self):
+        """测试连接池容纳不下主连接和全部工作会话时拒绝执行"""
+        manager = self._create_manager(pool_max=2)
+        with self.assertRaises(ValueError):
+            ParallelExecutor(manager, workers=2).run(
+                [(f"employees#{i}", lambda session: None) for i in range(1, 3)]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
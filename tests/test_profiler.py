@@ -0,0 +1,194 @@
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+from src.profiler import HISTOGRAM_BUCKETS, LatencyHistogram, Profiler
+
+
+class FakeClock:
+    """可手动推进的 perf_counter"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """延迟直方图的分桶和百分位数测试"""
+
+    def test_bucketing(self):
+        """测试耗时落入上界为 2 的幂微秒的桶"""
+        histogram = LatencyHistogram()
+        histogram.record(0.0)  # 0us -> <=1us
+        histogram.record(0.000001)  # 1us -> <=1us
+        histogram.record(0.000002)  # 2us -> <=2us
+        histogram.record(0.0015)  # 1500us -> <=2048us
+        histogram.record(10**6)  # 超过最大上界，计入最后一个桶
+
+        self.assertEqual(histogram.buckets[0], 2)
+        self.assertEqual(histogram.buckets[1], 1)
+        self.assertEqual(histogram.buckets[11], 1)
+        self.assertEqual(histogram.buckets[HISTOGRAM_BUCKETS - 1], 1)
+        self.assertEqual(sum(histogram.buckets), histogram.count)
+        self.assertEqual(histogram.min, 0.0)
+        self.assertEqual(histogram.max, 10**6)
+
+    def test_percentiles(self):
+        """测试百分位数取所在桶的上界，且不超过最大值"""
+        histogram = LatencyHistogram()
+        for _ in range(90):
+            histogram.record(0.001)
+        for _ in range(10):
+            histogram.record(0.1)
+
+        self.assertAlmostEqual(histogram.percentile(0.5), 0.001024)
+        self.assertAlmostEqual(histogram.percentile(0.9), 0.001024)
+        # 100ms 所在桶的上界为 131.072ms，截断为最大值
+        self.assertAlmostEqual(histogram.percentile(0.95), 0.1)
+        self.assertAlmostEqual(histogram.percentile(0.99), 0.1)
+
+        report = histogram.to_dict()
+        self.assertEqual(report["count"], 100)
+        self.assertAlmostEqual(report["total_ms"], 1090.0)
+        self.assertAlmostEqual(report["mean_ms"], 10.9)
+        self.assertAlmostEqual(report["min_ms"], 1.0)
+        self.assertAlmostEqual(report["p50_ms"], 1.024)
+        self.assertAlmostEqual(report["p95_ms"], 100.0)
+        self.assertEqual(report["histogram"], {"<=1.024ms": 90, "<=131.072ms": 10})
+
+    def test_empty(self):
+        """测试空直方图"""
+        report = LatencyHistogram().to_dict()
+        self.assertEqual(report["count"], 0)
+        self.assertEqual(report["mean_ms"], 0.0)
+        self.assertEqual(report["min_ms"], 0.0)
+        self.assertEqual(report["p99_ms"], 0.0)
+        self.assertEqual(report["histogram"], {})
+
+
+class TestProfiler(unittest.TestCase):
+    """分阶段计时的嵌套和报告测试"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = unittest.mock.patch("src.profiler.time.perf_counter", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _run(self, profiler: Profiler, name: str, seconds: float):
+        with profiler.phase(name):
+            self.clock.advance(seconds)
+
+    def _phase(self, report, name, table, command):
+        for p in report["phases"]:
+            if (p["phase"], p["table"], p["command"]) == (name, table, command):
+                return p
+        self.fail(f"phase {name} {table} {command} not reported")
+
+    def test_nested_phases_count_outermost(self):
+        """测试嵌套阶段只计入最外层阶段"""
+        profiler = Profiler()
+        with profiler.phase("execute"):
+            self.clock.advance(0.002)
+            with profiler.phase("fetch"):
+                self.clock.advance(0.003)
+            self.clock.advance(0.001)
+        self._run(profiler, "fetch", 0.004)
+
+        report = profiler.report()
+        execute = self._phase(report, "execute", "", "")
+        fetch = self._phase(report, "fetch", "", "")
+        self.assertEqual(execute["count"], 1)
+        self.assertAlmostEqual(execute["total_ms"], 6.0)
+        self.assertEqual(fetch["count"], 1)
+        self.assertAlmostEqual(fetch["total_ms"], 4.0)
+
+    def test_nested_scopes(self):
+        """测试内层 scope 继承外层未指定的表或命令，退出后恢复"""
+        profiler = Profiler()
+        with profiler.scope("employees"):
+            with profiler.scope(command="update"):
+                self._run(profiler, "execute", 0.001)
+                profiler.count("operations", 3)
+            with profiler.scope("departments", "delete"):
+                self._run(profiler, "execute", 0.002)
+            self._run(profiler, "execute", 0.004)
+        profiler.count("operations")
+
+        report = profiler.report()
+        self.assertAlmostEqual(
+            self._phase(report, "execute", "employees", "update")["total_ms"], 1.0
+        )
+        self.assertAlmostEqual(
+            self._phase(report, "execute", "departments", "delete")["total_ms"], 2.0
+        )
+        self.assertAlmostEqual(
+            self._phase(report, "execute", "employees", "")["total_ms"], 4.0
+        )
+        self.assertEqual(
+            report["counters"],
+            [
+                {"counter": "operations", "table": "", "command": "", "value": 1},
+                {
+                    "counter": "operations",
+                    "table": "employees",
+                    "command": "update",
+                    "value": 3,
+                },
+            ],
+        )
+
+    def test_report_totals_and_percentiles(self):
+        """测试报告的各阶段合计、百分位数、排序和未归属耗时"""
+        profiler = Profiler()
+        with profiler.scope("employees", "update"):
+            for _ in range(19):
+                self._run(profiler, "execute", 0.001)
+            self._run(profiler, "execute", 0.05)
+            for _ in range(4):
+                self._run(profiler, "fetch", 0.01)
+        self.clock.advance(0.5)
+
+        report = profiler.report()
+        self.assertEqual([p["phase"] for p in report["phases"]], ["execute", "fetch"])
+        execute, fetch = report["phases"]
+        self.assertEqual(execute["count"], 20)
+        self.assertAlmostEqual(execute["total_ms"], 69.0)
+        self.assertAlmostEqual(execute["p50_ms"], 1.024)
+        self.assertAlmostEqual(execute["p95_ms"], 1.024)
+        self.assertAlmostEqual(execute["p99_ms"], 50.0)
+        self.assertAlmostEqual(execute["max_ms"], 50.0)
+        self.assertEqual(fetch["count"], 4)
+        self.assertAlmostEqual(fetch["total_ms"], 40.0)
+        self.assertAlmostEqual(fetch["mean_ms"], 10.0)
+        self.assertAlmostEqual(report["wall_ms"], 609.0)
+        self.assertAlmostEqual(report["unattributed_ms"], 500.0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.json")
+            profiler.write_json(path)
+            with open(path, encoding="utf-8") as f:
+                written = json.load(f)
+        self.assertEqual(written["phases"][0]["count"], 20)
+        self.assertAlmostEqual(written["phases"][1]["total_ms"], 40.0)
+
+    def test_disabled(self):
+        """测试未启用时不记录任何数据"""
+        profiler = Profiler(enabled=False)
+        with profiler.scope("employees", "update"):
+            self._run(profiler, "execute", 0.001)
+            profiler.count("operations")
+
+        report = profiler.report()
+        self.assertEqual(report["phases"], [])
+        self.assertEqual(report["counters"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,1312 @@
+import contextlib
+import datetime
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import unittest.mock
+import pandas as pd
+import yaml
+from src.batch import BatchExecutor, ShapeAccumulator
+from src.coalesce import OperationCoalescer
+from src.database import DatabaseManager
+from src.models import CommandType, DatabaseConfig, PoolConfig, SQLOperation
+from src.parallel import partition_by_key
+from src.planner import DryRunPlanner
+from src.processor import OPERATION_MEMORY_FACTOR, DataProcessor
+from src.schema import SchemaCache
+from src.yaml_processor import YAMLProcessor, YAMLStream
+
+SCHEMA_FILE = os.path.join(os.path.dirname(__file__), "create_test_tables_sqlite.sql")
+
+TABLES_CONFIG = {
+    "employees": {
+        "primary_key": "emp_id",
+        "date_columns": ["hire_date", "birth_date"],
+        "number_columns": ["emp_id", "department_id", "salary"],
+        "backup_enabled": True,
+        "columns_mapping": {
+            "employee_id": "emp_id",
+            "name": "emp_name",
+            "dept": "department_id",
+        },
+    },
+    "departments": {
+        "primary_key": "dept_id",
+        "date_columns": ["create_date"],
+        "number_columns": ["manager_id"],
+        "backup_enabled": True,
+        "columns_mapping": {
+            "id": "dept_id",
+            "name": "dept_name",
+            "manager": "manager_id",
+        },
+    },
+}
+
+
+class TestSQLiteBackend(unittest.TestCase):
+    """使用 SQLite 后端的端到端测试（无需 Oracle 实例）"""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.db_manager = DatabaseManager(
+            DatabaseConfig(
+                backend="sqlite", database=os.path.join(self.work_dir, "test.db")
+            )
+        )
+        with open(SCHEMA_FILE, encoding="utf-8") as f:
+            self.db_manager.connection.executescript(f.read())
+
+        self.db_manager.connection.executemany(
+            "INSERT INTO employees (emp_id, emp_name, department_id, salary, "
+            "hire_date, status) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    emp_id,
+                    f"Employee{emp_id}",
+                    emp_id % 5 + 1,
+                    5000 + emp_id % 7 * 100,
+                    "2020-01-01",
+                    "active" if emp_id % 2 else "inactive",
+                )
+                for emp_id in range(1001, 1101)
+            ],
+        )
+        self.db_manager.connection.executemany(
+            "INSERT INTO departments VALUES (?, ?, ?, ?, ?)",
+            [
+                (f"D00{i}", f"Department{i}", 1000 + i, "2020-01-01", "active")
+                for i in range(1, 6)
+            ],
+        )
+        self.db_manager.connection.commit()
+        self.processor = self._create_processor()
+
+    def tearDown(self):
+        self.db_manager.close()
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _create_processor(self, **processor_config) -> DataProcessor:
+        config = {
+            "batch_size": 1000,
+            "preview_enabled": False,
+            "require_confirmation": False,
+            "backup_enabled": True,
+        }
+        config.update(processor_config)
+        return DataProcessor(
+            self.db_manager, {"processor": config, "tables": TABLES_CONFIG}
+        )
+
+    def _write_csv(self, rows, name="input.csv") -> str:
+        path = os.path.join(self.work_dir, name)
+        pd.DataFrame(rows).to_csv(path, index=False)
+        return path
+
+    def _count(self, sql: str) -> int:
+        return int(self.db_manager.fetch_data(sql).iloc[0, 0])
+
+    def test_update_with_backup(self):
+        """测试更新并备份变更前数据"""
+        csv = self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": 1001,
+                    "command": "update",
+                    "new_salary": 8000,
+                },
+                {
+                    "table": "employees",
+                    "employee_id": 1002,
+                    "command": "update",
+                    "new_salary": 9000,
+                },
+            ]
+        )
+        self.processor.process_file(csv)
+
+        result = self.db_manager.fetch_data(
+            "SELECT emp_id, salary FROM employees WHERE emp_id IN (1001, 1002) ORDER BY emp_id"
+        )
+        self.assertEqual(result["salary"].tolist(), [8000, 9000])
+        self.assertEqual(
+            self._count(
+                "SELECT COUNT(*) FROM employees_bak WHERE emp_id IN (1001, 1002)"
+            ),
+            2,
+        )
+
+    def _same_key_updates_csv(self) -> str:
+        """同一主键上三个不同形状的更新（文件顺序决定最终值）"""
+        return self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": 1001,
+                    "command": "update",
+                    "new_salary": 100,
+                    "new_status": None,
+                },
+                {
+                    "table": "employees",
+                    "employee_id": 1001,
+                    "command": "update",
+                    "new_salary": 200,
+                    "new_status": "x",
+                },
+                {
+                    "table": "employees",
+                    "employee_id": 1001,
+                    "command": "update",
+                    "new_salary": 300,
+                    "new_status": None,
+                },
+            ]
+        )
+
+    def _salary_and_status(self, emp_id: int) -> tuple:
+        row = self.db_manager.fetch_data(
+            f"SELECT salary, status FROM employees WHERE emp_id = {emp_id}"
+        ).iloc[0]
+        return row["salary"], row["status"]
+
+    def test_same_key_updates_keep_file_order(self):
+        """测试不同形状的更新按文件顺序作用于同一主键"""
+        self.processor.process_file(self._same_key_updates_csv())
+        self.assertEqual(self._salary_and_status(1001), (300, "x"))
+
+    def test_same_key_updates_keep_file_order_streaming(self):
+        """测试流式模式下不同形状的更新按文件顺序作用于同一主键"""
+        processor = self._create_processor(streaming_enabled=True)
+        processor.process_file(self._same_key_updates_csv())
+        self.assertEqual(self._salary_and_status(1001), (300, "x"))
+
+    def _non_key_barrier_csv(self) -> str:
+        """同一主键的两个更新之间夹着一个按非主键条件的更新"""
+        return self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": 1001,
+                    "status": None,
+                    "command": "update",
+                    "new_status": "x",
+                    "new_salary": None,
+                },
+                {
+                    "table": "employees",
+                    "employee_id": None,
+                    "status": "x",
+                    "command": "update",
+                    "new_status": None,
+                    "new_salary": 1,
+                },
+                {
+                    "table": "employees",
+                    "employee_id": 1001,
+                    "status": None,
+                    "command": "update",
+                    "new_status": "y",
+                    "new_salary": None,
+                },
+            ]
+        )
+
+    def test_non_key_operation_is_a_barrier(self):
+        """测试按非主键条件的操作不会被之后同形状的操作越过"""
+        self.processor.process_file(self._non_key_barrier_csv())
+        self.assertEqual(self._salary_and_status(1001), (1, "y"))
+
+    def test_non_key_operation_is_a_barrier_streaming(self):
+        """测试流式模式下按非主键条件的操作不会被之后同形状的操作越过"""
+        processor = self._create_processor(streaming_enabled=True)
+        processor.process_file(self._non_key_barrier_csv())
+        self.assertEqual(self._salary_and_status(1001), (1, "y"))
+
+    def test_accumulator_keeps_non_key_order(self):
+        """测试累加器提前输出形状时先输出之前缓冲的、可能重叠的形状"""
+        table_config = self.processor.tables_config["employees"]
+
+        def update(conditions, **values):
+            return SQLOperation(
+                command_type=CommandType.UPDATE,
+                table_name="employees",
+                conditions=conditions,
+                table_config=table_config,
+                update_values=values,
+            )
+
+        barrier = update({"status": "x"}, salary=1)
+        keyed = [
+            update({"emp_id": emp_id}, status="x") for emp_id in (1001, 1002, 1003)
+        ]
+        accumulator = ShapeAccumulator(batch_size=10, max_buffered=3)
+        ready = []
+        for operation in [barrier] + keyed:
+            ready.extend(accumulator.add(operation))
+        ready.extend(accumulator.drain())
+
+        # 缓冲超限时输出最大的按主键形状，之前缓冲的非主键形状先输出
+        self.assertEqual([ops for _, ops in ready], [[barrier], keyed])
+
+    def test_batch_delete(self):
+        """测试批量删除"""
+        csv = self._write_csv(
+            [
+                {"table": "employees", "employee_id": emp_id, "command": "delete"}
+                for emp_id in (1001, 1002, 1003)
+            ]
+        )
+        self.processor.process_file(csv)
+
+        self.assertEqual(
+            self._count(
+                "SELECT COUNT(*) FROM employees WHERE emp_id IN (1001, 1002, 1003)"
+            ),
+            0,
+        )
+        self.assertEqual(self._count("SELECT COUNT(*) FROM employees"), 97)
+        self.assertEqual(self._count("SELECT COUNT(*) FROM employees_bak"), 3)
+
+    def test_composite_delete_chunked(self):
+        """测试多列条件删除按IN列表上限分块"""
+        rows = self.db_manager.fetch_data("SELECT emp_id, status FROM employees")
+        csv = self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": emp_id,
+                    "status": status,
+                    "command": "delete",
+                }
+                for emp_id, status in rows.itertuples(index=False)
+            ]
+        )
+        with unittest.mock.patch.object(
+            self.db_manager.dialect, "max_in_list_size", 40
+        ):
+            self.processor.process_file(csv)
+
+        self.assertEqual(self._count("SELECT COUNT(*) FROM employees"), 0)
+
+    def test_append_text(self):
+        """测试追加文本"""
+        csv = self._write_csv(
+            [
+                {
+                    "table": "departments",
+                    "id": "D001",
+                    "command": "update",
+                    "new_name": "+_archived",
+                },
+            ]
+        )
+        self.processor.process_file(csv)
+
+        result = self.db_manager.fetch_data(
+            "SELECT dept_name FROM departments WHERE dept_id = 'D001'"
+        )
+        self.assertEqual(result.iloc[0]["dept_name"], "Department1_archived")
+
+    def test_backup_disabled(self):
+        """测试关闭备份"""
+        processor = self._create_processor(backup_enabled=False)
+        csv = self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": 1001,
+                    "command": "update",
+                    "new_salary": 8000,
+                }
+            ]
+        )
+        processor.process_file(csv)
+
+        self.assertEqual(self._count("SELECT COUNT(*) FROM employees_bak"), 0)
+
+    def test_streaming_mode(self):
+        """测试流式处理"""
+        processor = self._create_processor(streaming_enabled=True, batch_size=7)
+        csv = self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": emp_id,
+                    "command": "update",
+                    "new_status": "retired",
+                }
+                for emp_id in range(1001, 1101)
+            ]
+        )
+        processor.process_file(csv)
+
+        self.assertEqual(
+            self._count("SELECT COUNT(*) FROM employees WHERE status = 'retired'"), 100
+        )
+
+    def test_streaming_coalesce_chunk_size(self):
+        """测试流式合并时按操作列表的内存放大系数缩小数据块"""
+        csv = self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": 1001 + i % 100,
+                    "command": "update",
+                    "new_salary": i,
+                }
+                for i in range(5000)
+            ]
+        )
+        budget_bytes = 1024 * 1024
+        sizes = {}
+        for coalesce in (False, True):
+            processor = self._create_processor(
+                streaming_enabled=True, coalesce_enabled=coalesce
+            )
+            with pd.read_csv(csv, iterator=True) as reader:
+                chunks = list(processor._iter_csv_chunks(reader, budget_bytes))
+            row_bytes = chunks[0][1]
+            factor = 1 + OPERATION_MEMORY_FACTOR if coalesce else 1
+            self.assertEqual(
+                len(chunks[1][0]), budget_bytes // 2 // (row_bytes * factor)
+            )
+            self.assertEqual(sum(len(chunk) for chunk, _ in chunks), 5000)
+            sizes[coalesce] = len(chunks[1][0])
+        self.assertLess(sizes[True], sizes[False])
+
+        # 只在数据块内合并，结果与逐行执行一致
+        processor = self._create_processor(
+            streaming_enabled=True, coalesce_enabled=True, memory_budget_mb=1
+        )
+        processor.process_file(csv)
+        self.assertEqual(
+            self._count("SELECT salary FROM employees WHERE emp_id = 1001"), 4900
+        )
+        self.assertEqual(
+            self._count("SELECT salary FROM employees WHERE emp_id = 1100"), 4999
+        )
+
+    def test_execute_operation_uses_compiled_template(self):
+        """测试单个操作使用按形状缓存的参数化SQL"""
+        table_config = self.processor.tables_config["employees"]
+        for emp_id in (1001, 1002):
+            self.db_manager.execute_operation(
+                SQLOperation(
+                    command_type=CommandType.UPDATE,
+                    table_name="employees",
+                    conditions={"emp_id": emp_id},
+                    update_values={"status": "retired", "emp_name": "+_x"},
+                    table_config=table_config,
+                )
+            )
+
+        result = self.db_manager.fetch_data(
+            "SELECT emp_name, status FROM employees WHERE emp_id IN (1001, 1002) "
+            "ORDER BY emp_id"
+        )
+        self.assertEqual(result["status"].tolist(), ["retired", "retired"])
+        self.assertEqual(
+            result["emp_name"].tolist(), ["Employee1001_x", "Employee1002_x"]
+        )
+        self.assertEqual(self._count("SELECT COUNT(*) FROM employees_bak"), 2)
+
+        # 两次操作形状相同：UPDATE 和备份模板各编译一次
+        info = self.db_manager.compiler.cache_info()
+        self.assertEqual(info["misses"], 2)
+        self.assertEqual(info["hits"], 2)
+
+    def test_fetch_chunks(self):
+        """测试按块取回查询结果"""
+        chunks = list(
+            self.db_manager.fetch_chunks(
+                "SELECT emp_id, salary FROM employees ORDER BY emp_id", chunk_rows=30
+            )
+        )
+        self.assertEqual([len(chunk) for chunk in chunks], [30, 30, 30, 10])
+        self.assertEqual(chunks[0]["emp_id"].dtype, "int64")
+
+        empty = list(
+            self.db_manager.fetch_chunks("SELECT emp_id FROM employees WHERE 1 = 0")
+        )
+        self.assertEqual(len(empty), 1)
+        self.assertEqual(list(empty[0].columns), ["emp_id"])
+
+        df = self.db_manager.fetch_data("SELECT * FROM employees")
+        self.assertEqual(len(df), 100)
+
+    def test_preview_row_cap(self):
+        """测试预览只显示有限行数并附带统计信息"""
+        processor = self._create_processor(
+            preview_enabled=True, preview_max_rows=5, preview_mode="tail"
+        )
+        csv = self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": emp_id,
+                    "command": "update",
+                    "new_status": "retired",
+                }
+                for emp_id in range(1001, 1101)
+            ]
+        )
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            processor.process_file(csv)
+
+        text = output.getvalue()
+        self.assertIn("Showing 5 of 100 rows (tail)", text)
+        self.assertIn("Showing 5 of 100 changes (tail)", text)
+        self.assertEqual(text.count("→"), 5)
+        self.assertEqual(
+            self._count("SELECT COUNT(*) FROM employees WHERE status = 'retired'"), 100
+        )
+
+    def test_plan_confirmation(self):
+        """测试规划确认模式只确认一次并显示匹配行数汇总"""
+        processor = self._create_processor(
+            require_confirmation=True, confirmation_mode="plan", batch_size=10
+        )
+        rows = [
+            {
+                "table": "employees",
+                "employee_id": emp_id,
+                "command": "update",
+                "new_status": "retired",
+            }
+            for emp_id in range(1001, 1031)
+        ]
+        rows.append({"table": "employees", "employee_id": 9999, "command": "delete"})
+        csv = self._write_csv(rows)
+
+        output = io.StringIO()
+        with unittest.mock.patch(
+            "click.confirm", return_value=True
+        ) as confirm, contextlib.redirect_stdout(output):
+            processor.process_file(csv)
+
+        confirm.assert_called_once()
+        self.assertIn(
+            "31 operations matching 30 rows on 1 tables", confirm.call_args[0][0]
+        )
+        self.assertIn("Execution Plan", output.getvalue())
+        self.assertEqual(
+            self._count("SELECT COUNT(*) FROM employees WHERE status = 'retired'"), 30
+        )
+
+    def test_dry_run_plan(self):
+        """测试试运行规划只获取执行计划，并标出全表扫描"""
+        csv = self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": 1001,
+                    "command": "update",
+                    "new_status": "retired",
+                },
+                {
+                    "table": "employees",
+                    "employee_id": 1002,
+                    "command": "update",
+                    "new_status": "retired",
+                },
+                {"table": "employees", "status": "active", "command": "delete"},
+            ]
+        )
+        before = self._count("SELECT COUNT(*) FROM employees")
+
+        planner = DryRunPlanner(self.db_manager, batch_size=1000)
+        estimates = planner.plan(self.processor.iter_operations(csv))
+
+        self.assertEqual(
+            [(e.shape.command_type, e.statement, e.executions) for e in estimates],
+            [
+                (CommandType.UPDATE, "select", 1),
+                (CommandType.UPDATE, "backup", 1),
+                (CommandType.UPDATE, "update", 2),
+                (CommandType.DELETE, "select", 1),
+                (CommandType.DELETE, "backup", 1),
+                (CommandType.DELETE, "delete", 1),
+            ],
+        )
+        # 与执行器使用同一语句：带 RETURNING 的更新和删除
+        self.assertIn("RETURNING emp_id, status", estimates[2].sql)
+        self.assertIn("RETURNING emp_id", estimates[5].sql)
+        self.assertIn("employees_bak", estimates[1].sql)
+        self.assertEqual(estimates[2].full_scans, [])
+        self.assertEqual(estimates[5].full_scans, ["employees"])
+        self.assertEqual(self._count("SELECT COUNT(*) FROM employees"), before)
+        self.assertEqual(
+            self._count("SELECT COUNT(*) FROM employees WHERE status = 'retired'"), 0
+        )
+        self.assertEqual(self._count("SELECT COUNT(*) FROM employees_bak"), 0)
+
+        # 关闭备份时不规划备份语句
+        planner = DryRunPlanner(self.db_manager, batch_size=1000, backup_enabled=False)
+        estimates = planner.plan(self.processor.iter_operations(csv))
+        self.assertNotIn("backup", [e.statement for e in estimates])
+
+    def test_dry_run_plan_staging(self):
+        """测试暂存表模式的试运行规划使用暂存表语句，重复键的形状回退到逐行模式"""
+        csv = self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": emp_id,
+                    "command": "update",
+                    "new_status": "retired",
+                }
+                for emp_id in (1001, 1002, 1003)
+            ]
+            + [
+                {"table": "employees", "employee_id": emp_id, "command": "delete"}
+                for emp_id in (1004, 1005, 1005)
+            ]
+            + [
+                {
+                    "table": "departments",
+                    "id": "D001",
+                    "command": "update",
+                    "new_name": name,
+                }
+                for name in ("+_a", "+_b")
+            ]
+        )
+        planner = DryRunPlanner(
+            self.db_manager, batch_size=1000, execution_mode="staging"
+        )
+        estimates = planner.plan(self.processor.iter_operations(csv))
+
+        self.assertEqual(
+            [(e.shape.table_name, e.statement, e.executions) for e in estimates],
+            [
+                ("employees", "stage", 3),
+                ("employees", "count", 1),
+                ("employees", "unmatched", 1),
+                ("employees", "backup", 1),
+                ("employees", "update", 1),
+                ("employees", "stage", 3),
+                ("employees", "count", 1),
+                ("employees", "unmatched", 1),
+                ("employees", "backup", 1),
+                ("employees", "delete", 1),
+                ("departments", "select", 1),
+                ("departments", "backup", 1),
+                ("departments", "update", 2),
+            ],
+        )
+        self.assertIn("employees_stg", estimates[4].sql)
+        self.assertIn("employees_stg", estimates[9].sql)
+        self.assertIn("RETURNING", estimates[12].sql)
+        self.assertEqual(self._count("SELECT COUNT(*) FROM employees_stg"), 0)
+        self.assertEqual(self._count("SELECT COUNT(*) FROM employees_bak"), 0)
+
+    def test_checkpoint_resume(self):
+        """测试分段提交失败后按断点日志恢复，只执行未提交的批次"""
+        csv = self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": emp_id,
+                    "command": "update",
+                    "new_status": "retired",
+                }
+                for emp_id in range(1001, 1007)
+            ]
+        )
+        journal_path = csv + ".journal.json"
+        execute_shape = BatchExecutor.execute_shape
+        calls = []
+
+        def fail_third_batch(executor, shape, operations):
+            calls.append(len(operations))
+            if len(calls) == 3:
+                raise RuntimeError("connection lost")
+            return execute_shape(executor, shape, operations)
+
+        processor = self._create_processor(batch_size=2, commit_every=1)
+        with unittest.mock.patch.object(
+            BatchExecutor, "execute_shape", fail_third_batch
+        ), self.assertRaises(RuntimeError):
+            with self.db_manager.transaction():
+                processor.process_file(csv)
+
+        retired = "SELECT COUNT(*) FROM employees WHERE status = 'retired'"
+        self.assertEqual(self._count(retired), 4)
+        with open(journal_path, encoding="utf-8") as f:
+            journal = json.load(f)
+        self.assertEqual(journal["completed_batches"], 2)
+        self.assertFalse(journal["finished"])
+
+        # 未完成的日志不允许直接重新运行
+        with self.assertRaises(ValueError):
+            self._create_processor(batch_size=2, commit_every=1).process_file(csv)
+
+        with unittest.mock.patch.object(
+            BatchExecutor, "execute_shape", autospec=True, side_effect=execute_shape
+        ) as execute:
+            with self.db_manager.transaction():
+                self._create_processor(batch_size=2, commit_every=1).process_file(
+                    csv, resume=True
+                )
+
+        self.assertEqual(execute.call_count, 1)
+        self.assertEqual(self._count(retired), 6)
+        with open(journal_path, encoding="utf-8") as f:
+            journal = json.load(f)
+        self.assertEqual(journal["completed_batches"], 3)
+        self.assertTrue(journal["finished"])
+
+    def test_isolate_failures(self):
+        """测试失败批次回滚到保存点，二分隔离出失败行写入拒绝文件"""
+        # 1003 改为仍存在的 1004 违反主键约束，其余操作应正常完成
+        csv = self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": old,
+                    "command": "update",
+                    "new_employee_id": new,
+                }
+                for old, new in [(1001, 5001), (1002, 5002), (1003, 1004), (1004, 5004)]
+            ]
+        )
+        processor = self._create_processor(isolate_failures=True)
+        with self.db_manager.transaction():
+            processor.process_file(csv)
+
+        self.assertEqual(
+            self._count(
+                "SELECT COUNT(*) FROM employees WHERE emp_id IN (5001, 5002, 5004)"
+            ),
+            3,
+        )
+        self.assertEqual(
+            self._count("SELECT COUNT(*) FROM employees WHERE emp_id = 1003"), 1
+        )
+        # 回滚到保存点时失败批次的备份也被撤销
+        self.assertEqual(self._count("SELECT COUNT(*) FROM employees_bak"), 3)
+
+        rejects = pd.read_csv(csv + ".rejects.csv")
+        self.assertEqual(len(rejects), 1)
+        self.assertEqual(rejects.loc[0, "emp_id"], 1003)
+        self.assertEqual(rejects.loc[0, "new_emp_id"], 1004)
+        self.assertIn("UNIQUE", rejects.loc[0, "error"])
+
+    def test_validation_report(self):
+        """测试执行前一次性报告全部输入问题，且不修改任何数据"""
+        csv = self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": 1001,
+                    "command": "update",
+                    "new_salary": "abc",
+                },
+                {
+                    "table": "employees",
+                    "employee_id": 1002,
+                    "command": "update",
+                    "new_hire_date": "2021-13-01",
+                },
+                {"table": "employees", "employee_id": 1003, "command": "update"},
+                {"table": "missing", "employee_id": 1004, "command": "delete"},
+                {"table": "employees", "employee_id": 1005, "command": "merge"},
+                {
+                    "table": "employees",
+                    "employee_id": 1006,
+                    "command": "update",
+                    "new_salary": "7000",
+                    "new_hire_date": "2021-3-5",
+                },
+            ]
+        )
+        df = pd.read_csv(csv)
+        issues = self.processor.validator.validate(df)
+
+        self.assertEqual(
+            sorted((i.row, i.message) for i in issues if i.severity == "error"),
+            [
+                (1, "Not a number"),
+                (2, "Not a date (YYYY-MM-DD)"),
+                (3, "No new_ values for update"),
+                (4, "Unknown table"),
+                (5, "Invalid command"),
+            ],
+        )
+        # 合法的值按列整体转换
+        self.assertEqual(df.loc[5, "new_salary"], 7000)
+        self.assertEqual(df.loc[5, "new_hire_date"], "2021-03-05")
+
+        with contextlib.redirect_stdout(io.StringIO()), self.assertRaises(ValueError):
+            self.processor.process_file(csv)
+        self.assertEqual(self._count("SELECT COUNT(*) FROM employees_bak"), 0)
+
+    def test_schema_cache(self):
+        """测试从数据字典读取列类型和主键并缓存到磁盘"""
+        cache_path = os.path.join(self.work_dir, "schema.json")
+        processor = self._create_processor(
+            schema_cache_enabled=True, schema_cache_path=cache_path
+        )
+        employees = processor.tables_config["employees"]
+        self.assertEqual(employees.primary_key, "emp_id")
+        self.assertEqual(
+            employees.number_columns, ["emp_id", "department_id", "salary"]
+        )
+        self.assertIn("status", employees.columns)
+
+        # 磁盘缓存未过期时无需连接数据库；过期后离线时不可用
+        offline = SchemaCache(self.db_manager.config, path=cache_path)
+        self.assertEqual(offline.get("departments").primary_key, ["dept_id"])
+        expired = SchemaCache(self.db_manager.config, path=cache_path, ttl=0)
+        self.assertIsNone(expired.get("departments"))
+
+        # 已知表结构时不存在的列为错误
+        issues = processor.validator.validate(
+            pd.DataFrame(
+                [
+                    {
+                        "table": "employees",
+                        "command": "update",
+                        "employee_id": 1001,
+                        "new_colour": "red",
+                    }
+                ]
+            )
+        )
+        self.assertEqual(
+            [(i.severity, i.column) for i in issues], [("error", "new_colour")]
+        )
+
+        csv = self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": "1001",
+                    "command": "update",
+                    "new_salary": "9100",
+                }
+            ]
+        )
+        processor.process_file(csv)
+        self.assertEqual(
+            self._count("SELECT salary FROM employees WHERE emp_id = 1001"), 9100
+        )
+
+    def test_staging_mode(self):
+        """测试暂存表模式：每个形状一条集合语句，与逐行模式结果一致"""
+        processor = self._create_processor(execution_mode="staging")
+        csv = self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": emp_id,
+                    "command": "update",
+                    "new_salary": 9000,
+                    "new_hire_date": "2024-01-01",
+                }
+                for emp_id in range(1001, 1011)
+            ]
+            + [
+                {"table": "employees", "employee_id": emp_id, "command": "delete"}
+                for emp_id in (1090, 1091, 1091, 1200)
+            ]
+            + [
+                {
+                    "table": "departments",
+                    "id": "D001",
+                    "command": "update",
+                    "new_name": "+_archived",
+                },
+            ]
+        )
+        processor.process_file(csv)
+
+        self.assertEqual(
+            self._count(
+                "SELECT COUNT(*) FROM employees WHERE salary = 9000 "
+                "AND hire_date = '2024-01-01'"
+            ),
+            10,
+        )
+        self.assertEqual(self._count("SELECT COUNT(*) FROM employees"), 98)
+        self.assertEqual(
+            self.db_manager.fetch_data(
+                "SELECT dept_name FROM departments WHERE dept_id = 'D001'"
+            ).iloc[0]["dept_name"],
+            "Department1_archived",
+        )
+        self.assertEqual(self._count("SELECT COUNT(*) FROM employees_bak"), 12)
+        self.assertEqual(self._count("SELECT COUNT(*) FROM departments_bak"), 1)
+
+    def test_staging_preview_row_cap(self):
+        """测试暂存表模式的预览只保留预览行数，不加载整个变更前数据"""
+        csv = self._write_csv(
+            [
+                {
+                    "table": "employees",
+                    "employee_id": emp_id,
+                    "command": "update",
+                    "new_status": "retired",
+                }
+                for emp_id in range(1001, 1101)
+            ]
+        )
+        for mode in ("head", "tail", "sample"):
+            processor = self._create_processor(
+                execution_mode="staging",
+                preview_enabled=True,
+                preview_max_rows=5,
+                preview_mode=mode,
+            )
+            previewed = []
+            select = processor.batch_executor.preview_renderer.select_chunks
+
+            def spy(chunks):
+                shown = select(chunks)
+                previewed.append(shown)
+                return shown
+
+            output = io.StringIO()
+            with unittest.mock.patch.object(
+                processor.batch_executor.preview_renderer, "select_chunks", spy
+            ), unittest.mock.patch.object(
+                self.db_manager, "fetch_chunks", wraps=self.db_manager.fetch_chunks
+            ) as fetch_chunks, contextlib.redirect_stdout(
+                output
+            ):
+                processor.process_file(csv)
+
+            self.assertIn(f"Showing 5 of 100 rows ({mode})", output.getvalue())
+            self.assertEqual(len(previewed), 1)
+            self.assertEqual(len(previewed[0]), 5)
+            self.assertEqual(previewed[0]["emp_id"].nunique(), 5)
+            if mode == "tail":
+                self.assertEqual(
+                    previewed[0]["emp_id"].tolist(), list(range(1096, 1101))
+                )
+            self.assertTrue(
+                any(
+                    call.kwargs.get("chunk_rows") == 5
+                    for call in fetch_chunks.call_args_list
+                )
+            )
+            self.assertEqual(
+                self._count("SELECT COUNT(*) FROM employees WHERE status = 'retired'"),
+                100,
+            )
+
+    def test_staging_falls_back_for_repeated_keys(self):
+        """测试同一键的多个更新回退到逐行模式，按顺序生效"""
+        processor = self._create_processor(execution_mode="staging")
+        csv = self._write_csv(
+            [
+                {
+                    "table": "departments",
+                    "id": "D001",
+                    "command": "update",
+                    "new_name": name,
+                }
+                for name in ("+_a", "+_b")
+            ]
+        )
+        processor.process_file(csv)
+
+        self.assertEqual(
+            self.db_manager.fetch_data(
+                "SELECT dept_name FROM departments WHERE dept_id = 'D001'"
+            ).iloc[0]["dept_name"],
+            "Department1_a_b",
+        )
+
+    def test_coalesce_operations(self):
+        """测试按主键合并：更新合并、追加拼接、删除吸收之前的更新"""
+        processor = self._create_processor(coalesce_enabled=True)
+        csv = self._write_csv(
+            [
+                {
+                    "table": "departments",
+                    "id": "D001",
+                    "command": "update",
+                    "new_name": "Sales",
+                },
+                {
+                    "table": "departments",
+                    "id": "D001",
+                    "command": "update",
+                    "new_name": "+_east",
+                    "new_manager": 2001,
+                },
+                {
+                    "table": "departments",
+                    "id": "D002",
+                    "command": "update",
+                    "new_name": "+_a",
+                },
+                {
+                    "table": "departments",
+                    "id": "D002",
+                    "command": "update",
+                    "new_name": "+_b",
+                },
+                {
+                    "table": "departments",
+                    "id": "D003",
+                    "command": "update",
+                    "new_name": "Gone",
+                },
+                {"table": "departments", "id": "D003", "command": "delete"},
+            ]
+        )
+        with unittest.mock.patch.object(
+            self.db_manager,
+            "execute_many_returning",
+            wraps=self.db_manager.execute_many_returning,
+        ) as execute_many:
+            processor.process_file(csv)
+
+        result = self.db_manager.fetch_data(
+            "SELECT dept_id, dept_name, manager_id FROM departments ORDER BY dept_id"
+        ).set_index("dept_id")
+        self.assertEqual(result.at["D001", "dept_name"], "Sales_east")
+        self.assertEqual(result.at["D001", "manager_id"], 2001)
+        self.assertEqual(result.at["D002", "dept_name"], "Department2_a_b")
+        self.assertNotIn("D003", result.index)
+        # D001 和 D002 合并后各只执行一次更新
+        self.assertEqual(
+            sum(len(call.args[1]) for call in execute_many.call_args_list), 2
+        )
+
+    def test_coalesce_stops_at_non_key_operation(self):
+        """测试合并不跨越同一张表上可能作用于同一行的操作"""
+        processor = self._create_processor(coalesce_enabled=True)
+        processor.process_file(self._non_key_barrier_csv())
+        self.assertEqual(self._salary_and_status(1001), (1, "y"))
+
+        def update(table_name, conditions, **values):
+            return SQLOperation(
+                command_type=CommandType.UPDATE,
+                table_name=table_name,
+                conditions=conditions,
+                table_config=self.processor.tables_config[table_name],
+                update_values=values,
+            )
+
+        operations = [
+            update("employees", {"emp_id": 1001}, status="x"),
+            update("employees", {"emp_id": 1002}, status="x"),
+            update("departments", {"manager_id": 1001}, dept_name="a"),
+            update("employees", {"emp_id": 1001}, salary=1),
+            update("employees", {"emp_id": 1002, "status": "x"}, salary=2),
+            update("employees", {"emp_id": 1001}, salary=3),
+            update("employees", {"emp_id": 1002}, salary=4),
+            update("employees", {"status": "x"}, salary=5),
+            update("employees", {"emp_id": 1001}, status="y"),
+        ]
+        coalesced = OperationCoalescer().coalesce(operations)
+
+        # 其他表的操作不阻断合并；包含主键的其他条件只阻断该主键；
+        # 不含主键的条件阻断该表全部已有的键
+        self.assertEqual(
+            [(op.conditions, op.update_values) for op in coalesced],
+            [
+                ({"emp_id": 1001}, {"status": "x", "salary": 3}),
+                ({"emp_id": 1002}, {"status": "x"}),
+                ({"manager_id": 1001}, {"dept_name": "a"}),
+                ({"emp_id": 1002, "status": "x"}, {"salary": 2}),
+                ({"emp_id": 1002}, {"salary": 4}),
+                ({"status": "x"}, {"salary": 5}),
+                ({"emp_id": 1001}, {"status": "y"}),
+            ],
+        )
+
+    def test_partition_by_key(self):
+        """测试按主键哈希划分：同一主键在同一个桶，各桶互不相交"""
+        table_config = self.processor.tables_config["employees"]
+        operations = [
+            SQLOperation(
+                command_type=CommandType.UPDATE,
+                table_name="employees",
+                conditions={"emp_id": emp_id},
+                table_config=table_config,
+                update_values={"salary": 1},
+            )
+            for emp_id in list(range(1001, 1101)) + [1001.0, 1050]
+        ]
+        buckets = partition_by_key(operations, 4)
+
+        self.assertEqual(len(buckets), 4)
+        self.assertEqual(sum(len(bucket) for bucket in buckets), len(operations))
+        keys = [{int(op.conditions["emp_id"]) for op in bucket} for bucket in buckets]
+        self.assertEqual(sum(len(bucket_keys) for bucket_keys in keys), 100)
+        self.assertEqual(len(set().union(*keys)), 100)
+
+        # 条件不含主键的操作可能修改任意桶中的行，无法划分
+        operations.append(
+            SQLOperation(
+                command_type=CommandType.DELETE,
+                table_name="employees",
+                conditions={"status": "inactive"},
+                table_config=table_config,
+            )
+        )
+        self.assertIsNone(partition_by_key(operations, 4))
+
+    def test_partition_mixed_operations(self):
+        """测试处理器按主键划分混合操作：同一主键的删除和更新在同一任务中"""
+        processor = self._create_processor(workers=4, parallel_partition="key")
+        table_config = processor.tables_config["employees"]
+
+        def update(emp_id, salary):
+            return SQLOperation(
+                command_type=CommandType.UPDATE,
+                table_name="employees",
+                conditions={"emp_id": emp_id},
+                table_config=table_config,
+                update_values={"salary": salary},
+            )
+
+        def delete(conditions):
+            return SQLOperation(
+                command_type=CommandType.DELETE,
+                table_name="employees",
+                conditions=conditions,
+                table_config=table_config,
+            )
+
+        operations = [update(emp_id, 1) for emp_id in range(1001, 1041)]
+        operations += [delete({"emp_id": 1001.0}), delete({"emp_id": 1020})]
+        operations += [update(1020, 2), update(1035, 3), delete({"emp_id": 1035})]
+
+        tasks = processor._partition("employees", operations)
+        self.assertEqual(
+            [name for name, _ in tasks],
+            [f"employees#{i}" for i in range(1, len(tasks) + 1)],
+        )
+        self.assertGreater(len(tasks), 1)
+        self.assertEqual(sum(len(ops) for _, ops in tasks), len(operations))
+        for emp_id in (1001, 1020, 1035):
+            owners = [
+                ops
+                for _, ops in tasks
+                if any(int(op.conditions["emp_id"]) == emp_id for op in ops)
+            ]
+            self.assertEqual(len(owners), 1)
+            # 任务内保持该主键操作的原有顺序
+            key_ops = [op for op in owners[0] if op.conditions["emp_id"] == emp_id]
+            expected = [op for op in operations if op.conditions["emp_id"] == emp_id]
+            self.assertEqual(key_ops, expected)
+
+        # 不含主键条件的操作走单任务路径
+        serial = operations + [delete({"status": "inactive"})]
+        self.assertEqual(
+            processor._partition("employees", serial), [("employees", serial)]
+        )
+
+        # 按表划分时整张表为一个任务
+        processor = self._create_processor(workers=4)
+        self.assertEqual(
+            processor._partition("employees", operations), [("employees", operations)]
+        )
+
+    def test_yaml_stream(self):
+        """测试流式读取YAML：逐个批次构造，结果与整体加载一致"""
+        data = {
+            "batches": [
+                {
+                    "id": f"BATCH_{i:03d}",
+                    "operations": [
+                        {
+                            "table": "employees",
+                            "command": "update",
+                            "conditions": {"employee_id": 1000 + i},
+                            "new_values": {
+                                "salary": 7000.5,
+                                "hire_date": datetime.date(2024, 1, i),
+                            },
+                        }
+                    ],
+                }
+                for i in range(1, 4)
+            ],
+            "description": "Streamed batches",
+            "version": "1.0",
+        }
+        path = os.path.join(self.work_dir, "input.yaml")
+        with open(path, "w", encoding="utf-8") as f:
+            yaml.dump(data, f)
+
+        stream = YAMLStream(path)
+        self.assertEqual(list(stream.batches()), data["batches"])
+        self.assertEqual(
+            stream.header, {"description": "Streamed batches", "version": "1.0"}
+        )
+
+        # YAML操作直接转换为SQL操作，不经过 DataFrame
+        with unittest.mock.patch.object(
+            YAMLProcessor, "batch_frame", side_effect=AssertionError
+        ):
+            self.processor.process_file(path)
+        result = self.db_manager.fetch_data(
+            "SELECT hire_date FROM employees WHERE salary = 7000.5 ORDER BY emp_id"
+        )
+        self.assertEqual(
+            result["hire_date"].tolist(), ["2024-01-01", "2024-01-02", "2024-01-03"]
+        )
+
+    def test_yaml_invalid_header_changes_nothing(self):
+        """测试YAML顶层字段无效时在执行任何批次之前报错"""
+        batches = (
+            "batches:\n"
+            "- id: BATCH_001\n"
+            "  operations:\n"
+            "  - table: employees\n"
+            "    command: update\n"
+            "    conditions: {employee_id: 1001}\n"
+            "    new_values: {salary: 1}\n"
+        )
+        processor = self._create_processor(commit_every=1)
+        for name, content in (
+            # 缺少的字段位于 batches 之后（yaml.dump 按键排序的输出）
+            ("sorted.yaml", batches + "description: No version\n"),
+            ("header_first.yaml", "version: 1.0\ndescription: Bad\n" + batches),
+        ):
+            path = os.path.join(self.work_dir, name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            with self.assertRaises(ValueError):
+                processor.process_file(path)
+            self.assertEqual(
+                self._count("SELECT COUNT(*) FROM employees WHERE salary = 1"), 0
+            )
+
+    def _salary(self, emp_id: int) -> float:
+        return self.db_manager.fetch_data(
+            f"SELECT salary FROM employees WHERE emp_id = {emp_id}"
+        ).iloc[0]["salary"]
+
+    def test_worker_sessions_from_pool(self):
+        """测试连接池：借出独立会话、异常后归还并回滚、借满时等待"""
+        manager = DatabaseManager(
+            DatabaseConfig(
+                backend="sqlite",
+                database=os.path.join(self.work_dir, "test.db"),
+                pool=PoolConfig(min=1, max=2),
+            )
+        )
+        pool = manager.pool
+        self.assertTrue(manager.pool_enabled)
+        self.assertEqual(pool.busy, 1)
+
+        with manager.worker() as session:
+            self.assertIsNot(session.connection, manager.connection)
+            self.assertEqual(pool.busy, 2)
+            session.execute_sql("UPDATE employees SET salary = 1 WHERE emp_id = 1001")
+            session.commit()
+        self.assertEqual(pool.busy, 1)
+        self.assertEqual(len(pool.idle), 1)
+        self.assertEqual(self._salary(1001), 1)
+
+        # 异常退出时连接仍归还，未提交的事务被回滚
+        with self.assertRaises(KeyError):
+            with manager.worker() as session:
+                session.execute_sql(
+                    "UPDATE employees SET salary = 2 WHERE emp_id = 1001"
+                )
+                raise KeyError("task failed")
+        self.assertEqual(pool.busy, 1)
+        self.assertEqual(self._salary(1001), 1)
+
+        # 借满（主连接 + 1 个会话）时下一个会话等待归还
+        acquired = threading.Event()
+
+        def acquire_worker():
+            with manager.worker():
+                acquired.set()
+
+        with manager.worker():
+            thread = threading.Thread(target=acquire_worker)
+            thread.start()
+            self.assertFalse(acquired.wait(0.2))
+        thread.join(5)
+        self.assertTrue(acquired.is_set())
+        self.assertEqual(pool.busy, 1)
+
+        manager.close()
+        self.assertEqual(pool.busy, 0)
+
+    def test_worker_requires_pool(self):
+        """测试未配置连接池时不能借出会话"""
+        with self.assertRaises(RuntimeError):
+            with self.db_manager.worker():
+                pass
+
+    def test_data_changes_aligned_by_primary_key(self):
+        """测试数据变化按主键对齐，与行顺序无关"""
+        df_before = pd.DataFrame(
+            {"EMP_ID": [1, 2, 3], "SALARY": [100, 200, 300], "STATUS": ["a", "b", None]}
+        )
+        df_after = pd.DataFrame(
+            {
+                "emp_id": [3, 1, 2],
+                "salary": [300, 150.0, 200],
+                "status": [None, "a", "c"],
+            }
+        )
+
+        changes = DataProcessor._get_data_changes(df_before, df_after, "emp_id")
+
+        self.assertEqual(
+            changes.values.tolist(),
+            [[1, "salary", 100, 150.0], [2, "status", "b", "c"]],
+        )
+        # 不修改调用方的数据
+        self.assertEqual(list(df_before.columns), ["EMP_ID", "SALARY", "STATUS"])
+
+    def test_parallel_not_supported(self):
+        """测试 SQLite 后端拒绝并行执行"""
+        processor = self._create_processor(workers=2)
+        csv = self._write_csv(
+            [{"table": "employees", "employee_id": 1001, "command": "delete"}]
+        )
+        with self.assertRaises(ValueError):
+            processor.process_file(csv)
+
+    def test_parallel_rejected_for_yaml(self):
+        """测试 YAML 输入拒绝并行执行（各批次无法作为整体回滚）"""
+        path = os.path.join(self.work_dir, "parallel.yaml")
+        with open(path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(
+                {
+                    "version": "1.0",
+                    "description": "Parallel",
+                    "batches": [
+                        {
+                            "id": "BATCH_001",
+                            "operations": [
+                                {
+                                    "table": "employees",
+                                    "command": "delete",
+                                    "conditions": {"employee_id": 1001},
+                                }
+                            ],
+                        }
+                    ],
+                },
+                f,
+            )
+        processor = self._create_processor(workers=2)
+        with self.assertRaises(ValueError) as cm:
+            processor.process_file(path)
+        self.assertIn("YAML", str(cm.exception))
+        self.assertEqual(self._count("SELECT COUNT(*) FROM employees"), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()